@@ -13,12 +13,41 @@ def parse_args() -> argparse.Namespace:
     parser = argparse.ArgumentParser(description="Convert CSV files to a normalized SQLite database")
     parser.add_argument("csv_dir", type=Path, help="Directory containing CSV files")
     parser.add_argument("db_path", type=Path, help="Output SQLite database path")
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=None,
+        help="Number of parallel CSV readers (default: CPU count based)",
+    )
+    parser.add_argument(
+        "--processes",
+        action="store_true",
+        help="Read CSV files in worker processes instead of threads",
+    )
+    parser.add_argument(
+        "--engine",
+        choices=["c", "python", "pyarrow"],
+        default=None,
+        help="pandas CSV engine (default: pyarrow if installed)",
+    )
+    parser.add_argument(
+        "--all-text",
+        action="store_true",
+        help="Read every column as text, keeping leading zeros",
+    )
     return parser.parse_args()
 
 
 def main() -> None:
     args = parse_args()
-    converter = CsvToSqliteConverter(csv_dir=str(args.csv_dir), db_path=str(args.db_path))
+    converter = CsvToSqliteConverter(
+        csv_dir=str(args.csv_dir),
+        db_path=str(args.db_path),
+        max_workers=args.workers,
+        use_processes=args.processes,
+        engine=args.engine,
+        all_text=args.all_text,
+    )
     converter.convert()
     # Create view if the required tables exist
     with Database(args.db_path) as db:
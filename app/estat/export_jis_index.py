@@ -0,0 +1,29 @@
+#!/usr/bin/env python3
+from __future__ import annotations
+
+import argparse
+from pathlib import Path
+
+
+from dbf_utils.database import Database
+from dbf_utils.r2ka import export_jis_index
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description="Export jis_code to sub_area_id mapping as a binary index"
+    )
+    parser.add_argument("db_path", type=Path, help="SQLite database path")
+    parser.add_argument("index_path", type=Path, help="Output index file path")
+    return parser.parse_args()
+
+
+def main() -> None:
+    args = parse_args()
+    with Database(args.db_path) as db:
+        count = export_jis_index(db, args.index_path)
+    print(f"Wrote {count} entries to {args.index_path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -2,11 +2,11 @@
 from __future__ import annotations
 
 import argparse
-import csv
 from pathlib import Path
 
 
 from dbf_utils.database import Database
+from dbf_utils.r2ka import export_jis_mapping
 
 
 def parse_args() -> argparse.Namespace:
@@ -15,23 +15,20 @@ def parse_args() -> argparse.Namespace:
     )
     parser.add_argument("db_path", type=Path, help="SQLite database path")
     parser.add_argument("csv_path", type=Path, help="Output CSV file path")
+    parser.add_argument(
+        "--compression",
+        choices=["infer", "none", "gzip", "zstd"],
+        default="infer",
+        help="Output compression (default: infer from file suffix)",
+    )
     return parser.parse_args()
 
 
 def main() -> None:
     args = parse_args()
+    compression = None if args.compression == "none" else args.compression
     with Database(args.db_path) as db:
-        cur = db.conn.execute(
-            "SELECT sub_area_id, prefecture_code, city_code, s_area_code "
-            "FROM codes_view ORDER BY sub_area_id"
-        )
-        rows = cur.fetchall()
-
-    with open(args.csv_path, "w", newline="") as f:
-        writer = csv.writer(f)
-        for sub_area_id, pref_code, city_code, s_area_code in rows:
-            jis_code = f"{pref_code}{city_code:03d}{s_area_code:06d}"
-            writer.writerow([jis_code, sub_area_id])
+        export_jis_mapping(db, args.csv_path, compression=compression)
 
 
 if __name__ == "__main__":
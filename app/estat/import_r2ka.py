@@ -4,6 +4,7 @@ from __future__ import annotations
 import argparse
 from pathlib import Path
 import glob
+import sys
 
 
 from dbf_utils.database import Database, create_codes_view
@@ -26,6 +27,18 @@ def parse_args() -> argparse.Namespace:
         default="cp932",
         help="File encoding for input CSV/DBF (default: cp932)",
     )
+    parser.add_argument(
+        "--max-errors",
+        type=int,
+        default=0,
+        help="Rows with invalid codes allowed before aborting, -1 for no limit (default: 0)",
+    )
+    parser.add_argument(
+        "--rejects",
+        type=Path,
+        default=None,
+        help="Write rows with invalid codes to this CSV file",
+    )
     return parser.parse_args()
 
 
@@ -36,7 +49,12 @@ def main() -> None:
         matches = glob.glob(pattern)
         paths.extend(matches if matches else [pattern])
     with Database(args.db_path) as db:
-        importer = R2KAImporter(db, encoding=args.encoding)
+        importer = R2KAImporter(
+            db,
+            encoding=args.encoding,
+            max_errors=None if args.max_errors < 0 else args.max_errors,
+            rejects_path=args.rejects,
+        )
         try:
             attempted, inserted = importer.import_csvs(paths)
         except ValueError as e:
@@ -44,6 +62,8 @@ def main() -> None:
             sys.exit(1)
         create_codes_view(db.conn)
         print(f"Processed {attempted} rows, inserted {inserted} new records.")
+        if importer.rejects:
+            print(f"Rejected {len(importer.rejects)} rows (see import_rejects).")
         print(f"Database saved to {args.db_path}")
 
 
@@ -0,0 +1,42 @@
+#!/usr/bin/env python3
+from __future__ import annotations
+
+import argparse
+from pathlib import Path
+
+
+from dbf_utils.arrow_export import export_database
+from dbf_utils.database import Database
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description="Export views and tables as Parquet or Arrow IPC files"
+    )
+    parser.add_argument("db_path", type=Path, help="SQLite database path")
+    parser.add_argument("out_dir", type=Path, help="Output directory")
+    parser.add_argument(
+        "--format",
+        choices=["parquet", "ipc"],
+        default="parquet",
+        help="Output format (default: parquet)",
+    )
+    parser.add_argument(
+        "--table",
+        action="append",
+        dest="tables",
+        help="Table or view to export (repeatable, default: all known)",
+    )
+    return parser.parse_args()
+
+
+def main() -> None:
+    args = parse_args()
+    with Database(args.db_path) as db:
+        counts = export_database(db.conn, args.out_dir, format=args.format, names=args.tables)
+    for name, rows in counts.items():
+        print(f"{name}: {rows} rows")
+
+
+if __name__ == "__main__":
+    main()
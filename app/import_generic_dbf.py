@@ -4,27 +4,9 @@
 from __future__ import annotations
 
 import argparse
-import sqlite3
 from pathlib import Path
-from typing import Iterable
 
-from dbfread import DBF
-
-
-def import_dbf(db_path: Path, dbf_files: Iterable[Path], encoding: str = "cp932") -> None:
-    conn = sqlite3.connect(db_path)
-    for dbf_path in dbf_files:
-        table = dbf_path.stem
-        dbf = DBF(str(dbf_path), encoding=encoding)
-        fields = dbf.field_names
-        columns = ", ".join(f'"{f}" TEXT' for f in fields)
-        conn.execute(f'CREATE TABLE IF NOT EXISTS {table} ({columns})')
-        placeholders = ", ".join("?" for _ in fields)
-        for record in dbf:
-            values = [record[f] for f in fields]
-            conn.execute(f'INSERT INTO {table} VALUES ({placeholders})', values)
-    conn.commit()
-    conn.close()
+from dbf_utils.dbf_to_sqlite import import_dbf_files
 
 
 def parse_args() -> argparse.Namespace:
@@ -32,12 +14,29 @@ def parse_args() -> argparse.Namespace:
     p.add_argument("db_path", type=Path, help="SQLite database path")
     p.add_argument("dbf_files", nargs="+", type=Path, help="DBF files to import")
     p.add_argument("--encoding", default="cp932", help="File encoding (default: cp932)")
+    p.add_argument(
+        "--batch-size",
+        type=int,
+        default=10000,
+        help="Number of records per INSERT batch (default: 10000)",
+    )
+    p.add_argument(
+        "--dbfread",
+        action="store_true",
+        help="Read records with dbfread instead of the built-in reader",
+    )
     return p.parse_args()
 
 
 def main() -> None:
     args = parse_args()
-    import_dbf(args.db_path, args.dbf_files, encoding=args.encoding)
+    import_dbf_files(
+        args.db_path,
+        args.dbf_files,
+        encoding=args.encoding,
+        batch_size=args.batch_size,
+        use_dbfread=args.dbfread,
+    )
     print(f"Database saved to {args.db_path}")
 
 
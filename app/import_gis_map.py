@@ -18,6 +18,11 @@ def parse_args() -> argparse.Namespace:
     p.add_argument("db_path", type=Path, help="SQLite database path")
     p.add_argument("dbf_file", type=Path, help="GIS Map DBF file")
     p.add_argument("--encoding", default="cp932", help="File encoding (default: cp932)")
+    p.add_argument(
+        "--shapes",
+        action="store_true",
+        help="Also import polygons from the .shp next to the DBF",
+    )
     return p.parse_args()
 
 
@@ -25,9 +30,13 @@ def main() -> None:
     args = parse_args()
     with Database(args.db_path) as db:
         importer = GISMapImporter(db, encoding=args.encoding)
-        with io.open(args.dbf_file, "rb") as f:
-            attempted, inserted = importer.import_dbf(f.name)
-        print(f"Processed {attempted} rows, inserted {inserted} cities.")
+        if args.shapes:
+            inserted, polygons = importer.import_shapefile(str(args.dbf_file))
+            print(f"Inserted {inserted} cities and {polygons} polygons.")
+        else:
+            with io.open(args.dbf_file, "rb") as f:
+                attempted, inserted = importer.import_dbf(f.name)
+            print(f"Processed {attempted} rows, inserted {inserted} cities.")
         print(f"Database saved to {args.db_path}")
 
 
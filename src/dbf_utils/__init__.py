@@ -1,9 +1,41 @@
+from __future__ import annotations
+
+from importlib import import_module
+from typing import TYPE_CHECKING, Any
+
 from .database import Database, create_codes_view, create_areas_view
-from .gis_map import GISMapImporter
+
+if TYPE_CHECKING:
+    from .combined_importer import CombinedImporter
+    from .gis_map import GISMapImporter
+    from .hierarchy import AreaHierarchy
+
+# Submodules are imported on first attribute access to keep startup light.
+_LAZY_ATTRS = {
+    "GISMapImporter": ".gis_map",
+    "CombinedImporter": ".combined_importer",
+    "AreaHierarchy": ".hierarchy",
+}
+
+
+def __getattr__(name: str) -> Any:
+    module = _LAZY_ATTRS.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(import_module(module, __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__() -> list[str]:
+    return sorted(set(globals()) | set(_LAZY_ATTRS))
+
 
 __all__ = [
     "Database",
     "create_codes_view",
     "create_areas_view",
     "GISMapImporter",
+    "CombinedImporter",
+    "AreaHierarchy",
 ]
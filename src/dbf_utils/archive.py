@@ -0,0 +1,78 @@
+from __future__ import annotations
+
+import io
+import os
+from pathlib import Path, PurePosixPath
+from typing import BinaryIO, Iterable, List, Optional, Sequence, Tuple
+
+# Read buffer used for both plain files and archive members.
+READ_BUFFER_SIZE = 1 << 20
+
+
+def split_archive_path(path: str | Path) -> Optional[Tuple[str, str]]:
+    """Split ``archive.zip/member`` into ``(archive, member)``.
+
+    Returns None when no leading component of ``path`` is a ZIP file.
+    """
+    parts = Path(path).parts
+    for i in range(1, len(parts)):
+        head = os.path.join(*parts[:i])
+        if head.lower().endswith(".zip") and os.path.isfile(head):
+            return head, str(PurePosixPath(*parts[i:]))
+    return None
+
+
+def open_input(path: str | Path, buffer_size: int = READ_BUFFER_SIZE) -> BinaryIO:
+    """Open a file or a ZIP member (``archive.zip/member``) for binary reading.
+
+    Archive members are streamed without extraction and wrapped in a
+    buffered reader; they support seeking like regular files.
+    """
+    split = split_archive_path(path)
+    if split is None:
+        return open(path, "rb", buffering=buffer_size)
+    import zipfile
+
+    archive, member = split
+    zf = zipfile.ZipFile(archive)
+    try:
+        raw = zf.open(member)
+    except KeyError:
+        zf.close()
+        raise FileNotFoundError(f"{member} not found in {archive}") from None
+    # The member keeps the archive open; close it together with the member.
+    zf.close()
+    return io.BufferedReader(raw, buffer_size=buffer_size)  # type: ignore[arg-type]
+
+
+def input_size(f: BinaryIO) -> int:
+    """Return the size of an opened input without changing its position."""
+    pos = f.tell()
+    size = f.seek(0, io.SEEK_END)
+    f.seek(pos)
+    return size
+
+
+def expand_inputs(paths: Iterable[str | Path], suffixes: Sequence[str]) -> List[str]:
+    """Replace ZIP archives in ``paths`` with their members matching ``suffixes``.
+
+    Other paths, including ``archive.zip/member`` paths, are returned as is.
+    """
+    suffixes = tuple(s.lower() for s in suffixes)
+    expanded: List[str] = []
+    for path in paths:
+        path = str(path)
+        if path.lower().endswith(".zip") and os.path.isfile(path):
+            import zipfile
+
+            with zipfile.ZipFile(path) as zf:
+                members = sorted(
+                    n for n in zf.namelist() if n.lower().endswith(suffixes)
+                )
+            expanded.extend(os.path.join(path, m) for m in members)
+        else:
+            expanded.append(path)
+    return expanded
+
+
+__all__ = ["open_input", "expand_inputs", "split_archive_path", "input_size"]
@@ -0,0 +1,203 @@
+from __future__ import annotations
+
+import os
+import sqlite3
+import tempfile
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+DEFAULT_BATCH_SIZE = 65536
+
+DEFAULT_EXPORTS = [
+    "codes_view",
+    "areas_view",
+    "prefectures",
+    "cities",
+    "areas",
+    "sections",
+    "sub_areas",
+    "subprefecters",
+    "distincts",
+    "wards",
+]
+
+
+def _require_pyarrow() -> Any:
+    try:
+        import pyarrow
+    except ImportError as e:  # pragma: no cover - depends on environment
+        raise ImportError("Arrow export requires the 'pyarrow' package") from e
+    return pyarrow
+
+
+def _quote(name: str) -> str:
+    return '"' + name.replace('"', '""') + '"'
+
+
+def _object_exists(conn: sqlite3.Connection, name: str) -> bool:
+    """Return True if a table or view with the given name exists."""
+    cur = conn.execute(
+        "SELECT name FROM sqlite_master WHERE type IN ('table', 'view') AND name=?",
+        (name,),
+    )
+    return cur.fetchone() is not None
+
+
+def _arrow_type(pa: Any, declared: str, stored: Sequence[str]) -> Any:
+    """Return an Arrow type from a declared SQLite type or the stored types.
+
+    ``stored`` lists the ``typeof()`` values found in a column without a
+    declared type; mixed columns other than integer and real become text.
+    """
+    declared = declared.upper()
+    if "INT" in declared:
+        return pa.int64()
+    if any(t in declared for t in ("REAL", "FLOA", "DOUB")):
+        return pa.float64()
+    if any(t in declared for t in ("CHAR", "TEXT", "CLOB")):
+        return pa.dictionary(pa.int32(), pa.string())
+    kinds = set(stored)
+    if kinds == {"integer"}:
+        return pa.int64()
+    if kinds and kinds <= {"integer", "real"}:
+        return pa.float64()
+    if kinds == {"blob"}:
+        return pa.binary()
+    return pa.dictionary(pa.int32(), pa.string())
+
+
+def _as_text(value: object) -> Optional[str]:
+    if value is None or isinstance(value, str):
+        return value
+    if isinstance(value, bytes):
+        return value.decode("utf-8", "replace")
+    return str(value)
+
+
+def _to_array(pa: Any, values: Sequence[object], typ: Any, column: str) -> Any:
+    try:
+        if pa.types.is_dictionary(typ):
+            return pa.array([_as_text(v) for v in values], type=pa.string()).dictionary_encode()
+        return pa.array(values, type=typ)
+    except (pa.ArrowInvalid, pa.ArrowTypeError) as e:
+        raise ValueError(f"Column {column!r} holds values that are not {typ}: {e}") from e
+
+
+def iter_record_batches(
+    conn: sqlite3.Connection,
+    name: str,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+) -> Tuple[Any, Iterator[Any]]:
+    """Return the Arrow schema and an iterator of record batches for ``name``.
+
+    Rows are fetched from the cursor ``batch_size`` at a time so only one
+    batch is held in memory. Integer and real columns keep their numeric
+    types and text columns are dictionary encoded. Columns without a
+    declared type, such as computed view columns, are typed from the
+    values they hold, found with one aggregate query; columns mixing text
+    with other values are exported as text. Values that do not match a
+    declared type raise :class:`ValueError`.
+    """
+    pa = _require_pyarrow()
+    declared = {
+        row[1]: row[2] or ""
+        for row in conn.execute(f"PRAGMA table_info({_quote(name)})")
+    }
+    cur = conn.execute(f"SELECT * FROM {_quote(name)}")
+    columns = [d[0] for d in cur.description]
+
+    stored: Dict[str, List[str]] = {}
+    untyped = [c for c in columns if not declared.get(c)]
+    if untyped:
+        kinds = ("integer", "real", "text", "blob")
+        stats = [
+            f"max(typeof({_quote(c)}) = '{k}')" for c in untyped for k in kinds
+        ]
+        row = conn.execute(f"SELECT {', '.join(stats)} FROM {_quote(name)}").fetchone()
+        for i, col in enumerate(untyped):
+            stored[col] = [k for j, k in enumerate(kinds) if row[4 * i + j]]
+
+    types = [_arrow_type(pa, declared.get(c, ""), stored.get(c, ())) for c in columns]
+    schema = pa.schema(list(zip(columns, types)))
+
+    def batches() -> Iterator[Any]:
+        while True:
+            rows: List[Tuple[object, ...]] = cur.fetchmany(batch_size)
+            if not rows:
+                return
+            cols = list(zip(*rows))
+            arrays = [_to_array(pa, cols[i], types[i], columns[i]) for i in range(len(columns))]
+            yield pa.RecordBatch.from_arrays(arrays, schema=schema)
+
+    return schema, batches()
+
+
+def export_table(
+    conn: sqlite3.Connection,
+    name: str,
+    path: str | Path,
+    format: str = "parquet",
+    batch_size: int = DEFAULT_BATCH_SIZE,
+) -> int:
+    """Write a table or view to ``path`` and return the number of rows.
+
+    ``format`` is ``"parquet"`` or ``"ipc"`` (Arrow IPC stream format).
+    The file is written under a temporary name next to ``path`` and renamed
+    on success, so a failed export leaves no partial file.
+    """
+    pa = _require_pyarrow()
+    if format not in ("parquet", "ipc"):
+        raise ValueError(f"Unsupported export format {format!r}")
+    schema, batches = iter_record_batches(conn, name, batch_size)
+    path = Path(path)
+    fd, tmp = tempfile.mkstemp(prefix=f".{path.name}.", suffix=".tmp", dir=path.parent)
+    os.close(fd)
+    rows = 0
+    try:
+        if format == "parquet":
+            import pyarrow.parquet as pq
+
+            writer = pq.ParquetWriter(tmp, schema)
+        else:
+            writer = pa.ipc.new_stream(tmp, schema)
+        try:
+            for batch in batches:
+                writer.write_batch(batch)
+                rows += batch.num_rows
+        finally:
+            writer.close()
+        os.replace(tmp, path)
+    finally:
+        if os.path.exists(tmp):
+            os.unlink(tmp)
+    return rows
+
+
+def export_database(
+    conn: sqlite3.Connection,
+    out_dir: str | Path,
+    format: str = "parquet",
+    names: Optional[Iterable[str]] = None,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+) -> Dict[str, int]:
+    """Export views and base tables to ``out_dir``, one file per object.
+
+    By default ``codes_view``, ``areas_view`` and the normalized tables that
+    exist in the database are exported. Returns a mapping of object name to
+    row count.
+    """
+    out_dir = Path(out_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    suffix = ".parquet" if format == "parquet" else ".arrows"
+    targets = list(names) if names is not None else [
+        n for n in DEFAULT_EXPORTS if _object_exists(conn, n)
+    ]
+    counts: Dict[str, int] = {}
+    for name in targets:
+        counts[name] = export_table(
+            conn, name, out_dir / f"{name}{suffix}", format=format, batch_size=batch_size
+        )
+    return counts
+
+
+__all__ = ["export_database", "export_table", "iter_record_batches"]
@@ -0,0 +1,55 @@
+from __future__ import annotations
+
+import sqlite3
+from typing import Tuple
+
+
+class ImportProgress:
+    """Per-file progress of an importer, kept in the ``import_progress`` table.
+
+    :meth:`checkpoint` stores the number of records of a source that are
+    written and commits the connection, so imported rows and their progress
+    become durable in the same transaction. An interrupted import can then
+    continue from the last checkpoint.
+    """
+
+    def __init__(self, conn: sqlite3.Connection, importer: str) -> None:
+        self._conn = conn
+        self.importer = importer
+        conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS import_progress (
+                importer TEXT NOT NULL,
+                source TEXT NOT NULL,
+                records_done INTEGER NOT NULL DEFAULT 0,
+                completed INTEGER NOT NULL DEFAULT 0,
+                updated_at TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP,
+                PRIMARY KEY (importer, source)
+            )
+            """
+        )
+        conn.commit()
+
+    def get(self, source: str) -> Tuple[int, bool]:
+        """Return ``(records_done, completed)`` for ``source``."""
+        row = self._conn.execute(
+            "SELECT records_done, completed FROM import_progress WHERE importer = ? AND source = ?",
+            (self.importer, source),
+        ).fetchone()
+        if row is None:
+            return 0, False
+        return int(row[0]), bool(row[1])
+
+    def checkpoint(self, source: str, records_done: int, completed: bool = False) -> None:
+        """Record progress for ``source`` and commit."""
+        self._conn.execute(
+            "INSERT INTO import_progress (importer, source, records_done, completed, updated_at) "
+            "VALUES (?, ?, ?, ?, CURRENT_TIMESTAMP) "
+            "ON CONFLICT(importer, source) DO UPDATE SET records_done = excluded.records_done, "
+            "completed = excluded.completed, updated_at = excluded.updated_at",
+            (self.importer, source, records_done, int(completed)),
+        )
+        self._conn.commit()
+
+
+__all__ = ["ImportProgress"]
@@ -0,0 +1,368 @@
+from __future__ import annotations
+
+import argparse
+import glob
+import sys
+from itertools import islice
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Sequence, TextIO, Tuple
+
+from .database import Database, StagedDatabase
+
+
+def _expand(patterns: Iterable[str]) -> List[str]:
+    paths: List[str] = []
+    for pattern in patterns:
+        matches = sorted(glob.glob(pattern))
+        paths.extend(matches if matches else [pattern])
+    return paths
+
+
+def _parse_codes(line: str, size: int) -> Optional[Tuple[int, ...]]:
+    """Parse a lookup input line into a code tuple of ``size`` items.
+
+    Accepts codes separated by commas or whitespace, or a single
+    concatenated code (``jis_code`` for sub-areas, 5 digits for cities).
+    """
+    parts = line.replace(",", " ").split()
+    try:
+        values = [int(p) for p in parts]
+    except ValueError:
+        return None
+    if len(values) == size:
+        return tuple(values)
+    if len(values) != 1:
+        return None
+    code = values[0]
+    if size == 3:
+        return (code // 1000000000, code // 1000000 % 1000, code % 1000000)
+    return (code // 1000, code % 1000)
+
+
+def _run_lookup(
+    lines: Iterable[str],
+    out: TextIO,
+    size: int,
+    lookup,
+    batch_size: int,
+) -> int:
+    """Resolve ``lines`` in batches and write one id (or blank) per line."""
+    count = 0
+    it = iter(lines)
+    while True:
+        chunk = list(islice(it, batch_size))
+        if not chunk:
+            break
+        keys = [_parse_codes(line, size) for line in chunk]
+        found = iter(lookup([k for k in keys if k is not None]))
+        results = [next(found) if k is not None else None for k in keys]
+        out.write("".join(f"{r}\n" if r is not None else "\n" for r in results))
+        out.flush()
+        count += len(chunk)
+    return count
+
+
+def _open_target(args: argparse.Namespace) -> Database:
+    if args.atomic:
+        return StagedDatabase(args.db_path)
+    return Database(args.db_path)
+
+
+def _reject_options(args: argparse.Namespace, default: Optional[int]) -> Dict[str, Any]:
+    if args.max_errors is None:
+        max_errors = default
+    else:
+        max_errors = None if args.max_errors < 0 else args.max_errors
+    return {"max_errors": max_errors, "rejects_path": args.rejects}
+
+
+def cmd_import(args: argparse.Namespace) -> int:
+    if args.source == "combined" and not args.gis:
+        print("import combined requires --gis", file=sys.stderr)
+        return 2
+    if args.resume and (args.atomic or args.checkpoint_every is None):
+        print("--resume requires --checkpoint-every and cannot be used with --atomic", file=sys.stderr)
+        return 2
+    if args.source == "csv":
+        from .csv_to_sqlite import CsvToSqliteConverter
+
+        converter = CsvToSqliteConverter(
+            csv_dir=args.inputs[0],
+            db_path=str(args.db_path),
+            max_workers=args.workers,
+            engine=args.engine,
+            all_text=args.all_text,
+        )
+        if args.atomic:
+            with StagedDatabase(args.db_path) as db:
+                converter.convert(db.conn)
+        else:
+            converter.convert()
+        print(f"Database saved to {args.db_path}", file=sys.stderr)
+        return 0
+
+    paths = _expand(args.inputs)
+    if args.source == "dbf":
+        from .dbf_to_sqlite import import_dbf_files
+
+        if args.atomic:
+            from .archive import expand_inputs
+            from .dbf_to_sqlite import import_dbf
+
+            rows = 0
+            with StagedDatabase(args.db_path) as db:
+                for path in expand_inputs(paths, (".dbf",)):
+                    rows += import_dbf(
+                        db.conn, path, encoding=args.encoding, batch_size=args.batch_size
+                    )
+        else:
+            rows = import_dbf_files(
+                args.db_path, paths, encoding=args.encoding, batch_size=args.batch_size
+            )
+        print(f"Imported {rows} rows.", file=sys.stderr)
+        return 0
+
+    try:
+        with _open_target(args) as db:
+            if args.source == "r2ka":
+                from .r2ka import R2KAImporter
+
+                importer = R2KAImporter(
+                    db,
+                    encoding=args.encoding,
+                    checkpoint_every=args.checkpoint_every,
+                    **_reject_options(args, 0),
+                )
+                attempted, inserted = importer.import_csvs(paths, resume=args.resume)
+                print(
+                    f"Processed {attempted} rows, inserted {inserted} new records, "
+                    f"rejected {len(importer.rejects)} rows.",
+                    file=sys.stderr,
+                )
+            elif args.source == "combined":
+                from .combined_importer import CombinedImporter
+
+                result = CombinedImporter(
+                    db,
+                    r2ka_encoding=args.encoding,
+                    gis_encoding=args.gis_encoding,
+                    checkpoint_every=args.checkpoint_every,
+                    **_reject_options(args, 0),
+                ).import_files(paths, _expand(args.gis), resume=args.resume)
+                print(
+                    f"R2KA: processed {result.r2ka_records} rows, inserted {result.sub_areas_inserted} records. "
+                    f"GIS: processed {result.gis_records} rows, inserted {result.cities_inserted} cities, "
+                    f"updated {result.cities_updated} cities. Rejected {result.rejected} rows.",
+                    file=sys.stderr,
+                )
+            else:
+                from .gis_map import GISMapImporter
+
+                importer = GISMapImporter(
+                    db,
+                    encoding=args.encoding,
+                    checkpoint_every=args.checkpoint_every,
+                    **_reject_options(args, None),
+                )
+                for path in paths:
+                    attempted, inserted = importer.import_dbf(path, resume=args.resume)
+                    print(
+                        f"{path}: processed {attempted} rows, inserted {inserted} cities, "
+                        f"rejected {len(importer.rejects)} codes.",
+                        file=sys.stderr,
+                    )
+    except ValueError as e:
+        print(e, file=sys.stderr)
+        return 1
+    return 0
+
+
+def cmd_export(args: argparse.Namespace) -> int:
+    with Database(args.db_path) as db:
+        if args.format == "jis-csv":
+            from .r2ka import export_jis_mapping
+
+            rows = export_jis_mapping(db, args.output)
+        elif args.format == "jis-index":
+            from .r2ka import export_jis_index
+
+            rows = export_jis_index(db, args.output)
+        elif args.format == "dbf":
+            from .dbf import table_fields, write_dbf
+
+            fields = table_fields(db.conn, args.table)
+            if args.table == "codes_view":
+                from .r2ka import CodesViewReader
+
+                source = CodesViewReader(db).cursor()
+            else:
+                source = db.conn.execute(f'SELECT * FROM "{args.table}"')
+            rows = write_dbf(args.output, source, fields, encoding=args.encoding)
+        else:
+            from .arrow_export import export_database
+
+            counts = export_database(db.conn, args.output, format=args.format)
+            rows = sum(counts.values())
+    print(f"Exported {rows} rows to {args.output}", file=sys.stderr)
+    return 0
+
+
+def cmd_lookup(args: argparse.Namespace) -> int:
+    from .r2ka import CityIdSelector, SubAreaIdSelector
+
+    with Database(args.db_path) as db:
+        if args.kind == "sub-area":
+            size, lookup = 3, SubAreaIdSelector(db).get_sub_area_ids
+        else:
+            size, lookup = 2, CityIdSelector(db).get_city_ids
+        if args.input is None or args.input == "-":
+            _run_lookup(sys.stdin, sys.stdout, size, lookup, args.batch_size)
+        else:
+            with open(args.input, encoding="utf-8") as f:
+                _run_lookup(f, sys.stdout, size, lookup, args.batch_size)
+    return 0
+
+
+def cmd_serve(args: argparse.Namespace) -> int:
+    from .r2ka import LookupServer
+
+    server = LookupServer(
+        args.db_path,
+        host=args.host,
+        port=args.port,
+        max_batch=args.max_batch,
+        max_delay=args.max_delay / 1000,
+        lookup_timeout=args.timeout,
+        cache_limit=args.cache_limit,
+    )
+    host, port = server.server_address[:2]
+    print(f"Serving lookups on http://{host}:{port}/", file=sys.stderr)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        server.lookup.close()
+    return 0
+
+
+def cmd_audit(args: argparse.Namespace) -> int:
+    from .database import create_indexes
+    from .query_plan import audit
+
+    with Database(args.db_path) as db:
+        if args.fix:
+            create_indexes(db.conn)
+        issues = audit(db.conn)
+    for issue in issues:
+        print(f"{issue.query}: {issue.detail}")
+    print(f"{len(issues)} query plan issues", file=sys.stderr)
+    return 1 if issues else 0
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="dbf-utils", description="DBF/CSV to SQLite utilities")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p = sub.add_parser("import", help="Import source files into a database")
+    p.add_argument(
+        "source",
+        choices=["r2ka", "gis", "combined", "dbf", "csv"],
+        help="Input format (combined: R2KA inputs plus GIS Map files given with --gis)",
+    )
+    p.add_argument("db_path", type=Path, help="SQLite database path")
+    p.add_argument("inputs", nargs="+", help="Input files, glob patterns or CSV directory")
+    p.add_argument("--encoding", default="cp932", help="File encoding (default: cp932)")
+    p.add_argument("--batch-size", type=int, default=10000, help="Rows per INSERT batch (dbf)")
+    p.add_argument("--workers", type=int, default=None, help="Parallel CSV readers (csv)")
+    p.add_argument(
+        "--engine",
+        choices=["c", "python", "pyarrow"],
+        default=None,
+        help="pandas CSV engine (csv, default: pyarrow if installed)",
+    )
+    p.add_argument(
+        "--all-text",
+        action="store_true",
+        help="Read every CSV column as text, keeping leading zeros (csv)",
+    )
+    p.add_argument(
+        "--max-errors",
+        type=int,
+        default=None,
+        help="Rejected rows allowed before aborting, -1 for no limit (r2ka, gis, combined; "
+        "default: 0 for R2KA, no limit for GIS)",
+    )
+    p.add_argument("--rejects", type=Path, default=None, help="Write rejected rows to this CSV file")
+    p.add_argument(
+        "--checkpoint-every",
+        type=int,
+        default=None,
+        help="Commit and record progress every N records (r2ka, gis)",
+    )
+    p.add_argument(
+        "--resume",
+        action="store_true",
+        help="Continue an interrupted checkpointed import (r2ka, gis)",
+    )
+    p.add_argument("--gis", nargs="+", default=[], help="GIS Map DBF files (combined)")
+    p.add_argument("--gis-encoding", default="cp932", help="GIS Map file encoding (combined)")
+    p.add_argument(
+        "--atomic",
+        action="store_true",
+        help="Build a new database in memory and atomically replace db_path with it",
+    )
+    p.set_defaults(func=cmd_import)
+
+    p = sub.add_parser("export", help="Export data from a database")
+    p.add_argument(
+        "format",
+        choices=["jis-csv", "jis-index", "dbf", "parquet", "ipc"],
+        help="Export format",
+    )
+    p.add_argument("db_path", type=Path, help="SQLite database path")
+    p.add_argument("output", type=Path, help="Output file (or directory for parquet/ipc)")
+    p.add_argument("--table", default="codes_view", help="Table or view to export (dbf)")
+    p.add_argument("--encoding", default="cp932", help="Text encoding (dbf, default: cp932)")
+    p.set_defaults(func=cmd_export)
+
+    p = sub.add_parser("lookup", help="Resolve codes read from a file or stdin")
+    p.add_argument("kind", choices=["sub-area", "city"], help="Id to look up")
+    p.add_argument("db_path", type=Path, help="SQLite database path")
+    p.add_argument("input", nargs="?", help="Input file, one code set per line (default: stdin)")
+    p.add_argument("--batch-size", type=int, default=1000, help="Lines resolved per batch")
+    p.set_defaults(func=cmd_lookup)
+
+    p = sub.add_parser("serve", help="Run the HTTP lookup service")
+    p.add_argument("db_path", type=Path, help="SQLite database path")
+    p.add_argument("--host", default="127.0.0.1", help="Bind address (default: 127.0.0.1)")
+    p.add_argument("--port", type=int, default=8080, help="Port (default: 8080)")
+    p.add_argument("--max-batch", type=int, default=1000, help="Keys per coalesced batch")
+    p.add_argument(
+        "--max-delay", type=float, default=2.0, help="Milliseconds to wait for a batch to fill"
+    )
+    p.add_argument(
+        "--timeout", type=float, default=5.0, help="Seconds before a lookup is answered with 503"
+    )
+    p.add_argument(
+        "--cache-limit",
+        type=int,
+        default=100000,
+        help="Lookup results cached per kind (default: 100000)",
+    )
+    p.set_defaults(func=cmd_serve)
+
+    p = sub.add_parser("audit", help="Check that the built-in lookups use indexes")
+    p.add_argument("db_path", type=Path, help="SQLite database path")
+    p.add_argument("--fix", action="store_true", help="Create missing recommended indexes first")
+    p.set_defaults(func=cmd_audit)
+    return parser
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    args = build_parser().parse_args(argv)
+    return args.func(args)
+
+
+__all__ = ["main", "build_parser"]
@@ -0,0 +1,97 @@
+from __future__ import annotations
+
+from pathlib import Path
+from typing import Iterable, NamedTuple, Optional
+
+from .archive import expand_inputs
+from .database import Database
+from .gis_map import GISMapImporter
+from .r2ka import R2KAImporter
+from .validation import RejectCollector
+
+
+class CombinedImportResult(NamedTuple):
+    r2ka_records: int
+    sub_areas_inserted: int
+    gis_records: int
+    cities_inserted: int
+    cities_updated: int
+    rejected: int
+
+
+class CombinedImporter:
+    """Build one database from R2KA and GIS Map sources.
+
+    R2KA records are imported first, so cities keep their full R2KA names
+    (``さいたま市西区``) used by address matching. GIS Map records are then
+    merged into the same ``prefectures`` and ``cities`` rows on
+    ``(pref_code, city_code)``: existing cities get their subprefecture,
+    district and ward, and municipalities missing from R2KA are added. Both
+    ``codes_view`` and ``areas_view`` are valid in the result.
+
+    ``max_errors`` is the error budget of the R2KA stage; GIS Map records
+    with bad codes are always skipped. Rejects of both stages end up in
+    ``import_rejects`` and, with ``rejects_path``, in one CSV file.
+
+    ``checkpoint_every`` is passed to both importers, so each stage commits
+    its progress and ``import_files(..., resume=True)`` continues an
+    interrupted run.
+    """
+
+    def __init__(
+        self,
+        db: Database,
+        r2ka_encoding: str = "cp932",
+        gis_encoding: str = "cp932",
+        workers: int = 1,
+        use_processes: bool = False,
+        max_errors: Optional[int] = 0,
+        rejects_path: Optional[str | Path] = None,
+        checkpoint_every: Optional[int] = None,
+    ) -> None:
+        self.db = db
+        self.rejects_path = rejects_path
+        self.rejects = RejectCollector(None)
+        self.r2ka = R2KAImporter(
+            db,
+            encoding=r2ka_encoding,
+            workers=workers,
+            use_processes=use_processes,
+            max_errors=max_errors,
+            checkpoint_every=checkpoint_every,
+        )
+        self.gis = GISMapImporter(
+            db,
+            encoding=gis_encoding,
+            workers=workers,
+            use_processes=use_processes,
+            checkpoint_every=checkpoint_every,
+        )
+
+    def import_files(
+        self, r2ka_paths: Iterable[str], gis_paths: Iterable[str], resume: bool = False
+    ) -> CombinedImportResult:
+        """Import R2KA CSV/DBF files and GIS Map DBF files into one database.
+
+        With ``resume`` (requires ``checkpoint_every``), files finished by an
+        earlier run are skipped and partly imported ones continue after
+        their last checkpoint.
+        """
+        self.rejects = RejectCollector(None)
+        r2ka_records, sub_areas = self.r2ka.import_csvs(r2ka_paths, resume=resume)
+        self.rejects.extend(self.r2ka.rejects)
+        gis_records = cities = updated = 0
+        for path in expand_inputs(gis_paths, (".dbf",)):
+            read, inserted = self.gis.import_dbf(path, resume=resume)
+            gis_records += read
+            cities += inserted
+            updated += self.gis.cities_updated
+            self.rejects.extend(self.gis.rejects)
+        if self.rejects and self.rejects_path is not None:
+            self.rejects.write_csv(self.rejects_path)
+        return CombinedImportResult(
+            r2ka_records, sub_areas, gis_records, cities, updated, len(self.rejects)
+        )
+
+
+__all__ = ["CombinedImporter", "CombinedImportResult"]
@@ -1,18 +1,119 @@
 from __future__ import annotations
 
-import pandas as pd
 import sqlite3
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
 from pathlib import Path
-from typing import Dict, List
+from typing import TYPE_CHECKING, BinaryIO, Dict, List, Optional, Union
 
+from .archive import expand_inputs, open_input
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+
+def _csv_engine() -> Optional[str]:
+    """Return ``"pyarrow"`` if the pyarrow CSV engine can be used."""
+    try:
+        import pyarrow  # noqa: F401
+    except ImportError:
+        return None
+    return "pyarrow"
+
+
+def read_csv_file(
+    csv_file: Union[str, Path], engine: Optional[str] = None, all_text: bool = False
+) -> pd.DataFrame:
+    """Read a single CSV file or ZIP archive member into a DataFrame.
+
+    ``engine`` selects the pandas CSV engine (``"c"``, ``"python"`` or
+    ``"pyarrow"``); when omitted the pyarrow engine is used if it is
+    installed. Column types are inferred as by :func:`pandas.read_csv`,
+    except that only empty fields become missing, so ``"NA"`` stays a
+    string. With ``all_text`` every column is read as text instead, which
+    keeps the leading zeros of codes. Both engines produce the same table.
+    """
+    import pandas as pd
+
+    if engine is None:
+        engine = _csv_engine()
+    with open_input(csv_file) as f:
+        if all_text and engine == "pyarrow":
+            return _read_csv_pyarrow(f)
+        return pd.read_csv(
+            f,
+            engine=engine,
+            dtype=str if all_text else None,
+            keep_default_na=False,
+            na_values=[""],
+        )
+
+
+def _read_csv_pyarrow(f: BinaryIO) -> pd.DataFrame:
+    # pandas' pyarrow engine infers types before applying ``dtype``, which
+    # loses leading zeros, so every column is declared as a string here.
+    import csv
+
+    import pyarrow as pa
+    from pyarrow import csv as pa_csv
+
+    header = next(csv.reader([f.readline().decode("utf-8-sig")]))
+    table = pa_csv.read_csv(
+        f,
+        read_options=pa_csv.ReadOptions(column_names=header),
+        convert_options=pa_csv.ConvertOptions(
+            column_types={name: pa.string() for name in header},
+            null_values=[""],
+            strings_can_be_null=True,
+        ),
+    )
+    return table.to_pandas()
+
+
+def _list_csv_files(csv_dir: Path) -> List[Path]:
+    if csv_dir.suffix.lower() == ".zip" and csv_dir.is_file():
+        return [Path(p) for p in expand_inputs([csv_dir], (".csv",))]
+    return list(csv_dir.glob("*.csv"))
+
+
+def read_csv_files(
+    csv_dir: Path,
+    max_workers: Optional[int] = None,
+    use_processes: bool = False,
+    engine: Optional[str] = None,
+    all_text: bool = False,
+) -> Dict[str, pd.DataFrame]:
+    """Read all CSV files in a directory into a dictionary of DataFrames.
+
+    ``csv_dir`` may also be a ZIP archive, whose ``.csv`` members are
+    streamed without extraction. Files are parsed concurrently by a thread
+    pool, or a process pool when ``use_processes`` is true. ``max_workers``
+    of ``1`` reads serially. ``engine`` and ``all_text`` are passed to
+    :func:`read_csv_file`.
+    The returned dictionary keeps the directory listing order.
+    """
+    csv_files = _list_csv_files(csv_dir)
+
+    if max_workers == 1 or len(csv_files) <= 1:
+        frames = [read_csv_file(f, engine, all_text) for f in csv_files]
+    else:
+        pool: Executor
+        if use_processes:
+            pool = ProcessPoolExecutor(max_workers=max_workers)
+        else:
+            pool = ThreadPoolExecutor(max_workers=max_workers)
+        with pool:
+            frames = list(
+                pool.map(
+                    read_csv_file,
+                    csv_files,
+                    [engine] * len(csv_files),
+                    [all_text] * len(csv_files),
+                )
+            )
 
-def read_csv_files(csv_dir: Path) -> Dict[str, pd.DataFrame]:
-    """Read all CSV files in a directory into a dictionary of DataFrames."""
     dataframes: Dict[str, pd.DataFrame] = {}
-    for csv_file in csv_dir.glob("*.csv"):
-        df = pd.read_csv(csv_file)
-        table_name = csv_file.stem
-        dataframes[table_name] = df
+    for csv_file, df in zip(csv_files, frames):
+        dataframes[csv_file.stem] = df
     return dataframes
 
 
@@ -27,6 +128,8 @@ def find_common_columns(frames: Dict[str, pd.DataFrame]) -> List[str]:
 
 def create_lookup_tables(frames: Dict[str, pd.DataFrame], common_columns: List[str]) -> Dict[str, pd.DataFrame]:
     """Create lookup tables for common columns and replace values with ids."""
+    import pandas as pd
+
     lookups: Dict[str, pd.DataFrame] = {}
     for col in common_columns:
         # gather unique values across all frames
@@ -41,26 +144,60 @@ def create_lookup_tables(frames: Dict[str, pd.DataFrame], common_columns: List[s
     return lookups
 
 
+def write_tables(conn: sqlite3.Connection, tables: Dict[str, pd.DataFrame]) -> None:
+    """Write a dictionary of DataFrames to an open SQLite connection."""
+    for table_name, df in tables.items():
+        df.to_sql(table_name, conn, if_exists="replace", index=False)
+    conn.commit()
+
+
 def save_to_sqlite(db_path: Path, tables: Dict[str, pd.DataFrame]) -> None:
     """Save a dictionary of DataFrames to a SQLite database."""
     with sqlite3.connect(db_path) as conn:
-        for table_name, df in tables.items():
-            df.to_sql(table_name, conn, if_exists="replace", index=False)
+        write_tables(conn, tables)
 
 
 class CsvToSqliteConverter:
     """Convert multiple CSV files to a normalized SQLite database."""
 
-    def __init__(self, csv_dir: str, db_path: str):
+    def __init__(
+        self,
+        csv_dir: str,
+        db_path: str,
+        max_workers: Optional[int] = None,
+        use_processes: bool = False,
+        engine: Optional[str] = None,
+        all_text: bool = False,
+    ):
         self.csv_dir = Path(csv_dir)
         self.db_path = Path(db_path)
+        self.max_workers = max_workers
+        self.use_processes = use_processes
+        self.engine = engine
+        self.all_text = all_text
 
-    def convert(self) -> None:
-        frames = read_csv_files(self.csv_dir)
+    def convert(self, conn: Optional[sqlite3.Connection] = None) -> None:
+        """Convert the CSV files, writing to ``conn`` instead of ``db_path`` if given."""
+        frames = read_csv_files(
+            self.csv_dir,
+            max_workers=self.max_workers,
+            use_processes=self.use_processes,
+            engine=self.engine,
+            all_text=self.all_text,
+        )
         common_cols = find_common_columns(frames)
         lookup_tables = create_lookup_tables(frames, common_cols)
         all_tables = {**frames, **lookup_tables}
-        save_to_sqlite(self.db_path, all_tables)
+        if conn is not None:
+            write_tables(conn, all_tables)
+        else:
+            save_to_sqlite(self.db_path, all_tables)
 
 
-__all__ = ["CsvToSqliteConverter", "read_csv_files", "save_to_sqlite"]
+__all__ = [
+    "CsvToSqliteConverter",
+    "read_csv_file",
+    "read_csv_files",
+    "save_to_sqlite",
+    "write_tables",
+]
@@ -1,5 +1,6 @@
 from __future__ import annotations
 
+import os
 import sqlite3
 from pathlib import Path
 
@@ -13,20 +14,131 @@ def _table_exists(conn: sqlite3.Connection, name: str) -> bool:
     return cur.fetchone() is not None
 
 
+# Columns added to ``cities`` by GIS Map imports, for upgrading R2KA-only files.
+_CITY_HIERARCHY_COLUMNS = [
+    ("subpref_id", "subprefecters(subpref_id)"),
+    ("distinct_id", "distincts(distinct_id)"),
+    ("ward_id", "wards(ward_id)"),
+]
+
+
+# Secondary indexes for the built-in queries, as (name, table, columns).
+# ``dbf_utils.query_plan`` checks that the queries use them.
+RECOMMENDED_INDEXES = [
+    # Child lookups from the hierarchy tables; pref_code is covered by UNIQUE.
+    ("idx_cities_subpref_id", "cities", "subpref_id"),
+    ("idx_cities_distinct_id", "cities", "distinct_id"),
+    ("idx_cities_ward_id", "cities", "ward_id"),
+    # Sub-areas of a city in code order; covers sub_area_id by rowid.
+    ("idx_sub_areas_city_id", "sub_areas", "city_id, s_area_code"),
+]
+
+
+def create_indexes(conn: sqlite3.Connection) -> None:
+    """Create the :data:`RECOMMENDED_INDEXES` whose tables exist.
+
+    An index of the same name with another definition, e.g. from an older
+    version of the package, is dropped and rebuilt.
+    """
+    for name, table, columns in RECOMMENDED_INDEXES:
+        if not _table_exists(conn, table):
+            continue
+        sql = f"CREATE INDEX {name} ON {table}({columns})"
+        row = conn.execute(
+            "SELECT sql FROM sqlite_master WHERE type = 'index' AND name = ?", (name,)
+        ).fetchone()
+        if row is not None and " ".join(row[0].split()) == sql:
+            continue
+        if row is not None:
+            conn.execute(f"DROP INDEX {name}")
+        conn.execute(sql)
+    conn.commit()
+
+
+def create_city_tables(conn: sqlite3.Connection) -> None:
+    """Create the prefecture and city tables shared by R2KA and GIS Map.
+
+    Both importers use the same ``cities`` table, keyed on
+    ``(pref_code, city_code)``, so either can add to a database built by
+    the other. A ``cities`` table from an older R2KA-only database is
+    upgraded with the missing hierarchy columns.
+    """
+    cur = conn.cursor()
+    cur.execute(
+        """
+        CREATE TABLE IF NOT EXISTS prefectures (
+            prefecture_id INTEGER PRIMARY KEY AUTOINCREMENT,
+            pref_code INTEGER UNIQUE NOT NULL,
+            pref_name TEXT NOT NULL
+        )
+        """
+    )
+    cur.execute(
+        """
+        CREATE TABLE IF NOT EXISTS subprefecters (
+            subpref_id INTEGER PRIMARY KEY AUTOINCREMENT,
+            subpref_name TEXT UNIQUE NOT NULL
+        )
+        """
+    )
+    cur.execute(
+        """
+        CREATE TABLE IF NOT EXISTS distincts (
+            distinct_id INTEGER PRIMARY KEY AUTOINCREMENT,
+            distinct_name TEXT UNIQUE NOT NULL
+        )
+        """
+    )
+    cur.execute(
+        """
+        CREATE TABLE IF NOT EXISTS wards (
+            ward_id INTEGER PRIMARY KEY AUTOINCREMENT,
+            ward_name TEXT UNIQUE NOT NULL
+        )
+        """
+    )
+    cur.execute(
+        """
+        CREATE TABLE IF NOT EXISTS cities (
+            city_id INTEGER PRIMARY KEY AUTOINCREMENT,
+            pref_code INTEGER NOT NULL REFERENCES prefectures(pref_code),
+            city_code INTEGER NOT NULL,
+            city_name TEXT NOT NULL,
+            subpref_id INTEGER REFERENCES subprefecters(subpref_id),
+            distinct_id INTEGER REFERENCES distincts(distinct_id),
+            ward_id INTEGER REFERENCES wards(ward_id),
+            UNIQUE(pref_code, city_code)
+        )
+        """
+    )
+    columns = {row[1] for row in cur.execute("PRAGMA table_info(cities)")}
+    for column, ref in _CITY_HIERARCHY_COLUMNS:
+        if column not in columns:
+            cur.execute(f"ALTER TABLE cities ADD COLUMN {column} INTEGER REFERENCES {ref}")
+    conn.commit()
+    create_indexes(conn)
+
+
 def create_codes_view(conn: sqlite3.Connection) -> None:
-    """Create ``codes_view`` if required tables are present."""
+    """Create ``codes_view`` if required tables are present.
+
+    An existing view is replaced so databases pick up the current definition.
+    """
     required = ['prefectures', 'cities', 'sub_areas']
     if not all(_table_exists(conn, t) for t in required):
         return
+    # The codes come from ``cities`` so lookups on prefecture_code and
+    # city_code search its (pref_code, city_code) index.
+    conn.execute("DROP VIEW IF EXISTS codes_view")
     conn.execute(
         """
-        CREATE VIEW IF NOT EXISTS codes_view AS
+        CREATE VIEW codes_view AS
         SELECT
             sa.sub_area_id AS sub_area_id,
-            p.pref_code AS prefecture_code,
+            c.pref_code AS prefecture_code,
             c.city_code AS city_code,
             sa.s_area_code AS s_area_code,
-            ((p.pref_code * 1000 + c.city_code) * 1000000 + sa.s_area_code) AS jis_code
+            ((c.pref_code * 1000 + c.city_code) * 1000000 + sa.s_area_code) AS jis_code
         FROM sub_areas sa
         JOIN cities c ON sa.city_id = c.city_id
         JOIN prefectures p ON sa.prefecture_id = p.prefecture_id
@@ -83,4 +195,145 @@ class Database:
         self.close()
 
 
-__all__ = ["Database", "create_codes_view", "create_areas_view"]
+def _fsync(path: Path, directory: bool = False) -> None:
+    """Flush ``path`` to disk; directories are skipped where unsupported."""
+    try:
+        fd = os.open(str(path), os.O_RDONLY)
+    except OSError:
+        if directory:
+            return
+        raise
+    try:
+        os.fsync(fd)
+    except OSError:
+        if not directory:
+            raise
+    finally:
+        os.close(fd)
+
+
+def _is_wal(path: Path) -> bool:
+    """Return True when the database file at ``path`` is in WAL mode."""
+    try:
+        with open(path, "rb") as f:
+            header = f.read(20)
+    except OSError:
+        return False
+    # bytes 18/19 hold the file format write/read versions; 2 means WAL
+    return len(header) == 20 and header[18] == 2
+
+
+def publish_database(
+    conn: sqlite3.Connection, path: str | Path, analyze: bool = True
+) -> None:
+    """Write the database behind ``conn`` to ``path`` atomically.
+
+    The contents are copied to a temporary file next to ``path`` with
+    ``VACUUM INTO`` (or the backup API on SQLite older than 3.27), which
+    also writes the pages in a compact, defragmented order, and the file is
+    then renamed over ``path``. The file is flushed to disk before the
+    rename and the directory after it, so a crash leaves either the old or
+    the new database at ``path``. A leftover ``-journal`` of the old database
+    is removed first so SQLite cannot roll it back onto the new one. The
+    ``-wal`` and ``-shm`` files are only removed when the old database is not
+    in WAL mode; otherwise they belong to connections that still have the
+    old file open, which keep reading it until they reconnect. When
+    ``analyze`` is true, ``ANALYZE`` is run first so the published file
+    carries query planner statistics.
+    """
+    path = Path(path)
+    tmp = path.with_name(f".{path.name}.publish")
+    conn.commit()
+    if analyze:
+        conn.execute("ANALYZE")
+        conn.execute("PRAGMA optimize")
+        conn.commit()
+    if tmp.exists():
+        tmp.unlink()
+    try:
+        if sqlite3.sqlite_version_info >= (3, 27, 0):
+            conn.execute("VACUUM INTO ?", (str(tmp),))
+        else:
+            dest = sqlite3.connect(str(tmp))
+            try:
+                conn.backup(dest)
+            finally:
+                dest.close()
+        _fsync(tmp)
+        suffixes = ("-journal",) if _is_wal(path) else ("-journal", "-wal", "-shm")
+        for suffix in suffixes:
+            stale = path.with_name(path.name + suffix)
+            if stale.exists():
+                stale.unlink()
+        os.replace(tmp, path)
+        _fsync(path.parent, directory=True)
+    finally:
+        if tmp.exists():
+            tmp.unlink()
+
+
+class StagedDatabase(Database):
+    """Database built in memory (or a temporary file) and published on exit.
+
+    Imports run against a ``:memory:`` database, or a hidden temporary file
+    next to ``db_path`` when ``in_memory`` is false, with journaling and
+    syncing disabled. Leaving the ``with`` block without an exception calls
+    :meth:`publish`, which replaces ``db_path`` atomically, so readers of the
+    old file never see a partially imported database. With
+    ``copy_existing`` the current contents of ``db_path`` are loaded first
+    so an import can add to them.
+    """
+
+    def __init__(
+        self,
+        db_path: str | Path,
+        in_memory: bool = True,
+        copy_existing: bool = False,
+        analyze: bool = True,
+    ) -> None:
+        self.path = Path(db_path)
+        self.analyze = analyze
+        if in_memory:
+            self.build_path = None
+            self.conn = sqlite3.connect(":memory:")
+        else:
+            self.build_path = self.path.with_name(f".{self.path.name}.build")
+            if self.build_path.exists():
+                self.build_path.unlink()
+            self.conn = sqlite3.connect(str(self.build_path))
+        self.conn.execute("PRAGMA journal_mode=OFF")
+        self.conn.execute("PRAGMA synchronous=OFF")
+        if copy_existing and self.path.exists():
+            src = sqlite3.connect(str(self.path))
+            try:
+                src.backup(self.conn)
+            finally:
+                src.close()
+
+    def publish(self) -> None:
+        """Replace ``db_path`` with the staged database."""
+        publish_database(self.conn, self.path, analyze=self.analyze)
+
+    def close(self) -> None:
+        super().close()
+        if self.build_path is not None and self.build_path.exists():
+            self.build_path.unlink()
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        try:
+            if exc_type is None:
+                self.publish()
+        finally:
+            self.close()
+
+
+__all__ = [
+    "Database",
+    "StagedDatabase",
+    "RECOMMENDED_INDEXES",
+    "create_city_tables",
+    "create_indexes",
+    "create_codes_view",
+    "create_areas_view",
+    "publish_database",
+]
@@ -1,46 +1,511 @@
 from __future__ import annotations
 
+import datetime
+import math
+import os
+import shutil
+import sqlite3
 import struct
-from typing import Iterable, Dict, List
+import tempfile
+from pathlib import Path
+from typing import Any, BinaryIO, Iterable, Iterator, Dict, List, Mapping, Optional, Sequence, Tuple
 
+from .archive import READ_BUFFER_SIZE, input_size, open_input, split_archive_path
 
-def parse_dbf(path: str, encoding: str = "cp932") -> Iterable[Dict[str, str]]:
-    """Yield records from a DBF file as dictionaries.
+# (name, type, length, decimal_count)
+DBFField = Tuple[str, str, int, int]
 
-    This is a very small subset of the dBASE III reader sufficient for tests.
-    Only character fields are supported.
-    """
-    with open(path, "rb") as f:
-        header = f.read(32)
-        record_count = struct.unpack("<I", header[4:8])[0]
-        header_length = struct.unpack("<H", header[8:10])[0]
-        record_length = struct.unpack("<H", header[10:12])[0]
-
-        fields: List[tuple[str, str, int]] = []
-        while True:
-            first = f.read(1)
-            if first == b"\r":
-                break
-            data = first + f.read(31)
-            name = data[:11].split(b"\x00")[0].decode("ascii")
-            typ = data[11:12].decode("ascii")
-            length = data[16]
-            fields.append((name, typ, length))
 
+def read_dbf_header(f: BinaryIO) -> Tuple[int, int, int, List[DBFField]]:
+    """Read the DBF header from ``f``.
+
+    Returns a tuple of (record_count, header_length, record_length, fields).
+    The file position is left after the field descriptor terminator.
+    """
+    header = f.read(32)
+    record_count = struct.unpack("<I", header[4:8])[0]
+    header_length = struct.unpack("<H", header[8:10])[0]
+    record_length = struct.unpack("<H", header[10:12])[0]
+
+    fields: List[DBFField] = []
+    while True:
+        first = f.read(1)
+        if first == b"\r" or not first:
+            break
+        data = first + f.read(31)
+        name = data[:11].split(b"\x00")[0].decode("ascii")
+        typ = data[11:12].decode("ascii")
+        length = data[16]
+        decimals = data[17]
+        fields.append((name, typ, length, decimals))
+    return record_count, header_length, record_length, fields
+
+
+def read_dbf_fields(path: str) -> List[DBFField]:
+    """Return the field descriptors of a DBF file."""
+    with open_input(path) as f:
+        return read_dbf_header(f)[3]
+
+
+def field_slices(fields: List[DBFField]) -> Dict[str, slice]:
+    """Return the byte slice of each field within a raw record."""
+    slices: Dict[str, slice] = {}
+    pos = 1  # skip the deletion flag
+    for name, _typ, length, _decimals in fields:
+        slices[name] = slice(pos, pos + length)
+        pos += length
+    return slices
+
+
+def decode_record(record: bytes, fields: List[DBFField], encoding: str = "cp932") -> Dict[str, str]:
+    """Decode a raw record into a dictionary of stripped strings."""
+    pos = 1
+    row: Dict[str, str] = {}
+    for name, typ, length, _decimals in fields:
+        raw = record[pos:pos + length]
+        pos += length
+        row[name] = raw.decode(encoding, errors="ignore").strip()
+    return row
+
+
+def iter_raw_records(path: str) -> Tuple[List[DBFField], Iterator[bytes]]:
+    """Return the fields and an iterator over undecoded, non-deleted records."""
+    with open_input(path) as f:
+        fields = read_dbf_header(f)[3]
+
+    def records() -> Iterator[bytes]:
+        with open_input(path) as f:
+            record_count, header_length, record_length, _ = read_dbf_header(f)
+            f.seek(header_length)
+            for _ in range(record_count):
+                record = f.read(record_length)
+                if not record:
+                    break
+                if record[0] == 0x2A:  # deleted record
+                    continue
+                yield record
+
+    return fields, records()
+
+
+def enumerate_dbf(
+    path: str, encoding: str = "cp932"
+) -> Iterator[Tuple[int, Optional[Dict[str, str]]]]:
+    """Yield ``(record_number, record)`` for every record, deleted ones included.
+
+    Numbers start at 1 like shapefile record numbers; ``record`` is None
+    for records marked deleted.
+    """
+    with open_input(path) as f:
+        record_count, header_length, record_length, fields = read_dbf_header(f)
         f.seek(header_length)
-        for _ in range(record_count):
+        for number in range(1, record_count + 1):
             record = f.read(record_length)
-            if not record:
+            if len(record) < record_length:
                 break
-            if record[0] == 0x2A:  # deleted record
-                continue
-            pos = 1
-            row: Dict[str, str] = {}
-            for name, typ, length in fields:
-                raw = record[pos:pos + length]
-                pos += length
-                value = raw.decode(encoding, errors="ignore").strip()
-                row[name] = value
-            yield row
-
-__all__ = ["parse_dbf"]
+            if record[0] == 0x2A:
+                yield number, None
+            else:
+                yield number, decode_record(record, fields, encoding)
+
+
+def parse_dbf(path: str, encoding: str = "cp932") -> Iterable[Dict[str, str]]:
+    """Yield records from a DBF file as dictionaries.
+
+    ``path`` may also name a member of a ZIP archive (``archive.zip/a.dbf``).
+    This is a very small subset of the dBASE III reader sufficient for tests.
+    All values are returned as stripped strings regardless of field type.
+    """
+    fields, records = iter_raw_records(path)
+    for record in records:
+        yield decode_record(record, fields, encoding)
+
+
+class DBFReader:
+    """Random-access reader over the fixed-length records of a DBF file.
+
+    Record ``i`` starts at ``header_length + i * record_length`` so any
+    record or range can be read without scanning from the start. Indexes
+    count deleted records; :meth:`record` returns None for them and
+    :meth:`slice` skips them.
+    """
+
+    def __init__(self, path: str, encoding: str = "cp932") -> None:
+        self.path = path
+        self.encoding = encoding
+        self._file = open_input(path)
+        record_count, self.header_length, self.record_length, self.fields = read_dbf_header(
+            self._file
+        )
+        available = (input_size(self._file) - self.header_length) // max(
+            self.record_length, 1
+        )
+        self._count = min(record_count, max(available, 0))
+
+    def close(self) -> None:
+        self._file.close()
+
+    def __enter__(self) -> "DBFReader":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.close()
+
+    def __len__(self) -> int:
+        return self._count
+
+    def _read_block(self, start: int, stop: int) -> bytes:
+        self._file.seek(self.header_length + start * self.record_length)
+        return self._file.read((stop - start) * self.record_length)
+
+    def record(self, index: int) -> Optional[Dict[str, str]]:
+        """Return record ``index`` or None if it is marked deleted."""
+        if index < 0:
+            index += self._count
+        if not 0 <= index < self._count:
+            raise IndexError("DBF record index out of range")
+        raw = self._read_block(index, index + 1)
+        if raw[0] == 0x2A:
+            return None
+        return decode_record(raw, self.fields, self.encoding)
+
+    def slice(self, start: int, stop: int) -> List[Dict[str, str]]:
+        """Return the non-deleted records in ``[start, stop)``."""
+        start, stop, _ = slice(start, stop).indices(self._count)
+        if stop <= start:
+            return []
+        block = self._read_block(start, stop)
+        size = self.record_length
+        records = []
+        for pos in range(0, len(block), size):
+            raw = block[pos:pos + size]
+            if raw[0] != 0x2A:
+                records.append(decode_record(raw, self.fields, self.encoding))
+        return records
+
+
+def _parse_range(args: Tuple[str, str, int, int]) -> List[Dict[str, str]]:
+    path, encoding, start, stop = args
+    with DBFReader(path, encoding) as reader:
+        return reader.slice(start, stop)
+
+
+def parse_dbf_parallel(
+    path: str,
+    encoding: str = "cp932",
+    workers: Optional[int] = None,
+    chunk_records: Optional[int] = None,
+) -> Iterator[Dict[str, str]]:
+    """Yield the records of a DBF file, decoding ranges in worker processes.
+
+    The record block is split into ranges of ``chunk_records`` records that
+    are parsed by a process pool; results are yielded in file order, the
+    same as :func:`parse_dbf`. ZIP members cannot be read at an offset
+    without inflating them from the start, so they are read sequentially
+    with one worker, or extracted once to a temporary file otherwise.
+    """
+    workers = workers or os.cpu_count() or 1
+    if split_archive_path(path) is not None:
+        if workers == 1:
+            yield from parse_dbf(path, encoding)
+            return
+        with tempfile.TemporaryDirectory() as tmpdir:
+            local = os.path.join(tmpdir, os.path.basename(path))
+            with open_input(path) as src, open(local, "wb") as dst:
+                shutil.copyfileobj(src, dst, READ_BUFFER_SIZE)
+            yield from parse_dbf_parallel(local, encoding, workers, chunk_records)
+        return
+    with DBFReader(path, encoding) as reader:
+        total = len(reader)
+    if chunk_records is None:
+        chunk_records = max(1024, -(-total // (workers * 4)))
+    ranges = [
+        (path, encoding, start, min(start + chunk_records, total))
+        for start in range(0, total, chunk_records)
+    ]
+    if workers == 1 or len(ranges) <= 1:
+        for args in ranges:
+            yield from _parse_range(args)
+        return
+    from concurrent.futures import ProcessPoolExecutor
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        for records in pool.map(_parse_range, ranges):
+            yield from records
+
+
+# Records encoded and written per block by :func:`write_dbf`.
+WRITE_BLOCK_RECORDS = 4096
+
+# Minimum width of inferred integer fields: any 32-bit value or ``jis_code``.
+_MIN_INT_WIDTH = 11
+
+
+def field_names(names: Sequence[str]) -> List[str]:
+    """Shorten column names to the 10 characters allowed by dBASE, keeping them unique.
+
+    Field names are ASCII (:func:`read_dbf_header` decodes them as such), so
+    other names raise :class:`ValueError`; rename such columns, e.g. with
+    ``AS`` in the query, before writing.
+    """
+    result: List[str] = []
+    for name in names:
+        if not name.isascii():
+            raise ValueError(f"DBF field names must be ASCII, got {name!r}")
+        short = name[:10]
+        n = 1
+        while short in result:
+            suffix = f"_{n}"
+            short = name[:10 - len(suffix)] + suffix
+            n += 1
+        result.append(short)
+    return result
+
+
+def _quote(name: str) -> str:
+    return '"' + name.replace('"', '""') + '"'
+
+
+def table_fields(conn: sqlite3.Connection, table: str) -> List[DBFField]:
+    """Size DBF fields for ``table`` from its data in one aggregate query.
+
+    Unlike the inference of :func:`write_dbf`, every row is considered, so
+    the fields fit the whole table. Text widths use the UTF-8 length, which
+    is never shorter than cp932.
+    """
+    names = [d[0] for d in conn.execute(f"SELECT * FROM {_quote(table)} LIMIT 0").description]
+    stats = []
+    for name in names:
+        column = _quote(name)
+        stats += [
+            f"max(length(CAST({column} AS BLOB)))",
+            f"sum(typeof({column}) IN ('text', 'blob'))",
+            f"sum(typeof({column}) = 'real')",
+        ]
+    row = conn.execute(f"SELECT {', '.join(stats)} FROM {_quote(table)}").fetchone()
+    fields: List[DBFField] = []
+    for i, name in enumerate(field_names(names)):
+        width, texts, reals = (v or 0 for v in row[3 * i:3 * i + 3])
+        if reals and not texts:
+            fields.append((name, "N", 20, 6))
+        elif width and not texts:
+            fields.append((name, "N", min(width, 20), 0))
+        else:
+            fields.append((name, "C", min(max(width, 1), 254), 0))
+    return fields
+
+
+def _infer_fields(
+    names: Sequence[str], rows: Sequence[Sequence[Any]], encoding: str
+) -> List[DBFField]:
+    fields: List[DBFField] = []
+    for i, name in enumerate(field_names(names)):
+        values = [row[i] for row in rows if row[i] is not None]
+        if values and all(isinstance(v, int) for v in values):
+            width = max(len(str(v)) for v in values)
+            fields.append((name, "N", min(max(width, _MIN_INT_WIDTH), 20), 0))
+        elif values and all(isinstance(v, (int, float)) for v in values):
+            fields.append((name, "N", 20, 6))
+        else:
+            width = max((len(str(v).encode(encoding)) for v in values), default=1)
+            fields.append((name, "C", min(max(width, 1), 254), 0))
+    return fields
+
+
+def _format_number(value: Any, field: DBFField) -> Optional[str]:
+    """Format ``value`` for a numeric field, or None for a blank value."""
+    name, typ, length, decimals = field
+    if value is None or value == "":
+        return None
+    number = value
+    if isinstance(number, bool):
+        number = int(number)
+    elif isinstance(number, str):
+        try:
+            number = int(number)
+        except ValueError:
+            try:
+                number = float(number)
+            except ValueError:
+                number = None
+    elif not isinstance(number, (int, float)):
+        try:
+            number = float(number)
+        except (TypeError, ValueError):
+            number = None
+    if number is None or (isinstance(number, float) and not math.isfinite(number)):
+        raise ValueError(f"Value {value!r} for field {name} ({typ}{length}) is not a finite number")
+    if decimals:
+        return f"{number:.{decimals}f}"
+    if isinstance(number, float):
+        if not number.is_integer():
+            raise ValueError(
+                f"Value {value!r} does not fit field {name} ({typ}{length}) without "
+                "rounding; pass fields with decimals for non-integral values"
+            )
+        number = int(number)
+    return str(number)
+
+
+def _encode_column(values: Sequence[Any], field: DBFField, encoding: str) -> List[bytes]:
+    """Encode one column of a block as fixed-width field values."""
+    name, typ, length, decimals = field
+    blank = b" " * length
+    if typ in ("N", "F"):
+        text = [_format_number(v, field) for v in values]
+        encoded = [blank if t is None else t.encode("ascii").rjust(length) for t in text]
+    else:
+        encoded = [blank if v is None else str(v).encode(encoding).ljust(length) for v in values]
+    for value, raw in zip(values, encoded):
+        if len(raw) > length:
+            raise ValueError(
+                f"Value {value!r} does not fit field {name} ({typ}{length}); "
+                "pass fields wide enough for all rows"
+            )
+    return encoded
+
+
+def write_dbf(
+    path: str | Path,
+    rows: Any,
+    fields: Optional[Sequence[DBFField]] = None,
+    encoding: str = "cp932",
+    block_records: int = WRITE_BLOCK_RECORDS,
+) -> int:
+    """Write rows to a dBASE III file and return the number of records.
+
+    ``rows`` may be a DB-API cursor (column names come from its
+    description), a reader with a ``cursor()`` method such as
+    ``CodesViewReader``, or an iterable of sequences or dictionaries.
+    ``fields`` gives ``(name, type, length, decimals)`` for ``C`` and ``N``
+    columns in row order; when omitted they are inferred from the first
+    block, so pass them (e.g. from :func:`table_fields`) when later values
+    may be longer or of another type, or when a column is NULL throughout
+    the first block (it becomes ``C`` of width 1). The header is written
+    once and its record count patched at the end, and records are encoded
+    column by column in blocks of ``block_records``, so memory use does not
+    grow with the row count.
+    Values too wide for their field, non-numeric or non-finite values and
+    fractions in ``N`` fields without decimals (they are never rounded),
+    and field names that are not ASCII of at most 10 characters raise
+    :class:`ValueError`; a connection or a cursor without a result set
+    raises :class:`TypeError`. The file is written under a unique temporary
+    name next to ``path`` and renamed over it on success, so an error
+    leaves any existing file in place and no partial one.
+    """
+    if isinstance(rows, sqlite3.Connection):
+        raise TypeError("write_dbf needs a cursor with a result set, e.g. conn.execute(query)")
+    cursor = getattr(rows, "cursor", None)
+    if callable(cursor):
+        rows = cursor()
+    names: Optional[List[str]] = None
+    fetchmany = getattr(rows, "fetchmany", None)
+    if fetchmany is not None:
+        if rows.description is None:
+            raise TypeError("write_dbf needs a cursor with a result set, e.g. conn.execute(query)")
+        names = [d[0] for d in rows.description]
+
+        def blocks() -> Iterator[List[Any]]:
+            while True:
+                block = fetchmany(block_records)
+                if not block:
+                    return
+                yield block
+    else:
+        iterator = iter(rows)
+
+        def blocks() -> Iterator[List[Any]]:
+            while True:
+                block = [row for _, row in zip(range(block_records), iterator)]
+                if not block:
+                    return
+                yield block
+
+    pending = blocks()
+    first = next(pending, [])
+    if first and isinstance(first[0], Mapping):
+        keys = names = names or list(first[0])
+
+        def as_sequences(block: List[Any]) -> List[Sequence[Any]]:
+            return [[row.get(k) for k in keys] for row in block]
+    else:
+        def as_sequences(block: List[Any]) -> List[Sequence[Any]]:
+            return block
+
+    first = as_sequences(first)
+    if fields is None:
+        if names is None:
+            raise ValueError("fields are required for rows without column names")
+        fields = _infer_fields(names, first, encoding)
+        inferred_from = len(first)
+    else:
+        inferred_from = 0
+    fields = list(fields)
+
+    for name, _, _, _ in fields:
+        if not name.isascii() or len(name) > 10:
+            raise ValueError(
+                f"DBF field names must be ASCII of at most 10 characters, got {name!r}"
+            )
+
+    header_length = 32 + 32 * len(fields) + 1
+    record_length = 1 + sum(f[2] for f in fields)
+    today = datetime.date.today()
+    count = 0
+    path = Path(path)
+    fd, tmp = tempfile.mkstemp(prefix=f".{path.name}.", suffix=".tmp", dir=path.parent)
+    try:
+        with os.fdopen(fd, "wb") as f:
+            # The record count is patched once all blocks are written.
+            f.write(struct.pack(
+                "<4BIHH20x",
+                3, today.year - 1900, today.month, today.day, 0, header_length, record_length,
+            ))
+            for name, typ, length, decimals in fields:
+                f.write(struct.pack(
+                    "<11sc4xBB14x", name.encode("ascii"), typ.encode("ascii"), length, decimals
+                ))
+            f.write(b"\r")
+
+            block = first
+            while block:
+                try:
+                    columns = [
+                        _encode_column([row[i] for row in block], field, encoding)
+                        for i, field in enumerate(fields)
+                    ]
+                except ValueError as e:
+                    if not inferred_from:
+                        raise
+                    raise ValueError(
+                        f"{e} (fields were inferred from the first {inferred_from} rows; "
+                        "pass fields, e.g. from table_fields)"
+                    ) from None
+                f.write(b"".join(b" " + b"".join(values) for values in zip(*columns)))
+                count += len(block)
+                block = as_sequences(next(pending, []))
+            f.write(b"\x1a")
+            f.seek(4)
+            f.write(struct.pack("<I", count))
+        os.replace(tmp, path)
+    finally:
+        if os.path.exists(tmp):
+            os.unlink(tmp)
+    return count
+
+
+__all__ = [
+    "DBFReader",
+    "WRITE_BLOCK_RECORDS",
+    "write_dbf",
+    "field_names",
+    "table_fields",
+    "parse_dbf_parallel",
+    "parse_dbf",
+    "enumerate_dbf",
+    "read_dbf_header",
+    "read_dbf_fields",
+    "iter_raw_records",
+    "decode_record",
+    "field_slices",
+]
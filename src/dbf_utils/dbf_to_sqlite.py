@@ -0,0 +1,191 @@
+from __future__ import annotations
+
+import sqlite3
+from functools import partial
+from pathlib import Path
+from typing import Callable, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+from .archive import expand_inputs, split_archive_path
+from .dbf import DBFField, decode_record, iter_raw_records, read_dbf_fields
+from .pipeline import Pipeline
+
+
+def sqlite_type(typ: str, decimals: int = 0) -> str:
+    """Return the SQLite column type for a dBASE field type."""
+    if typ == "N":
+        return "REAL" if decimals else "INTEGER"
+    if typ in ("I", "+", "L"):
+        return "INTEGER"
+    if typ in ("F", "B", "O", "Y"):
+        return "REAL"
+    return "TEXT"
+
+
+def _quote(name: str) -> str:
+    return '"' + name.replace('"', '""') + '"'
+
+
+def _to_int(value: str) -> Optional[int]:
+    try:
+        return int(value)
+    except ValueError:
+        try:
+            return int(float(value))
+        except (ValueError, OverflowError):
+            # OverflowError: "inf" parses as a float but has no int value
+            return None
+
+
+def _to_float(value: str) -> Optional[float]:
+    try:
+        return float(value)
+    except ValueError:
+        return None
+
+
+def _to_bool(value: str) -> Optional[int]:
+    if value in ("Y", "y", "T", "t"):
+        return 1
+    if value in ("N", "n", "F", "f"):
+        return 0
+    return None
+
+
+def _to_date(value: str) -> Optional[str]:
+    if len(value) != 8 or not value.isdigit():
+        return None
+    return f"{value[:4]}-{value[4:6]}-{value[6:]}"
+
+
+def _converter(typ: str, decimals: int) -> Callable[[str], object]:
+    """Return a function converting a stripped DBF string to a SQLite value."""
+    column_type = sqlite_type(typ, decimals)
+    if typ == "L":
+        return _to_bool
+    if typ == "D":
+        return _to_date
+    if column_type == "INTEGER":
+        return _to_int
+    if column_type == "REAL":
+        return _to_float
+    return str
+
+
+def _convert_batch(
+    fields: List[DBFField], encoding: str, records: List[bytes]
+) -> List[Tuple[object, ...]]:
+    """Decode raw records and convert their values to SQLite types."""
+    converters = [(name, _converter(typ, dec)) for name, typ, _length, dec in fields]
+    rows = []
+    for record in records:
+        rec = decode_record(record, fields, encoding)
+        row = []
+        for name, conv in converters:
+            value = rec[name]
+            if not value and conv is not str:
+                row.append(None)
+            else:
+                row.append(conv(value))
+        rows.append(tuple(row))
+    return rows
+
+
+def _iter_dbfread(path: str, fields: Sequence[DBFField], encoding: str) -> Iterator[Tuple[object, ...]]:
+    from dbfread import DBF
+
+    names = [f[0] for f in fields]
+    for record in DBF(path, encoding=encoding):
+        row = []
+        for name in names:
+            value = record[name]
+            if hasattr(value, "isoformat"):
+                value = value.isoformat()
+            elif isinstance(value, bool):
+                value = int(value)
+            row.append(value)
+        yield tuple(row)
+
+
+def import_dbf(
+    conn: sqlite3.Connection,
+    path: str | Path,
+    table: Optional[str] = None,
+    encoding: str = "cp932",
+    batch_size: int = 10000,
+    use_dbfread: bool = False,
+    workers: int = 1,
+    use_processes: bool = False,
+) -> int:
+    """Import a DBF file into ``table`` and return the number of rows inserted.
+
+    Columns are typed from the dBASE field descriptors and records are
+    inserted in batches of ``batch_size`` within a single transaction. The
+    built-in reader is used unless ``use_dbfread`` is true. Reading,
+    decoding and inserting run as overlapping :class:`Pipeline` stages with
+    ``workers`` decoding threads (or processes).
+    """
+    path = Path(path)
+    table = table or path.stem
+    fields = read_dbf_fields(str(path))
+
+    columns = ", ".join(
+        f"{_quote(name)} {sqlite_type(typ, dec)}" for name, typ, _length, dec in fields
+    )
+    conn.execute(f"CREATE TABLE IF NOT EXISTS {_quote(table)} ({columns})")
+    placeholders = ", ".join("?" for _ in fields)
+    insert = f"INSERT INTO {_quote(table)} VALUES ({placeholders})"
+
+    def write(batch: List[Tuple[object, ...]]) -> None:
+        conn.executemany(insert, batch)
+
+    if use_dbfread:
+        if split_archive_path(path) is not None:
+            raise ValueError("dbfread cannot read ZIP archive members")
+        pipeline = Pipeline(write, batch_size=batch_size)
+        inserted = pipeline.run(_iter_dbfread(str(path), fields, encoding))
+    else:
+        _, records = iter_raw_records(str(path))
+        pipeline = Pipeline(
+            write,
+            transform=partial(_convert_batch, fields, encoding),
+            batch_size=batch_size,
+            workers=workers,
+            use_processes=use_processes,
+        )
+        inserted = pipeline.run(records)
+    conn.commit()
+    return inserted
+
+
+def import_dbf_files(
+    db_path: str | Path,
+    dbf_files: Iterable[str | Path],
+    encoding: str = "cp932",
+    batch_size: int = 10000,
+    use_dbfread: bool = False,
+    workers: int = 1,
+    use_processes: bool = False,
+) -> int:
+    """Import DBF files into a SQLite database, one table per file.
+
+    ZIP archives are expanded to their ``.dbf`` members.
+    """
+    total = 0
+    conn = sqlite3.connect(str(db_path))
+    try:
+        for dbf_path in expand_inputs(dbf_files, (".dbf",)):
+            total += import_dbf(
+                conn,
+                dbf_path,
+                encoding=encoding,
+                batch_size=batch_size,
+                use_dbfread=use_dbfread,
+                workers=workers,
+                use_processes=use_processes,
+            )
+    finally:
+        conn.close()
+    return total
+
+
+__all__ = ["import_dbf", "import_dbf_files", "sqlite_type"]
@@ -0,0 +1,329 @@
+from __future__ import annotations
+
+import sqlite3
+import struct
+import sys
+from array import array
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+# Decoded polygons kept by PolygonLocator by default.
+POLYGON_CACHE_SIZE = 10000
+
+# Point-edge pairs compared per NumPy operation by :func:`points_in_rings`.
+_VECTOR_PAIRS = 1 << 20
+
+Point = Tuple[float, float]
+Ring = List[Point]
+
+
+def _segment_distance_sq(p: Point, a: Point, b: Point) -> float:
+    ax, ay = a
+    dx = b[0] - ax
+    dy = b[1] - ay
+    if dx == 0 and dy == 0:
+        return (p[0] - ax) ** 2 + (p[1] - ay) ** 2
+    t = ((p[0] - ax) * dx + (p[1] - ay) * dy) / (dx * dx + dy * dy)
+    t = max(0.0, min(1.0, t))
+    return (p[0] - ax - t * dx) ** 2 + (p[1] - ay - t * dy) ** 2
+
+
+def simplify_ring(ring: Sequence[Point], tolerance: float) -> Ring:
+    """Simplify a ring with the Douglas-Peucker algorithm.
+
+    Rings that would collapse below four points are returned unchanged.
+    """
+    n = len(ring)
+    if tolerance <= 0 or n <= 4:
+        return list(ring)
+    keep = [False] * n
+    keep[0] = keep[-1] = True
+    tol_sq = tolerance * tolerance
+    stack = [(0, n - 1)]
+    while stack:
+        start, end = stack.pop()
+        best = -1.0
+        index = -1
+        for i in range(start + 1, end):
+            d = _segment_distance_sq(ring[i], ring[start], ring[end])
+            if d > best:
+                best = d
+                index = i
+        if index >= 0 and best > tol_sq:
+            keep[index] = True
+            stack.append((start, index))
+            stack.append((index, end))
+    result = [p for p, k in zip(ring, keep) if k]
+    return result if len(result) >= 4 else list(ring)
+
+
+def pack_rings(rings: Sequence[Sequence[Point]]) -> bytes:
+    """Serialize rings as a ring count, point counts and float64 coordinates.
+
+    All values are little-endian.
+    """
+    counts = array("I", [len(rings)] + [len(r) for r in rings])
+    coords = array("d", (v for r in rings for p in r for v in p))
+    if sys.byteorder != "little":
+        counts.byteswap()
+        coords.byteswap()
+    return counts.tobytes() + coords.tobytes()
+
+
+def unpack_rings(blob: bytes) -> List[Ring]:
+    """Inverse of :func:`pack_rings`."""
+    ring_count = struct.unpack_from("<I", blob, 0)[0]
+    counts = array("I")
+    counts.frombytes(blob[4:4 + 4 * ring_count])
+    coords = array("d")
+    coords.frombytes(blob[4 + 4 * ring_count:])
+    if sys.byteorder != "little":
+        counts.byteswap()
+        coords.byteswap()
+    rings = []
+    pos = 0
+    for n in counts:
+        flat = coords[pos:pos + 2 * n]
+        rings.append(list(zip(flat[0::2], flat[1::2])))
+        pos += 2 * n
+    return rings
+
+
+def point_in_rings(x: float, y: float, rings: Iterable[Sequence[Point]]) -> bool:
+    """Return True if ``(x, y)`` lies inside the polygon (even-odd rule).
+
+    Holes are handled because every ring toggles the result.
+    """
+    inside = False
+    for ring in rings:
+        j = len(ring) - 1
+        for i in range(len(ring)):
+            xi, yi = ring[i]
+            xj, yj = ring[j]
+            if (yi > y) != (yj > y) and x < (xj - xi) * (y - yi) / (yj - yi) + xi:
+                inside = not inside
+            j = i
+    return inside
+
+
+def _numpy() -> Any:
+    """Return the ``numpy`` module, or None if it is not installed."""
+    try:
+        import numpy
+    except ImportError:
+        return None
+    return numpy
+
+
+def points_in_rings(xs: Any, ys: Any, rings: Iterable[Sequence[Point]]) -> Any:
+    """Vectorized :func:`point_in_rings` for NumPy arrays of coordinates.
+
+    Returns a boolean array with the result for every point. All points
+    are tested against a block of ring edges in each NumPy operation, with
+    the same arithmetic as the scalar version, so both give the same
+    answers. Requires ``numpy`` (the ``geo`` extra).
+    """
+    import numpy as np
+
+    xs = np.asarray(xs, dtype=np.float64)[:, None]
+    ys = np.asarray(ys, dtype=np.float64)[:, None]
+    inside = np.zeros(len(xs), dtype=bool)
+    step = max(1, _VECTOR_PAIRS // max(len(xs), 1))
+    for ring in rings:
+        coords = np.asarray(ring, dtype=np.float64).reshape(-1, 2)
+        prev = np.roll(coords, 1, axis=0)
+        for start in range(0, len(coords), step):
+            xi, yi = coords[start:start + step, 0], coords[start:start + step, 1]
+            xj, yj = prev[start:start + step, 0], prev[start:start + step, 1]
+            with np.errstate(divide="ignore", invalid="ignore"):
+                crosses = ((yi > ys) != (yj > ys)) & (xs < (xj - xi) * (ys - yi) / (yj - yi) + xi)
+            inside ^= np.logical_xor.reduce(crosses, axis=1)
+    return inside
+
+
+def create_polygon_tables(conn: sqlite3.Connection, name: str, owner: str) -> None:
+    """Create ``name`` for polygons and ``name_rtree`` as its R*Tree index.
+
+    ``owner`` is the column holding the id the polygons belong to.
+    """
+    conn.execute(
+        f"""
+        CREATE TABLE IF NOT EXISTS {name} (
+            polygon_id INTEGER PRIMARY KEY AUTOINCREMENT,
+            {owner} INTEGER NOT NULL,
+            min_x REAL NOT NULL,
+            min_y REAL NOT NULL,
+            max_x REAL NOT NULL,
+            max_y REAL NOT NULL,
+            rings BLOB NOT NULL
+        )
+        """
+    )
+    conn.execute(f"CREATE INDEX IF NOT EXISTS idx_{name}_{owner} ON {name}({owner})")
+    conn.execute(
+        f"CREATE VIRTUAL TABLE IF NOT EXISTS {name}_rtree "
+        "USING rtree(id, min_x, max_x, min_y, max_y)"
+    )
+
+
+def insert_polygon(
+    conn: sqlite3.Connection,
+    name: str,
+    owner: str,
+    owner_id: int,
+    rings: Sequence[Sequence[Point]],
+) -> int:
+    """Insert a polygon and its R*Tree entry and return ``polygon_id``."""
+    xs = [p[0] for r in rings for p in r]
+    ys = [p[1] for r in rings for p in r]
+    bbox = (min(xs), min(ys), max(xs), max(ys))
+    cur = conn.execute(
+        f"INSERT INTO {name} ({owner}, min_x, min_y, max_x, max_y, rings) "
+        "VALUES (?, ?, ?, ?, ?, ?)",
+        (owner_id, *bbox, pack_rings(rings)),
+    )
+    polygon_id = cur.lastrowid
+    conn.execute(
+        f"INSERT INTO {name}_rtree (id, min_x, max_x, min_y, max_y) VALUES (?, ?, ?, ?, ?)",
+        (polygon_id, bbox[0], bbox[2], bbox[1], bbox[3]),
+    )
+    return polygon_id
+
+
+def delete_polygons(conn: sqlite3.Connection, name: str, owner: str, owner_id: int) -> None:
+    """Delete the polygons of ``owner_id`` and their R*Tree entries."""
+    conn.execute(
+        f"DELETE FROM {name}_rtree WHERE id IN "
+        f"(SELECT polygon_id FROM {name} WHERE {owner} = ?)",
+        (owner_id,),
+    )
+    conn.execute(f"DELETE FROM {name} WHERE {owner} = ?", (owner_id,))
+
+
+def polygon_queries(name: str, owner: str) -> Tuple[str, str]:
+    """Return the bounding box candidate and ring queries of ``name``."""
+    candidates = (
+        f"SELECT t.polygon_id, t.{owner}, r.min_x, r.max_x, r.min_y, r.max_y "
+        f"FROM {name}_rtree r "
+        f"JOIN {name} t ON t.polygon_id = r.id "
+        "WHERE r.min_x <= ? AND r.max_x >= ? AND r.min_y <= ? AND r.max_y >= ?"
+    )
+    return candidates, f"SELECT rings FROM {name} WHERE polygon_id = ?"
+
+
+class PolygonLocator:
+    """Find the owner of the polygon containing a point.
+
+    Candidates come from the R*Tree over polygon bounding boxes and are
+    confirmed with a point-in-polygon test. Up to ``cache_size`` decoded
+    polygons are kept, least recently used first out.
+    """
+
+    def __init__(
+        self,
+        conn: sqlite3.Connection,
+        name: str,
+        owner: str,
+        cache_size: int = POLYGON_CACHE_SIZE,
+    ) -> None:
+        self._conn = conn
+        self._candidates, self._rings_query = polygon_queries(name, owner)
+        self._cache: "OrderedDict[int, List[Ring]]" = OrderedDict()
+        self.cache_size = cache_size
+
+    def _rings(self, polygon_id: int) -> List[Ring]:
+        cache = self._cache
+        rings = cache.get(polygon_id)
+        if rings is not None:
+            cache.move_to_end(polygon_id)
+            return rings
+        blob = self._conn.execute(self._rings_query, (polygon_id,)).fetchone()[0]
+        rings = unpack_rings(blob)
+        if self.cache_size > 0:
+            cache[polygon_id] = rings
+            if len(cache) > self.cache_size:
+                cache.popitem(last=False)
+        return rings
+
+    def locate(self, x: float, y: float) -> Optional[int]:
+        """Return the owner id of the polygon containing ``(x, y)`` or None."""
+        for polygon_id, owner_id, *_ in self._conn.execute(self._candidates, (x, x, y, y)):
+            if point_in_rings(x, y, self._rings(polygon_id)):
+                return int(owner_id)
+        return None
+
+    def locate_many(
+        self,
+        points: Iterable[Point],
+        cell_size: float = 0.01,
+        vectorize: Optional[bool] = None,
+    ) -> List[Optional[int]]:
+        """Return owner ids for ``(x, y)`` points in order.
+
+        Points are bucketed into grid cells of ``cell_size`` and the R*Tree
+        is queried once per cell, so dense batches need few SQL queries.
+        With NumPy installed (the ``geo`` extra) all points of a cell are
+        tested against each candidate polygon at once; ``vectorize=False``
+        forces the pure-Python test, which gives the same results.
+        """
+        np = _numpy() if vectorize is not False else None
+        if vectorize and np is None:
+            raise ImportError("Vectorized point-in-polygon tests require the 'numpy' package")
+        points = list(points)
+        results: List[Optional[int]] = [None] * len(points)
+        cells: Dict[Tuple[int, int], List[int]] = {}
+        for index, (x, y) in enumerate(points):
+            cells.setdefault((int(x // cell_size), int(y // cell_size)), []).append(index)
+
+        for cell, indexes in cells.items():
+            x0 = cell[0] * cell_size
+            y0 = cell[1] * cell_size
+            candidates = self._conn.execute(
+                self._candidates, (x0 + cell_size, x0, y0 + cell_size, y0)
+            ).fetchall()
+            if not candidates:
+                continue
+            if np is None:
+                for index in indexes:
+                    x, y = points[index]
+                    for polygon_id, owner_id, min_x, max_x, min_y, max_y in candidates:
+                        if min_x <= x <= max_x and min_y <= y <= max_y and point_in_rings(
+                            x, y, self._rings(polygon_id)
+                        ):
+                            results[index] = int(owner_id)
+                            break
+                continue
+
+            # Points are resolved by the first candidate containing them, as
+            # in the scalar loop above.
+            pending = np.asarray(indexes)
+            coords = np.asarray([points[i] for i in indexes], dtype=np.float64).reshape(-1, 2)
+            xs, ys = coords[:, 0], coords[:, 1]
+            for polygon_id, owner_id, min_x, max_x, min_y, max_y in candidates:
+                in_box = (xs >= min_x) & (xs <= max_x) & (ys >= min_y) & (ys <= max_y)
+                if not in_box.any():
+                    continue
+                hit = np.zeros(len(xs), dtype=bool)
+                hit[in_box] = points_in_rings(xs[in_box], ys[in_box], self._rings(polygon_id))
+                for index in pending[hit]:
+                    results[index] = int(owner_id)
+                keep = ~hit
+                pending, xs, ys = pending[keep], xs[keep], ys[keep]
+                if not len(pending):
+                    break
+        return results
+
+
+__all__ = [
+    "simplify_ring",
+    "pack_rings",
+    "unpack_rings",
+    "point_in_rings",
+    "points_in_rings",
+    "create_polygon_tables",
+    "insert_polygon",
+    "delete_polygons",
+    "polygon_queries",
+    "POLYGON_CACHE_SIZE",
+    "PolygonLocator",
+]
@@ -1,3 +1,4 @@
 from .gis_map_importer import GISMapImporter
+from .gis_map_api import AreasViewReader, CityLocator
 
-__all__ = ["GISMapImporter"]
+__all__ = ["GISMapImporter", "AreasViewReader", "CityLocator"]
@@ -0,0 +1,65 @@
+from __future__ import annotations
+
+import sqlite3
+from typing import Iterable, List, Optional, Tuple
+
+from ..database import Database
+from ..geometry import POLYGON_CACHE_SIZE, PolygonLocator
+
+
+class CityLocator:
+    """Reverse geocode latitude/longitude to ``city_id``.
+
+    Requires polygons imported with :meth:`GISMapImporter.import_shapefile`.
+    ``cache_size`` bounds the number of decoded polygons kept in memory.
+    """
+
+    def __init__(self, db: Database, cache_size: int = POLYGON_CACHE_SIZE) -> None:
+        self._db = db
+        self._locator = PolygonLocator(db.conn, "city_polygons", "city_id", cache_size=cache_size)
+
+    def locate(self, lat: float, lon: float) -> Optional[int]:
+        """Return the ``city_id`` containing the point or None."""
+        return self._locator.locate(lon, lat)
+
+    def locate_many(self, points: Iterable[Tuple[float, float]]) -> List[Optional[int]]:
+        """Return ``city_id`` values for ``(lat, lon)`` points in order."""
+        return self._locator.locate_many((lon, lat) for lat, lon in points)
+
+
+class AreasViewReader:
+    """Read records from ``areas_view`` view."""
+
+    _COLUMNS = (
+        "SELECT city_id, pref_code, city_code, subpref_name, distinct_name, city_name, ward_name "
+        "FROM areas_view"
+    )
+
+    def __init__(self, db: Database) -> None:
+        self._db = db
+
+    def count(self) -> int:
+        """Return total number of rows in ``areas_view``."""
+        total = self._db.conn.execute("SELECT COUNT(*) FROM areas_view").fetchone()[0]
+        return int(total)
+
+    def fetch(self, offset: int = 0, limit: int = 100) -> list[dict[str, object]]:
+        """Return a slice of records from ``areas_view``."""
+        cur = self._db.conn.execute(
+            self._COLUMNS + " ORDER BY city_id LIMIT ? OFFSET ?", (limit, offset)
+        )
+        cols = [d[0] for d in cur.description]
+        return [dict(zip(cols, row)) for row in cur.fetchall()]
+
+    def fetch_all(self) -> list[dict[str, object]]:
+        """Return all records from ``areas_view``."""
+        cur = self._db.conn.execute(self._COLUMNS + " ORDER BY city_id")
+        cols = [d[0] for d in cur.description]
+        return [dict(zip(cols, row)) for row in cur.fetchall()]
+
+    def cursor(self) -> sqlite3.Cursor:
+        """Return a cursor over all records of ``areas_view`` for streaming."""
+        return self._db.conn.execute(self._COLUMNS + " ORDER BY city_id")
+
+
+__all__ = ["AreasViewReader", "CityLocator"]
@@ -1,89 +1,174 @@
 from __future__ import annotations
 
 import sqlite3
-from typing import Dict, Iterable, Tuple
+from pathlib import Path
+from functools import partial
+from itertools import islice
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
 
-from ..dbf import parse_dbf
+from ..checkpoint import ImportProgress
+from ..dbf import DBFField, decode_record, field_slices, iter_raw_records
+from ..geometry import create_polygon_tables, delete_polygons, insert_polygon, simplify_ring
+from ..pipeline import Pipeline
+from ..shp import iter_shape_records
+from ..validation import Reject, RejectCollector, check_code_columns, make_reject
 
-from ..database import Database, create_areas_view
+from ..database import Database, create_areas_view, create_city_tables
+
+# Douglas-Peucker tolerance in degrees (about 1 m) for stored polygons.
+DEFAULT_TOLERANCE = 0.00001
+
+# Code columns checked before conversion, with their number of digits.
+_CODE_COLUMNS = [("N03_007", 5)]
+
+# (raw_code, pref_code, city_code, pref_name, subpref_name, distinct_name, city_name, ward_name)
+_CityRow = Tuple[bytes, int, int, str, str, str, str, str]
+
+
+def _decode_batch(
+    fields: List[DBFField], encoding: str, path: str, batch: List[Tuple[bytes, bytes, int]]
+) -> Tuple[List[_CityRow], List[Reject], int]:
+    """Decode unique N03 records; those without a valid code become rejects.
+
+    Also returns the row number of the last record in the batch.
+    """
+    decoded = [decode_record(record, fields, encoding) for _, record, _ in batch]
+    errors = check_code_columns(decoded, _CODE_COLUMNS)
+    rows: List[_CityRow] = []
+    rejects: List[Reject] = []
+    for (key, _, number), rec, rec_errors in zip(batch, decoded, errors):
+        if rec_errors:
+            rejects.append(make_reject(path, number, rec_errors, rec))
+            continue
+        code = rec["N03_007"]
+        rows.append(
+            (
+                key,
+                int(code[:2]),
+                int(code[2:]),
+                rec.get("N03_001", ""),
+                rec.get("N03_002", ""),
+                rec.get("N03_003", ""),
+                rec.get("N03_004", ""),
+                rec.get("N03_005", ""),
+            )
+        )
+    return rows, rejects, batch[-1][2]
 
 
 class GISMapImporter:
     """Import municipalities from the MLIT GIS Map (formerly N03) DBF format."""
 
-    def __init__(self, db: Database, encoding: str = "cp932") -> None:
+    def __init__(
+        self,
+        db: Database,
+        encoding: str = "cp932",
+        workers: int = 1,
+        use_processes: bool = False,
+        max_errors: Optional[int] = None,
+        rejects_path: Optional[str | Path] = None,
+        checkpoint_every: Optional[int] = None,
+    ) -> None:
         self.db = db
         self.encoding = encoding
+        self.workers = workers
+        self.use_processes = use_processes
+        # Rejected rows tolerated per import (None: any number)
+        self.max_errors = max_errors
+        self.rejects_path = rejects_path
+        self.rejects = RejectCollector(max_errors)
+        self._rejects_written = False
+        # Cities written per committed checkpoint (None: one commit per file)
+        self.checkpoint_every = checkpoint_every
+        # (pref_code, city_code) -> number of polygon rows in the last import
+        self.polygon_counts: Dict[Tuple[int, int], int] = {}
+        # Existing cities given hierarchy ids by the last import
+        self.cities_updated = 0
+
+    def _iter_unique_records(
+        self, path: str, counts: Dict[bytes, int], skip: int = 0
+    ) -> Tuple[List[DBFField], Iterator[Tuple[bytes, bytes, int]]]:
+        """Collapse polygon rows sharing an ``N03_007`` code.
+
+        Records are grouped on the raw code bytes before decoding and only
+        the first ``(raw_code, record, row_number)`` of each municipality is
+        yielded. ``counts`` receives the number of rows per raw code. The
+        first ``skip`` rows are passed over.
+        """
+        fields, records = iter_raw_records(path)
+        code_slice = field_slices(fields).get("N03_007", slice(0, 0))
+
+        def unique() -> Iterator[Tuple[bytes, bytes, int]]:
+            for number, record in enumerate(islice(records, skip, None), start=skip + 1):
+                key = record[code_slice]
+                if key in counts:
+                    counts[key] += 1
+                else:
+                    counts[key] = 1
+                    yield key, record, number
+
+        return fields, unique()
 
     def _create_schema(self, conn: sqlite3.Connection) -> None:
-        cur = conn.cursor()
-        cur.execute(
-            """
-            CREATE TABLE IF NOT EXISTS prefectures (
-                prefecture_id INTEGER PRIMARY KEY AUTOINCREMENT,
-                pref_code INTEGER UNIQUE NOT NULL,
-                pref_name TEXT NOT NULL
-            )
-            """
-        )
-        cur.execute(
-            """
-            CREATE TABLE IF NOT EXISTS subprefecters (
-                subpref_id INTEGER PRIMARY KEY AUTOINCREMENT,
-                subpref_name TEXT UNIQUE NOT NULL
-            )
-            """
-        )
-        cur.execute(
-            """
-            CREATE TABLE IF NOT EXISTS distincts (
-                distinct_id INTEGER PRIMARY KEY AUTOINCREMENT,
-                distinct_name TEXT UNIQUE NOT NULL
-            )
-            """
-        )
-        cur.execute(
-            """
-            CREATE TABLE IF NOT EXISTS wards (
-                ward_id INTEGER PRIMARY KEY AUTOINCREMENT,
-                ward_name TEXT UNIQUE NOT NULL
-            )
-            """
-        )
-        cur.execute(
-            """
-            CREATE TABLE IF NOT EXISTS cities (
-                city_id INTEGER PRIMARY KEY AUTOINCREMENT,
-                pref_code INTEGER NOT NULL REFERENCES prefectures(pref_code),
-                city_code INTEGER NOT NULL,
-                city_name TEXT NOT NULL,
-                subpref_id INTEGER REFERENCES subprefecters(subpref_id),
-                distinct_id INTEGER REFERENCES distincts(distinct_id),
-                ward_id INTEGER REFERENCES wards(ward_id),
-                UNIQUE(pref_code, city_code)
-            )
-            """
-        )
-        conn.commit()
+        create_city_tables(conn)
         create_areas_view(conn)
 
-    def import_dbf(self, path: str) -> tuple[int, int]:
+    def import_dbf(self, path: str, resume: bool = False) -> tuple[int, int]:
         """Import a single GIS Map DBF file.
 
+        Rows repeated for each polygon of a municipality are collapsed
+        before normalization; their counts are left in
+        :attr:`polygon_counts`.
+
+        Cities already present, for example from an R2KA import into the same
+        database, are matched on ``(pref_code, city_code)``; their subprefecture,
+        district and ward are filled in if they have none, and the number of
+        such cities is left in :attr:`cities_updated`.
+
+        Records without a valid ``N03_007`` code are skipped and collected
+        in :attr:`rejects`, once per distinct code with the row number of its
+        first occurrence; they are stored in the ``import_rejects`` table
+        and, if ``rejects_path`` is set, written to that CSV file (appended
+        to by later imports with the same importer). More than
+        ``max_errors`` rejects raise
+        :class:`~dbf_utils.validation.TooManyRejects` and roll back.
+
+        When the importer has ``checkpoint_every`` set, a checkpoint is
+        committed to ``import_progress`` every ``checkpoint_every`` cities.
+        With ``resume``, a finished file is skipped and an interrupted one
+        continues after its last checkpoint, with caches rebuilt from the
+        database; :attr:`polygon_counts` then only covers the rows read.
+
         Returns a tuple of (records_read, cities_inserted).
         """
-        records = parse_dbf(path, encoding=self.encoding)
         conn = self.db.conn
         self._create_schema(conn)
         cur = conn.cursor()
 
+        progress: Optional[ImportProgress] = None
+        skip = 0
+        if self.checkpoint_every is not None:
+            progress = ImportProgress(conn, "gis")
+            if resume:
+                skip, completed = progress.get(str(path))
+                if completed:
+                    self.polygon_counts = {}
+                    return 0, 0
+
         cur.execute("SELECT pref_code, prefecture_id FROM prefectures")
         pref_cache: Dict[int, int] = {code: pid for code, pid in cur.fetchall()}
 
-        cur.execute("SELECT pref_code, city_code, city_id FROM cities")
-        city_cache: Dict[Tuple[int, int], int] = {
-            (p, c): cid for p, c, cid in cur.fetchall()
-        }
+        cur.execute(
+            "SELECT pref_code, city_code, city_id, "
+            "subpref_id IS NULL AND distinct_id IS NULL AND ward_id IS NULL FROM cities"
+        )
+        city_cache: Dict[Tuple[int, int], int] = {}
+        # Cities without hierarchy ids, e.g. inserted by the R2KA importer.
+        bare_cities: Dict[Tuple[int, int], int] = {}
+        for p, c, cid, bare in cur.fetchall():
+            city_cache[(p, c)] = cid
+            if bare:
+                bare_cities[(p, c)] = cid
         cur.execute("SELECT subpref_name, subpref_id FROM subprefecters")
         subpref_cache: Dict[str, int] = {n: i for n, i in cur.fetchall()}
         cur.execute("SELECT distinct_name, distinct_id FROM distincts")
@@ -91,73 +176,149 @@ class GISMapImporter:
         cur.execute("SELECT ward_name, ward_id FROM wards")
         ward_cache: Dict[str, int] = {n: i for n, i in cur.fetchall()}
 
-        attempted = 0
         inserted = 0
+        self.cities_updated = 0
+        self.rejects = RejectCollector(self.max_errors)
+        self.rejects.add_source(str(path))
+        counts: Dict[bytes, int] = {}
+        city_keys: Dict[Tuple[int, int], bytes] = {}
+        pending = 0
 
-        for rec in records:
-            attempted += 1
-            pref_name = str(rec.get("N03_001", "")).strip()
-            subpref_name = str(rec.get("N03_002", "")).strip()
-            distinct_name = str(rec.get("N03_003", "")).strip()
-            city_name = str(rec.get("N03_004", "")).strip()
-            ward_name = str(rec.get("N03_005", "")).strip()
-            code = str(rec.get("N03_007", "")).strip()
-            if not code.isdigit() or len(code) != 5:
-                # Skip invalid records
-                continue
-            pref_code = int(code[:2])
-            city_code = int(code[2:])
-
-            if pref_code not in pref_cache:
-                cur.execute(
-                    "INSERT INTO prefectures (pref_code, pref_name) VALUES (?, ?)",
-                    (pref_code, pref_name),
-                )
-                pref_cache[pref_code] = cur.lastrowid
-
-            if subpref_name:
-                if subpref_name not in subpref_cache:
+        def name_id(cache: Dict[str, int], table: str, column: str, name: str) -> Optional[int]:
+            if not name:
+                return None
+            if name not in cache:
+                cur.execute(f"INSERT INTO {table} ({column}) VALUES (?)", (name,))
+                cache[name] = cur.lastrowid
+            return cache[name]
+
+        def write(batch: Tuple[List[_CityRow], List[Reject], int]) -> None:
+            nonlocal inserted, pending
+            rows, rejects, last_row = batch
+            self.rejects.extend(rejects)
+            for row in rows:
+                key, pref_code, city_code, pref_name = row[:4]
+                subpref_name, distinct_name, city_name, ward_name = row[4:]
+                city_keys[(pref_code, city_code)] = key
+
+                if pref_code not in pref_cache:
                     cur.execute(
-                    "INSERT INTO subprefecters (subpref_name) VALUES (?)",
-                        (subpref_name,),
+                        "INSERT INTO prefectures (pref_code, pref_name) VALUES (?, ?)",
+                        (pref_code, pref_name),
                     )
-                    subpref_cache[subpref_name] = cur.lastrowid
-                subpref_id = subpref_cache[subpref_name]
-            else:
-                subpref_id = None
+                    pref_cache[pref_code] = cur.lastrowid
+
+                subpref_id = name_id(subpref_cache, "subprefecters", "subpref_name", subpref_name)
+                distinct_id = name_id(distinct_cache, "distincts", "distinct_name", distinct_name)
+                ward_id = name_id(ward_cache, "wards", "ward_name", ward_name)
 
-            if distinct_name:
-                if distinct_name not in distinct_cache:
+                if (pref_code, city_code) not in city_cache:
                     cur.execute(
-                        "INSERT INTO distincts (distinct_name) VALUES (?)",
-                        (distinct_name,),
+                        "INSERT INTO cities (pref_code, city_code, city_name, subpref_id, distinct_id, ward_id) VALUES (?, ?, ?, ?, ?, ?)",
+                        (pref_code, city_code, city_name, subpref_id, distinct_id, ward_id),
                     )
-                    distinct_cache[distinct_name] = cur.lastrowid
-                distinct_id = distinct_cache[distinct_name]
-            else:
-                distinct_id = None
-
-            if ward_name:
-                if ward_name not in ward_cache:
+                    city_cache[(pref_code, city_code)] = cur.lastrowid
+                    inserted += 1
+                elif (pref_code, city_code) in bare_cities and (subpref_id or distinct_id or ward_id):
                     cur.execute(
-                        "INSERT INTO wards (ward_name) VALUES (?)",
-                        (ward_name,),
+                        "UPDATE cities SET subpref_id = ?, distinct_id = ?, ward_id = ? WHERE city_id = ?",
+                        (subpref_id, distinct_id, ward_id, bare_cities.pop((pref_code, city_code))),
                     )
-                    ward_cache[ward_name] = cur.lastrowid
-                ward_id = ward_cache[ward_name]
-            else:
-                ward_id = None
-
-            if (pref_code, city_code) not in city_cache:
-                cur.execute(
-                    "INSERT INTO cities (pref_code, city_code, city_name, subpref_id, distinct_id, ward_id) VALUES (?, ?, ?, ?, ?, ?)",
-                    (pref_code, city_code, city_name, subpref_id, distinct_id, ward_id),
-                )
-                city_cache[(pref_code, city_code)] = cur.lastrowid
-                inserted += 1
+                    self.cities_updated += 1
+
+            pending += len(rows)
+            if progress is not None and pending >= self.checkpoint_every:
+                progress.checkpoint(str(path), last_row)
+                pending = 0
+
+        fields, records = self._iter_unique_records(path, counts, skip)
+        try:
+            Pipeline(
+                write,
+                transform=partial(_decode_batch, fields, self.encoding, str(path)),
+                workers=self.workers,
+                use_processes=self.use_processes,
+            ).run(records)
+        except BaseException:
+            conn.rollback()
+            raise
+
+        conn.commit()
+        if progress is not None:
+            progress.checkpoint(str(path), skip + sum(counts.values()), completed=True)
+        self.rejects.write_table(conn)
+        if self.rejects and self.rejects_path is not None:
+            # Later imports by the same importer add to the file.
+            self.rejects.write_csv(self.rejects_path, append=self._rejects_written)
+            self._rejects_written = True
+        self.polygon_counts = {city: counts[key] for city, key in city_keys.items()}
+        return sum(counts.values()), inserted
+
+    def _create_geometry_schema(self, conn: sqlite3.Connection) -> None:
+        create_polygon_tables(conn, "city_polygons", "city_id")
+        conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS city_bounds (
+                city_id INTEGER PRIMARY KEY REFERENCES cities(city_id),
+                min_x REAL NOT NULL,
+                min_y REAL NOT NULL,
+                max_x REAL NOT NULL,
+                max_y REAL NOT NULL
+            )
+            """
+        )
+        conn.commit()
+
+    def import_shapefile(
+        self, path: str, tolerance: float = DEFAULT_TOLERANCE
+    ) -> tuple[int, int]:
+        """Import a GIS Map shapefile with its attribute DBF.
+
+        ``path`` may name the ``.shp`` or the ``.dbf``; the other file is
+        expected next to it. Attributes are imported as by
+        :meth:`import_dbf`, then every polygon is simplified with
+        ``tolerance`` and stored in ``city_polygons`` with an R*Tree index,
+        and per-city bounding boxes are written to ``city_bounds``.
 
+        Returns a tuple of (cities_inserted, polygons_inserted).
+        """
+        base = Path(path).with_suffix("")
+        dbf_path = str(base.with_suffix(".dbf"))
+        shp_path = str(base.with_suffix(".shp"))
+
+        _, cities_inserted = self.import_dbf(dbf_path)
+        conn = self.db.conn
+        self._create_geometry_schema(conn)
+        cur = conn.cursor()
+        cur.execute("SELECT pref_code, city_code, city_id FROM cities")
+        city_cache: Dict[Tuple[int, int], int] = {
+            (p, c): cid for p, c, cid in cur.fetchall()
+        }
+
+        polygons = 0
+        replaced: set = set()
+        for rec, shape in iter_shape_records(shp_path, dbf_path, self.encoding):
+            code = str(rec.get("N03_007", "")).strip()
+            if not code.isdigit() or len(code) != 5 or not shape.parts:
+                continue
+            city_id = city_cache.get((int(code[:2]), int(code[2:])))
+            if city_id is None:
+                continue
+            if city_id not in replaced:
+                # Polygons from an earlier import of the city are replaced.
+                delete_polygons(conn, "city_polygons", "city_id", city_id)
+                replaced.add(city_id)
+            rings = [simplify_ring(part, tolerance) for part in shape.parts]
+            insert_polygon(conn, "city_polygons", "city_id", city_id, rings)
+            polygons += 1
+
+        cur.execute(
+            "INSERT OR REPLACE INTO city_bounds (city_id, min_x, min_y, max_x, max_y) "
+            "SELECT city_id, MIN(min_x), MIN(min_y), MAX(max_x), MAX(max_y) "
+            "FROM city_polygons GROUP BY city_id"
+        )
         conn.commit()
-        return attempted, inserted
+        return cities_inserted, polygons
 
 
 __all__ = ["GISMapImporter"]
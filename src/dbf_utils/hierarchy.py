@@ -0,0 +1,258 @@
+from __future__ import annotations
+
+from array import array
+from typing import Dict, Iterator, List, NamedTuple, Optional, Sequence, Tuple
+
+from .database import Database, _table_exists
+
+# Node kinds, from the root of the tree down.
+PREFECTURE = 0
+SUBPREFECTURE = 1
+DISTRICT = 2
+CITY = 3
+WARD = 4
+AREA = 5
+SECTION = 6
+
+KIND_NAMES = ["prefecture", "subprefecture", "district", "city", "ward", "area", "section"]
+
+# Sub-areas in city and code order; walks idx_sub_areas_city_id without sorting.
+_SUB_AREAS_QUERY = (
+    "SELECT sa.sub_area_id, sa.city_id, sa.area_id, a.area_name, s.section_name "
+    "FROM sub_areas sa JOIN areas a ON sa.area_id = a.area_id "
+    "LEFT JOIN sections s ON sa.section_id = s.section_id "
+    "ORDER BY sa.city_id, sa.s_area_code"
+)
+
+
+class AreaNode(NamedTuple):
+    """A node of :class:`AreaHierarchy`.
+
+    ``key`` is the database id of the node: ``prefecture_id``,
+    ``subpref_id``, ``distinct_id``, ``city_id`` (cities and wards),
+    ``area_id`` or ``sub_area_id`` (sections). Designated cities that only
+    group wards have no id.
+    """
+
+    index: int
+    kind: int
+    key: Optional[int]
+    name: Optional[str]
+    parent: Optional[int]
+
+
+class _Node:
+    __slots__ = ("kind", "key", "name", "children", "groups")
+
+    def __init__(self, kind: int, key: Optional[int], name: Optional[str]) -> None:
+        self.kind = kind
+        self.key = key
+        self.name = name
+        self.children: List["_Node"] = []
+        self.groups: Dict[Tuple[int, object], "_Node"] = {}
+
+    def child(self, kind: int, key: Optional[int], name: Optional[str]) -> "_Node":
+        group = (kind, key if key is not None else name)
+        node = self.groups.get(group)
+        if node is None:
+            node = _Node(kind, key, name)
+            self.groups[group] = node
+            self.children.append(node)
+        return node
+
+
+class AreaHierarchy:
+    """Preloaded prefecture → subprefecture/district → city → ward → area → section tree.
+
+    The tree is read once from ``prefectures``, ``cities`` (with the GIS Map
+    hierarchy tables when present) and ``sub_areas``, and stored as flat
+    arrays in depth-first order: children of every node are kept in a
+    compressed adjacency list, so :meth:`children` is a slice, and the
+    subtree of a node is the contiguous index range
+    ``[node, subtree_end(node))``.
+
+    Cities with a ward are placed under a city node named after the
+    designated city (``さいたま市``) that groups its wards. Sub-areas are
+    grouped by area under their city or ward; each sub-area is a section
+    leaf whose name is ``None`` when the area has no sections.
+    """
+
+    def __init__(self, db: Database) -> None:
+        conn = db.conn
+        roots: List[_Node] = []
+        prefs: Dict[int, _Node] = {}
+        for pid, pref_code, pref_name in conn.execute(
+            "SELECT prefecture_id, pref_code, pref_name FROM prefectures ORDER BY pref_code"
+        ):
+            node = _Node(PREFECTURE, pid, pref_name)
+            prefs[pref_code] = node
+            roots.append(node)
+
+        columns = {row[1] for row in conn.execute("PRAGMA table_info(cities)")}
+        if {"subpref_id", "distinct_id", "ward_id"} <= columns and _table_exists(conn, "wards"):
+            query = (
+                "SELECT c.city_id, c.pref_code, c.city_name, c.subpref_id, sp.subpref_name, "
+                "c.distinct_id, d.distinct_name, c.ward_id, w.ward_name FROM cities c "
+                "LEFT JOIN subprefecters sp ON c.subpref_id = sp.subpref_id "
+                "LEFT JOIN distincts d ON c.distinct_id = d.distinct_id "
+                "LEFT JOIN wards w ON c.ward_id = w.ward_id "
+                "ORDER BY c.pref_code, c.city_code"
+            )
+        else:
+            query = (
+                "SELECT city_id, pref_code, city_name, NULL, NULL, NULL, NULL, NULL, NULL "
+                "FROM cities ORDER BY pref_code, city_code"
+            )
+        cities: Dict[int, _Node] = {}
+        for city_id, pref_code, city_name, sp_id, sp_name, d_id, d_name, w_id, w_name in conn.execute(query):
+            parent = prefs.get(pref_code)
+            if parent is None:
+                continue
+            if sp_id is not None:
+                parent = parent.child(SUBPREFECTURE, sp_id, sp_name)
+            if d_id is not None:
+                parent = parent.child(DISTRICT, d_id, d_name)
+            if w_id is not None:
+                # R2KA names include the ward (さいたま市西区); GIS Map ones do not.
+                base = city_name[: -len(w_name)] if city_name.endswith(w_name) else city_name
+                node = parent.child(CITY, None, base).child(WARD, city_id, w_name)
+            else:
+                node = parent.child(CITY, city_id, city_name)
+            cities[city_id] = node
+
+        if _table_exists(conn, "sub_areas"):
+            for sub_id, city_id, area_id, area_name, section_name in conn.execute(
+                _SUB_AREAS_QUERY
+            ):
+                city = cities.get(city_id)
+                if city is not None:
+                    city.child(AREA, area_id, area_name).child(SECTION, sub_id, section_name)
+
+        self._build(roots)
+
+    def _build(self, roots: List[_Node]) -> None:
+        kinds = array("b")
+        keys = array("q")
+        parents = array("i")
+        ends = array("I")
+        names: List[Optional[str]] = []
+        order: List[_Node] = []
+
+        # Iterative pre-order walk; ``ends`` is patched once a subtree is done.
+        stack: List[Tuple[_Node, int, bool]] = [(n, -1, False) for n in reversed(roots)]
+        while stack:
+            node, parent, done = stack.pop()
+            if done:
+                # ``parent`` is the node's own index for the end marker.
+                ends[parent] = len(order)
+                continue
+            index = len(order)
+            order.append(node)
+            kinds.append(node.kind)
+            keys.append(-1 if node.key is None else node.key)
+            names.append(node.name)
+            parents.append(parent)
+            ends.append(0)
+            stack.append((node, index, True))
+            stack.extend((c, index, False) for c in reversed(node.children))
+
+        index_of = {id(node): i for i, node in enumerate(order)}
+        offsets = array("I", [0])
+        children = array("I")
+        for node in order:
+            children.extend(index_of[id(c)] for c in node.children)
+            offsets.append(len(children))
+
+        self._kinds = kinds
+        self._keys = keys
+        self._parents = parents
+        self._ends = ends
+        self._names = names
+        self._offsets = offsets
+        self._children = memoryview(children)
+        self._roots = [index_of[id(n)] for n in roots]
+        # Area and district names are shared between cities, so only kinds
+        # whose ids identify a single node are indexed.
+        self._index: Dict[Tuple[int, int], int] = {
+            (kinds[i], keys[i]): i
+            for i in range(len(order))
+            if keys[i] >= 0 and kinds[i] not in (DISTRICT, AREA)
+        }
+
+    def __len__(self) -> int:
+        return len(self._kinds)
+
+    @property
+    def roots(self) -> List[int]:
+        """Prefecture nodes ordered by ``pref_code``."""
+        return list(self._roots)
+
+    def node(self, index: int) -> AreaNode:
+        key = self._keys[index]
+        parent = self._parents[index]
+        return AreaNode(
+            index,
+            self._kinds[index],
+            None if key < 0 else key,
+            self._names[index],
+            None if parent < 0 else parent,
+        )
+
+    def find(self, kind: int, key: int) -> Optional[int]:
+        """Return the node for a database id of the given kind or None.
+
+        Supported for prefectures, subprefectures, cities, wards (cities
+        that belong to a designated city) and sections (``sub_area_id``).
+        """
+        return self._index.get((kind, key))
+
+    def find_city(self, city_id: int) -> Optional[int]:
+        """Return the city or ward node for ``city_id`` or None."""
+        node = self._index.get((CITY, city_id))
+        return node if node is not None else self._index.get((WARD, city_id))
+
+    def children(self, index: int) -> Sequence[int]:
+        """Return the child node indexes of ``index`` without copying."""
+        return self._children[self._offsets[index]:self._offsets[index + 1]]
+
+    def parent(self, index: int) -> Optional[int]:
+        parent = self._parents[index]
+        return None if parent < 0 else parent
+
+    def path(self, index: int) -> List[int]:
+        """Return the nodes from the root down to ``index``."""
+        nodes = []
+        while index >= 0:
+            nodes.append(index)
+            index = self._parents[index]
+        nodes.reverse()
+        return nodes
+
+    def subtree_end(self, index: int) -> int:
+        """Return the index just past the last descendant of ``index``."""
+        return self._ends[index]
+
+    def descendants(self, index: int, kind: Optional[int] = None) -> Iterator[int]:
+        """Yield descendant nodes of ``index`` in depth-first order."""
+        kinds = self._kinds
+        for i in range(index + 1, self._ends[index]):
+            if kind is None or kinds[i] == kind:
+                yield i
+
+    def keys(self, index: int, kind: int) -> List[int]:
+        """Return database ids of descendants of ``kind``, e.g. ``sub_area_id``s of a city."""
+        return [self._keys[i] for i in self.descendants(index, kind) if self._keys[i] >= 0]
+
+
+__all__ = [
+    "AreaHierarchy",
+    "AreaNode",
+    "PREFECTURE",
+    "SUBPREFECTURE",
+    "DISTRICT",
+    "CITY",
+    "WARD",
+    "AREA",
+    "SECTION",
+    "KIND_NAMES",
+]
@@ -0,0 +1,111 @@
+from __future__ import annotations
+
+import queue
+import threading
+from concurrent.futures import Executor, Future, ThreadPoolExecutor
+from itertools import islice
+from typing import Any, Callable, Iterable, List, Optional
+
+_DONE = object()
+
+
+def _identity(batch: List[Any]) -> List[Any]:
+    return batch
+
+
+class Pipeline:
+    """Run a reader, transform and writer stage concurrently.
+
+    A reader thread pulls items from the input iterable in batches of
+    ``batch_size`` and submits each batch to the transform stage, a pool of
+    ``workers`` threads (or processes when ``use_processes`` is true). The
+    writer runs on the calling thread and receives transformed batches in
+    input order, so it may use SQLite connections created on that thread.
+    At most ``queue_size`` batches are in flight between the stages.
+
+    With ``use_processes`` the transform function and the batches must be
+    picklable, so it has to be a module-level function or a
+    :func:`functools.partial` of one.
+    """
+
+    def __init__(
+        self,
+        writer: Callable[[List[Any]], None],
+        transform: Optional[Callable[[List[Any]], List[Any]]] = None,
+        batch_size: int = 1000,
+        queue_size: int = 8,
+        workers: int = 1,
+        use_processes: bool = False,
+    ) -> None:
+        self.writer = writer
+        self.transform = transform or _identity
+        self.batch_size = batch_size
+        self.queue_size = queue_size
+        self.workers = workers
+        self.use_processes = use_processes
+
+    def _executor(self) -> Executor:
+        if self.use_processes:
+            from concurrent.futures import ProcessPoolExecutor
+
+            return ProcessPoolExecutor(max_workers=self.workers)
+        return ThreadPoolExecutor(max_workers=self.workers)
+
+    def run(self, items: Iterable[Any]) -> int:
+        """Process ``items`` and return the number of items read."""
+        pending: "queue.Queue[Any]" = queue.Queue(maxsize=self.queue_size)
+        stop = threading.Event()
+        errors: List[BaseException] = []
+        count = 0
+
+        def put(item: Any) -> bool:
+            while not stop.is_set():
+                try:
+                    pending.put(item, timeout=0.1)
+                    return True
+                except queue.Full:
+                    continue
+            return False
+
+        def read(executor: Executor) -> None:
+            nonlocal count
+            try:
+                it = iter(items)
+                while not stop.is_set():
+                    batch = list(islice(it, self.batch_size))
+                    if not batch:
+                        break
+                    count += len(batch)
+                    if not put(executor.submit(self.transform, batch)):
+                        break
+            except BaseException as e:
+                errors.append(e)
+            finally:
+                put(_DONE)
+
+        with self._executor() as executor:
+            reader = threading.Thread(target=read, args=(executor,), name="pipeline-reader")
+            reader.start()
+            try:
+                while True:
+                    item = pending.get()
+                    if item is _DONE:
+                        break
+                    future: Future = item
+                    self.writer(future.result())
+            except BaseException:
+                stop.set()
+                raise
+            finally:
+                stop.set()
+                reader.join()
+                while not pending.empty():
+                    item = pending.get_nowait()
+                    if item is not _DONE:
+                        item.cancel()
+        if errors:
+            raise errors[0]
+        return count
+
+
+__all__ = ["Pipeline"]
@@ -0,0 +1,212 @@
+from __future__ import annotations
+
+import re
+import sqlite3
+from typing import Iterable, List, NamedTuple, Optional, Sequence, Tuple
+
+# ``SCAN c`` on SQLite 3.36+, ``SCAN TABLE c`` before.
+_SCAN = re.compile(r"^SCAN (?:TABLE |SUBQUERY \d+ AS )?(\w+)")
+
+
+class PlannedQuery(NamedTuple):
+    """A built-in query to check with ``EXPLAIN QUERY PLAN``.
+
+    ``tables`` must all exist for the query to be checked. ``scans`` lists
+    the tables or aliases that the query reads in full by design, such as
+    the ``VALUES`` list of a batch lookup or a paged listing. ``expect``
+    lists text that must appear in the plan, e.g. the constraints an index
+    search has to bind, to catch searches on a prefix of an index.
+    """
+
+    name: str
+    sql: str
+    params: Sequence[object] = ()
+    tables: Sequence[str] = ()
+    scans: Sequence[str] = ()
+    expect: Sequence[str] = ()
+
+
+class PlanIssue(NamedTuple):
+    """A plan step of ``query`` that reads a table in full, sorts or is missing."""
+
+    query: str
+    detail: str
+
+
+def builtin_queries() -> List[PlannedQuery]:
+    """Return the lookup queries shipped with the package."""
+    from .geometry import polygon_queries
+    from .hierarchy import _SUB_AREAS_QUERY
+    from .r2ka.r2ka_api import (
+        CITY_ID_QUERY,
+        SUB_AREA_ID_QUERY,
+        city_ids_query,
+        sub_area_ids_query,
+    )
+
+    queries = [
+        PlannedQuery(
+            "city_id",
+            CITY_ID_QUERY,
+            (11, 100),
+            ["cities"],
+            expect=["(pref_code=? AND city_code=?)"],
+        ),
+        PlannedQuery("city_ids", city_ids_query(2), (11, 100, 11, 101), ["cities"], ["q"]),
+        PlannedQuery(
+            "sub_area_id",
+            SUB_AREA_ID_QUERY,
+            (11, 100, 1000),
+            ["cities", "sub_areas"],
+            expect=["(pref_code=? AND city_code=?)", "(city_id=? AND s_area_code=?)"],
+        ),
+        PlannedQuery(
+            "sub_area_ids",
+            sub_area_ids_query(2),
+            (11, 100, 1000, 11, 100, 2000),
+            ["cities", "sub_areas"],
+            ["q"],
+        ),
+        PlannedQuery(
+            "codes_view by codes",
+            "SELECT sub_area_id FROM codes_view "
+            "WHERE prefecture_code = ? AND city_code = ? AND s_area_code = ?",
+            (11, 100, 1000),
+            ["codes_view"],
+            expect=["(pref_code=? AND city_code=?)", "(s_area_code=? AND city_id=?)"],
+        ),
+        PlannedQuery(
+            "codes_view by sub_area_id",
+            "SELECT jis_code FROM codes_view WHERE sub_area_id = ?",
+            (1,),
+            ["codes_view"],
+        ),
+        PlannedQuery(
+            "codes_view page",
+            "SELECT sub_area_id, prefecture_code, city_code, s_area_code, jis_code "
+            "FROM codes_view ORDER BY sub_area_id LIMIT ? OFFSET ?",
+            (100, 0),
+            ["codes_view"],
+            ["sa"],
+        ),
+        PlannedQuery(
+            "sub_areas page",
+            "SELECT sub_area_id, s_area_code, area_id, section_id, city_id, prefecture_id "
+            "FROM sub_areas ORDER BY sub_area_id LIMIT ? OFFSET ?",
+            (100, 0),
+            ["sub_areas"],
+            ["sub_areas"],
+        ),
+        PlannedQuery(
+            "sub_areas by city",
+            "SELECT sub_area_id FROM sub_areas WHERE city_id = ? ORDER BY s_area_code",
+            (1,),
+            ["sub_areas"],
+            expect=["idx_sub_areas_city_id"],
+        ),
+        PlannedQuery(
+            "hierarchy sub_areas",
+            _SUB_AREAS_QUERY,
+            (),
+            ["sub_areas", "areas", "sections"],
+            ["sa"],
+            ["idx_sub_areas_city_id"],
+        ),
+        PlannedQuery(
+            "areas_view by city_id",
+            "SELECT city_name, ward_name FROM areas_view WHERE city_id = ?",
+            (1,),
+            ["areas_view"],
+        ),
+        PlannedQuery(
+            "areas_view page",
+            "SELECT city_id, pref_code, city_code, subpref_name, distinct_name, city_name, "
+            "ward_name FROM areas_view ORDER BY city_id LIMIT ? OFFSET ?",
+            (100, 0),
+            ["areas_view"],
+            ["c"],
+        ),
+    ]
+    for column, table in (
+        ("subpref_id", "subprefecters"),
+        ("distinct_id", "distincts"),
+        ("ward_id", "wards"),
+    ):
+        queries.append(
+            PlannedQuery(
+                f"cities by {column}",
+                f"SELECT city_id FROM cities WHERE {column} = ?",
+                (1,),
+                ["cities", table],
+                expect=[f"idx_cities_{column}"],
+            )
+        )
+    for name, owner in (("sub_area_polygons", "sub_area_id"), ("city_polygons", "city_id")):
+        candidates, rings = polygon_queries(name, owner)
+        queries.append(
+            PlannedQuery(
+                f"{name} candidates",
+                candidates,
+                (139.0, 139.0, 35.0, 35.0),
+                [name, f"{name}_rtree"],
+                expect=["VIRTUAL TABLE"],
+            )
+        )
+        queries.append(PlannedQuery(f"{name} rings", rings, (1,), [name]))
+    return queries
+
+
+def _exists(conn: sqlite3.Connection, name: str) -> bool:
+    return conn.execute("SELECT 1 FROM sqlite_master WHERE name = ?", (name,)).fetchone() is not None
+
+
+def explain(
+    conn: sqlite3.Connection, sql: str, params: Sequence[object] = ()
+) -> List[Tuple[int, int, str]]:
+    """Return ``(id, parent, detail)`` rows of ``EXPLAIN QUERY PLAN``."""
+    return [
+        (row[0], row[1], row[-1])
+        for row in conn.execute("EXPLAIN QUERY PLAN " + sql, tuple(params))
+    ]
+
+
+def check_plan(query: PlannedQuery, plan: Iterable[Tuple[int, int, str]]) -> List[PlanIssue]:
+    """Return the full scans, temporary sorts and missing expectations in ``plan``.
+
+    Scans of the tables in ``query.scans``, of ``VALUES`` lists and of
+    virtual tables (which plan their own index use) are allowed.
+    """
+    plan = list(plan)
+    issues = [
+        PlanIssue(query.name, f"expected {text!r} in plan")
+        for text in query.expect
+        if not any(text in detail for _, _, detail in plan)
+    ]
+    for _, _, detail in plan:
+        if "TEMP B-TREE" in detail:
+            issues.append(PlanIssue(query.name, detail))
+            continue
+        match = _SCAN.match(detail)
+        if match is None or "CONSTANT ROW" in detail or "VIRTUAL TABLE" in detail:
+            continue
+        if match.group(1) not in query.scans:
+            issues.append(PlanIssue(query.name, detail))
+    return issues
+
+
+def audit(
+    conn: sqlite3.Connection, queries: Optional[Iterable[PlannedQuery]] = None
+) -> List[PlanIssue]:
+    """Check the plans of ``queries`` (default: the built-in ones).
+
+    Queries whose tables or views are missing from the database are skipped.
+    """
+    issues = []
+    for query in builtin_queries() if queries is None else queries:
+        if not all(_exists(conn, t) for t in query.tables):
+            continue
+        issues.extend(check_plan(query, explain(conn, query.sql, query.params)))
+    return issues
+
+
+__all__ = ["PlannedQuery", "PlanIssue", "audit", "builtin_queries", "check_plan", "explain"]
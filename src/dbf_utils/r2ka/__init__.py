@@ -1,3 +1,8 @@
+from __future__ import annotations
+
+from importlib import import_module
+from typing import TYPE_CHECKING, Any
+
 from .r2ka_api import (
     get_city_id,
     get_sub_area_id,
@@ -5,9 +10,51 @@ from .r2ka_api import (
     SubAreaIdSelector,
     SubAreaReader,
     CodesViewReader,
+    SubAreaRecord,
+    CityRecord,
+    SubAreaResolver,
 )
 from .r2ka_importer import R2KAImporter
 
+if TYPE_CHECKING:
+    from .r2ka_export import export_jis_mapping, export_jis_index
+    from .jis_index import JisCodeIndex
+    from .r2ka_search import NameIndex, NameMatch, normalize_name
+    from .r2ka_address import AddressResolver, AddressMatch, normalize_address
+    from .shared_lookup import SharedLookupTables
+    from .lookup_server import LookupServer
+    from .r2ka_geocoder import SubAreaLocator
+
+# Submodules are imported on first attribute access to keep startup light.
+_LAZY_ATTRS = {
+    "export_jis_mapping": ".r2ka_export",
+    "export_jis_index": ".r2ka_export",
+    "JisCodeIndex": ".jis_index",
+    "NameIndex": ".r2ka_search",
+    "NameMatch": ".r2ka_search",
+    "normalize_name": ".r2ka_search",
+    "AddressResolver": ".r2ka_address",
+    "AddressMatch": ".r2ka_address",
+    "normalize_address": ".r2ka_address",
+    "SharedLookupTables": ".shared_lookup",
+    "LookupServer": ".lookup_server",
+    "SubAreaLocator": ".r2ka_geocoder",
+}
+
+
+def __getattr__(name: str) -> Any:
+    module = _LAZY_ATTRS.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(import_module(module, __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__() -> list[str]:
+    return sorted(set(globals()) | set(_LAZY_ATTRS))
+
+
 __all__ = [
     "get_city_id",
     "get_sub_area_id",
@@ -15,5 +62,20 @@ __all__ = [
     "SubAreaIdSelector",
     "SubAreaReader",
     "CodesViewReader",
+    "SubAreaRecord",
+    "CityRecord",
+    "SubAreaResolver",
     "R2KAImporter",
+    "export_jis_mapping",
+    "export_jis_index",
+    "JisCodeIndex",
+    "NameIndex",
+    "NameMatch",
+    "normalize_name",
+    "AddressResolver",
+    "AddressMatch",
+    "normalize_address",
+    "SharedLookupTables",
+    "LookupServer",
+    "SubAreaLocator",
 ]
@@ -0,0 +1,137 @@
+from __future__ import annotations
+
+import mmap
+import os
+import struct
+import sys
+from array import array
+from bisect import bisect_left
+from pathlib import Path
+from typing import Iterable, Optional, Tuple
+
+MAGIC = b"R2KAJIDX"
+VERSION = 1
+
+# magic, version, reserved, reserved, record count
+_HEADER = struct.Struct("<8sHHIQ")
+HEADER_SIZE = _HEADER.size
+# bytes per entry: uint64 key + uint32 id
+ENTRY_SIZE = 12
+
+
+def jis_code(pref_code: int, city_code: int, s_area_code: int) -> int:
+    """Return the integer ``jis_code`` used by ``codes_view``."""
+    return (pref_code * 1000 + city_code) * 1000000 + s_area_code
+
+
+def pack_lookup_table(pairs: Iterable[Tuple[int, int]]) -> bytes:
+    """Serialize ``(key, id)`` pairs into the binary lookup table format.
+
+    The layout is a 24 byte header followed by the sorted uint64 keys and
+    the uint32 ids in the same order, all little-endian.
+    """
+    items = sorted(pairs)
+    keys = array("Q", (k for k, _ in items))
+    ids = array("I", (v for _, v in items))
+    if sys.byteorder != "little":
+        keys.byteswap()
+        ids.byteswap()
+    header = _HEADER.pack(MAGIC, VERSION, 0, 0, len(items))
+    return header + keys.tobytes() + ids.tobytes()
+
+
+class SortedTable:
+    """Read-only view of one packed lookup table inside a buffer."""
+
+    def __init__(self, buf: memoryview, offset: int = 0) -> None:
+        if sys.byteorder != "little":
+            raise RuntimeError("Binary lookup tables require a little-endian host")
+        if len(buf) < offset + _HEADER.size:
+            raise ValueError(
+                f"Truncated lookup table: expected at least {offset + _HEADER.size} "
+                f"bytes, got {len(buf)}"
+            )
+        magic, version, _, _, count = _HEADER.unpack_from(buf, offset)
+        if magic != MAGIC:
+            raise ValueError("Not a lookup table: bad magic")
+        if version != VERSION:
+            raise ValueError(f"Unsupported lookup table version {version}")
+        start = offset + _HEADER.size
+        mid = start + 8 * count
+        self.end = start + ENTRY_SIZE * count
+        if len(buf) < self.end:
+            raise ValueError(
+                f"Truncated lookup table: {count} entries need {self.end} bytes, "
+                f"got {len(buf)}"
+            )
+        self._keys = buf[start:mid].cast("Q")
+        self._ids = buf[mid:self.end].cast("I")
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def get(self, key: int) -> Optional[int]:
+        """Return the id stored for ``key`` or None."""
+        keys = self._keys
+        i = bisect_left(keys, key)
+        if i < len(keys) and keys[i] == key:
+            return self._ids[i]
+        return None
+
+    def release(self) -> None:
+        self._keys.release()
+        self._ids.release()
+
+
+class JisCodeIndex:
+    """Look up ``sub_area_id`` values from a memory-mapped binary index.
+
+    The file is produced by :func:`export_jis_index`. Opening it is a single
+    ``mmap`` and lookups are a binary search over the mapped keys, so the
+    pages are shared between processes through the page cache.
+    """
+
+    def __init__(self, path: str | Path) -> None:
+        with open(path, "rb") as f:
+            size = os.fstat(f.fileno()).st_size
+            if size < HEADER_SIZE:
+                raise ValueError(
+                    f"Truncated lookup table: expected at least {HEADER_SIZE} bytes, "
+                    f"got {size}"
+                )
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        self._buf = memoryview(self._mmap)
+        try:
+            self._table = SortedTable(self._buf)
+        except Exception:
+            self._buf.release()
+            self._mmap.close()
+            self._mmap = None
+            raise
+
+    def close(self) -> None:
+        if self._mmap is not None:
+            self._table.release()
+            self._buf.release()
+            self._mmap.close()
+            self._mmap = None
+
+    def __enter__(self) -> "JisCodeIndex":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.close()
+
+    def __len__(self) -> int:
+        return len(self._table)
+
+    def get_by_jis_code(self, code: int) -> Optional[int]:
+        return self._table.get(code)
+
+    def get_sub_area_id(
+        self, pref_code: int, city_code: int, s_area_code: int
+    ) -> Optional[int]:
+        return self._table.get(jis_code(pref_code, city_code, s_area_code))
+
+
+__all__ = ["JisCodeIndex", "SortedTable", "jis_code", "pack_lookup_table"]
@@ -0,0 +1,385 @@
+from __future__ import annotations
+
+import json
+import os
+import queue
+import threading
+import time
+from bisect import bisect_left
+from concurrent.futures import Future, TimeoutError as FutureTimeoutError
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+from urllib.parse import parse_qs, urlsplit
+
+from ..database import Database
+from .r2ka_api import LOOKUP_CACHE_SIZE, CityIdSelector, SubAreaIdSelector
+
+# Upper bounds of the latency histogram buckets in milliseconds.
+LATENCY_BUCKETS_MS = [0.1, 0.25, 0.5, 1, 2.5, 5, 10, 25, 50, 100, 250, 1000]
+
+
+class LatencyHistogram:
+    """Thread-safe fixed-bucket latency histogram."""
+
+    def __init__(self, buckets: Sequence[float] = LATENCY_BUCKETS_MS) -> None:
+        self._buckets = list(buckets)
+        self._counts = [0] * (len(self._buckets) + 1)
+        self._total = 0.0
+        self._lock = threading.Lock()
+
+    def record(self, seconds: float) -> None:
+        ms = seconds * 1000
+        with self._lock:
+            self._counts[bisect_left(self._buckets, ms)] += 1
+            self._total += ms
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            counts = list(self._counts)
+            total = self._total
+        labels = [str(b) for b in self._buckets] + ["+Inf"]
+        count = sum(counts)
+        return {
+            "buckets_ms": dict(zip(labels, counts)),
+            "count": count,
+            "mean_ms": total / count if count else 0.0,
+        }
+
+
+class BatchingLookup:
+    """Coalesce concurrent lookups into batch queries on one worker thread.
+
+    SQLite connections are used from the thread that opened them, so a
+    single worker owns the database and the selector caches. Requests
+    arriving within ``max_delay`` seconds of each other are resolved with
+    one batch query of up to ``max_batch`` keys. Each selector caches up to
+    ``cache_limit`` keys, so clients sending ever new codes cannot grow the
+    worker's memory without bound.
+
+    When the database file is replaced (for example by
+    :func:`~dbf_utils.database.publish_database`), the worker reopens it
+    before the next batch; until then lookups are served from the old file.
+    If the new file cannot be opened, that batch fails with the error and
+    the old file stays in use until the file changes again.
+    """
+
+    def __init__(
+        self,
+        db_path: str | Path,
+        max_batch: int = 1000,
+        max_delay: float = 0.002,
+        cache_limit: int = LOOKUP_CACHE_SIZE,
+    ) -> None:
+        self._db_path = db_path
+        self._max_batch = max_batch
+        self._max_delay = max_delay
+        self._cache_limit = cache_limit
+        self._queue: "queue.Queue[Optional[Tuple[str, List[tuple], Future]]]" = queue.Queue()
+        self._stats_lock = threading.Lock()
+        self.batches = 0
+        self.batched_keys = 0
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self.reloads = 0
+        self._cache_sizes = {"sub_area": 0, "city": 0}
+        self._ready = threading.Event()
+        self._error: Optional[BaseException] = None
+        self._thread = threading.Thread(target=self._run, name="lookup-worker", daemon=True)
+        self._thread.start()
+        self._ready.wait()
+        if self._error is not None:
+            raise self._error
+
+    def submit(self, kind: str, keys: List[tuple]) -> "Future[List[Optional[int]]]":
+        future: "Future[List[Optional[int]]]" = Future()
+        self._queue.put((kind, keys, future))
+        return future
+
+    def lookup(
+        self, kind: str, keys: List[tuple], timeout: Optional[float] = None
+    ) -> List[Optional[int]]:
+        """Resolve ``keys``; raises ``TimeoutError`` after ``timeout`` seconds."""
+        return self.submit(kind, keys).result(timeout)
+
+    def close(self) -> None:
+        self._queue.put(None)
+        self._thread.join()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._stats_lock:
+            return {
+                "batches": self.batches,
+                "batched_keys": self.batched_keys,
+                "cache_hits": self.cache_hits,
+                "cache_misses": self.cache_misses,
+                "reloads": self.reloads,
+                "cache_entries": dict(self._cache_sizes),
+                "cache_limit": self._cache_limit,
+            }
+
+    def _collect(self, first: Tuple[str, List[tuple], Future]) -> Tuple[List[Tuple[str, List[tuple], Future]], bool]:
+        items = [first]
+        size = len(first[1])
+        deadline = time.monotonic() + self._max_delay
+        while size < self._max_batch:
+            timeout = deadline - time.monotonic()
+            if timeout <= 0:
+                break
+            try:
+                item = self._queue.get(timeout=timeout)
+            except queue.Empty:
+                break
+            if item is None:
+                return items, True
+            items.append(item)
+            size += len(item[1])
+        return items, False
+
+    def _file_id(self) -> Optional[int]:
+        try:
+            return os.stat(self._db_path).st_ino
+        except OSError:
+            return None
+
+    def _file_state(self) -> Optional[Tuple[int, int, int]]:
+        try:
+            st = os.stat(self._db_path)
+        except OSError:
+            return None
+        return st.st_ino, st.st_size, st.st_mtime_ns
+
+    def _open(self) -> Tuple[Database, Dict[str, Tuple[Any, str]]]:
+        db = Database(self._db_path)
+        try:
+            # Reads the header and schema, so a damaged file fails here.
+            db.conn.execute("SELECT count(*) FROM sqlite_master").fetchone()
+        except BaseException:
+            db.close()
+            raise
+        selectors = {
+            "sub_area": (SubAreaIdSelector(db, self._cache_limit), "get_sub_area_ids"),
+            "city": (CityIdSelector(db, self._cache_limit), "get_city_ids"),
+        }
+        return db, selectors
+
+    def _run(self) -> None:
+        try:
+            db, selectors = self._open()
+            file_id = self._file_id()
+        except BaseException as e:  # pragma: no cover - reported to caller
+            self._error = e
+            self._ready.set()
+            return
+        self._ready.set()
+
+        stop = False
+        failed_state: Optional[Tuple[int, int, int]] = None
+        try:
+            while not stop:
+                first = self._queue.get()
+                if first is None:
+                    break
+                items, stop = self._collect(first)
+                current = self._file_id()
+                if current is not None and current != file_id:
+                    state = self._file_state()
+                    if state != failed_state:
+                        # The file was replaced: switch to it and drop old caches.
+                        try:
+                            new_db, new_selectors = self._open()
+                        except Exception as e:
+                            failed_state = state
+                            self._fail(items, e)
+                            continue
+                        db.close()
+                        db, selectors = new_db, new_selectors
+                        file_id = current
+                        failed_state = None
+                        with self._stats_lock:
+                            self.reloads += 1
+                try:
+                    self._resolve(items, selectors)
+                except Exception as e:
+                    self._fail(items, e)
+        finally:
+            db.close()
+
+    @staticmethod
+    def _fail(items: List[Tuple[str, List[tuple], Future]], error: BaseException) -> None:
+        for _, _, future in items:
+            if not future.done():
+                future.set_exception(error)
+
+    def _resolve(
+        self,
+        items: List[Tuple[str, List[tuple], Future]],
+        selectors: Dict[str, Tuple[Any, str]],
+    ) -> None:
+        for kind, (selector, method) in selectors.items():
+            group = [it for it in items if it[0] == kind]
+            if not group:
+                continue
+            keys = [k for it in group for k in it[1]]
+            hits = selector.cached(keys)
+            try:
+                results = getattr(selector, method)(keys)
+            except Exception as e:
+                self._fail(group, e)
+                continue
+            pos = 0
+            for _, item_keys, future in group:
+                future.set_result(results[pos:pos + len(item_keys)])
+                pos += len(item_keys)
+            with self._stats_lock:
+                self.batches += 1
+                self.batched_keys += len(keys)
+                self.cache_hits += hits
+                self.cache_misses += len(keys) - hits
+                self._cache_sizes[kind] = selector.cache_size
+
+
+def _split_jis_code(code: int) -> Tuple[int, int, int]:
+    return (code // 1000000000, code // 1000000 % 1000, code % 1000000)
+
+
+class _Handler(BaseHTTPRequestHandler):
+    server: "LookupServer"
+
+    def log_message(self, format: str, *args: Any) -> None:
+        pass
+
+    def _send(self, status: int, body: Dict[str, Any]) -> None:
+        data = json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _keys_from_query(self, kind: str, params: Dict[str, List[str]]) -> List[tuple]:
+        if kind == "sub_area":
+            if "jis_code" in params:
+                return [_split_jis_code(int(params["jis_code"][0]))]
+            return [(int(params["pref"][0]), int(params["city"][0]), int(params["s_area"][0]))]
+        return [(int(params["pref"][0]), int(params["city"][0]))]
+
+    def _keys_from_body(self, kind: str, body: Any) -> List[tuple]:
+        if not isinstance(body, dict):
+            raise ValueError("request body must be a JSON object")
+        size = 3 if kind == "sub_area" else 2
+        keys = [tuple(int(v) for v in codes) for codes in body.get("codes", [])]
+        if kind == "sub_area":
+            keys.extend(_split_jis_code(int(c)) for c in body.get("jis_codes", []))
+        if any(len(k) != size for k in keys):
+            raise ValueError(f"Each code set must have {size} values")
+        return keys
+
+    def _handle(self, post: bool) -> None:
+        start = time.perf_counter()
+        url = urlsplit(self.path)
+        kind = url.path.strip("/")
+        if kind == "metrics" and not post:
+            self._send(200, self.server.metrics())
+            return
+        if kind not in ("sub_area", "city"):
+            self._send(404, {"error": "not found"})
+            return
+        try:
+            if post:
+                length = self.headers.get("Content-Length")
+                if length is None:
+                    self._send(411, {"error": "Content-Length required"})
+                    return
+                length = int(length)
+                if length < 0:
+                    raise ValueError(f"negative Content-Length {length}")
+                keys = self._keys_from_body(kind, json.loads(self.rfile.read(length) or b"{}"))
+            else:
+                keys = self._keys_from_query(kind, parse_qs(url.query))
+        except (KeyError, ValueError, TypeError) as e:
+            self._send(400, {"error": f"invalid request: {e}"})
+            return
+
+        try:
+            results = self.server.lookup.lookup(kind, keys, self.server.lookup_timeout)
+        except FutureTimeoutError:
+            self._send(503, {"error": "lookup timed out"})
+            return
+        except Exception as e:
+            self._send(503, {"error": f"lookup failed: {e}"})
+            return
+        field = f"{kind}_id"
+        if post:
+            self._send(200, {f"{field}s": results})
+        else:
+            self._send(200, {field: results[0]})
+        self.server.latency[kind].record(time.perf_counter() - start)
+
+    def do_GET(self) -> None:
+        self._handle(post=False)
+
+    def do_POST(self) -> None:
+        self._handle(post=True)
+
+
+class LookupServer(ThreadingHTTPServer):
+    """HTTP JSON service for ``sub_area_id`` and ``city_id`` lookups.
+
+    Endpoints:
+
+    - ``GET /sub_area?jis_code=`` or ``?pref=&city=&s_area=``
+    - ``POST /sub_area`` with ``{"jis_codes": [...]}`` and/or ``{"codes": [[p, c, s], ...]}``
+    - ``GET /city?pref=&city=`` and ``POST /city`` with ``{"codes": [[p, c], ...]}``
+    - ``GET /metrics`` for latency histograms, batching and cache statistics
+
+    Lookups that fail or take longer than ``lookup_timeout`` seconds are
+    answered with 503. The port is bound before the database is opened, and
+    released again if opening it fails.
+    """
+
+    daemon_threads = True
+
+    def __init__(
+        self,
+        db_path: str | Path,
+        host: str = "127.0.0.1",
+        port: int = 8080,
+        max_batch: int = 1000,
+        max_delay: float = 0.002,
+        lookup_timeout: float = 5.0,
+        cache_limit: int = LOOKUP_CACHE_SIZE,
+    ) -> None:
+        self.lookup_timeout = lookup_timeout
+        self.latency = {"sub_area": LatencyHistogram(), "city": LatencyHistogram()}
+        self._thread: Optional[threading.Thread] = None
+        super().__init__((host, port), _Handler)
+        try:
+            self.lookup = BatchingLookup(
+                db_path, max_batch=max_batch, max_delay=max_delay, cache_limit=cache_limit
+            )
+        except BaseException:
+            self.server_close()
+            raise
+
+    def metrics(self) -> Dict[str, Any]:
+        return {
+            "latency": {kind: h.snapshot() for kind, h in self.latency.items()},
+            "lookup": self.lookup.stats(),
+        }
+
+    def start(self) -> None:
+        """Serve requests on a background thread."""
+        self._thread = threading.Thread(target=self.serve_forever, name="lookup-server", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Stop serving and release the database."""
+        self.shutdown()
+        if self._thread is not None:
+            self._thread.join()
+        self.server_close()
+        self.lookup.close()
+
+
+__all__ = ["LookupServer", "BatchingLookup", "LatencyHistogram"]
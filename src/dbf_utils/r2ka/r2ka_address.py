@@ -0,0 +1,151 @@
+from __future__ import annotations
+
+import re
+import unicodedata
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+from ..database import Database
+
+_KANJI_DIGITS = "〇一二三四五六七八九"
+_CHOME_RE = re.compile(r"(\d+)丁目")
+# marker for names shared by several entries
+_AMBIGUOUS = -1
+
+
+def kanji_numeral(n: int) -> str:
+    """Return ``n`` (0-99) as kanji numerals, e.g. 25 -> 二十五."""
+    if n < 10:
+        return _KANJI_DIGITS[n]
+    tens, ones = divmod(n, 10)
+    text = ("" if tens == 1 else _KANJI_DIGITS[tens]) + "十"
+    if ones:
+        text += _KANJI_DIGITS[ones]
+    return text
+
+
+def normalize_address(text: str) -> str:
+    """Normalize an address for matching against imported names.
+
+    Applies NFKC, removes whitespace and rewrites arabic ``N丁目`` as kanji
+    numerals, which is how section names are stored by the importer.
+    """
+    text = unicodedata.normalize("NFKC", text)
+    text = "".join(ch for ch in text if not ch.isspace())
+    return _CHOME_RE.sub(
+        lambda m: (kanji_numeral(int(m.group(1))) if int(m.group(1)) < 100 else m.group(1))
+        + "丁目",
+        text,
+    )
+
+
+class _Trie:
+    """Character trie answering longest-prefix matches."""
+
+    def __init__(self) -> None:
+        self._root: Dict[str, dict] = {}
+
+    def add(self, key: str, value: int) -> None:
+        node = self._root
+        for ch in key:
+            node = node.setdefault(ch, {})
+        old = node.get("")
+        node[""] = value if old is None or old == value else _AMBIGUOUS
+
+    def longest_match(self, text: str, start: int = 0) -> Optional[Tuple[int, int]]:
+        """Return ``(end, value)`` of the longest key at ``text[start:]``."""
+        node = self._root
+        best = None
+        for pos in range(start, len(text)):
+            node = node.get(text[pos])
+            if node is None:
+                break
+            if "" in node:
+                best = (pos + 1, node[""])
+        return best
+
+
+class AddressMatch(NamedTuple):
+    """Result of matching an address; unmatched levels are None."""
+
+    pref_code: Optional[int]
+    city_id: Optional[int]
+    sub_area_id: Optional[int]
+    rest: str
+
+
+class AddressResolver:
+    """Resolve free-text addresses to ``sub_area_id`` values.
+
+    Prefecture, city and sub-area names are compiled into tries and an
+    address is matched left to right with the longest name at each level.
+    The prefecture may be omitted when the city name is unique. A leading
+    ``大字``/``字`` in sub-area names is optional in the input.
+    """
+
+    def __init__(self, db: Database) -> None:
+        conn = db.conn
+        self._prefs = _Trie()
+        for pref_code, name in conn.execute("SELECT pref_code, pref_name FROM prefectures"):
+            self._prefs.add(normalize_address(name), pref_code)
+
+        self._cities: Dict[int, _Trie] = {}
+        self._all_cities = _Trie()
+        self._city_pref: Dict[int, int] = {}
+        for city_id, pref_code, name in conn.execute(
+            "SELECT city_id, pref_code, city_name FROM cities"
+        ):
+            key = normalize_address(name)
+            self._cities.setdefault(pref_code, _Trie()).add(key, city_id)
+            self._all_cities.add(key, city_id)
+            self._city_pref[city_id] = pref_code
+
+        self._sub_areas: Dict[int, _Trie] = {}
+        for sub_id, city_id, name in conn.execute(
+            "SELECT sa.sub_area_id, sa.city_id, a.area_name || COALESCE(s.section_name, '') "
+            "FROM sub_areas sa "
+            "JOIN areas a ON sa.area_id = a.area_id "
+            "LEFT JOIN sections s ON sa.section_id = s.section_id"
+        ):
+            trie = self._sub_areas.setdefault(city_id, _Trie())
+            key = normalize_address(name)
+            trie.add(key, sub_id)
+            for prefix in ("大字", "字"):
+                if key.startswith(prefix) and len(key) > len(prefix):
+                    trie.add(key[len(prefix):], sub_id)
+                    break
+
+    def match(self, address: str) -> AddressMatch:
+        """Match ``address`` as far down the hierarchy as possible."""
+        text = normalize_address(address)
+        pos = 0
+        pref_code: Optional[int] = None
+        hit = self._prefs.longest_match(text)
+        if hit is not None:
+            pos, pref_code = hit
+
+        cities = self._cities.get(pref_code) if pref_code is not None else self._all_cities
+        hit = cities.longest_match(text, pos) if cities is not None else None
+        if hit is None or hit[1] == _AMBIGUOUS:
+            return AddressMatch(pref_code, None, None, text[pos:])
+        pos, city_id = hit
+        if pref_code is None:
+            pref_code = self._city_pref[city_id]
+
+        trie = self._sub_areas.get(city_id)
+        hit = trie.longest_match(text, pos) if trie is not None else None
+        if hit is None or hit[1] == _AMBIGUOUS:
+            return AddressMatch(pref_code, city_id, None, text[pos:])
+        pos, sub_id = hit
+        return AddressMatch(pref_code, city_id, sub_id, text[pos:])
+
+    def resolve(self, address: str) -> Optional[int]:
+        """Return the ``sub_area_id`` for ``address`` or None."""
+        return self.match(address).sub_area_id
+
+    def resolve_many(self, addresses: Iterable[str]) -> List[Optional[int]]:
+        """Return ``sub_area_id`` values for ``addresses`` in order."""
+        match = self.match
+        return [match(a).sub_area_id for a in addresses]
+
+
+__all__ = ["AddressResolver", "AddressMatch", "kanji_numeral", "normalize_address"]
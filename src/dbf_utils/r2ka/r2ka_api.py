@@ -1,20 +1,64 @@
 from __future__ import annotations
 
 import sqlite3
+from collections import OrderedDict
 from pathlib import Path
-from typing import Dict, Optional, Tuple
+from typing import Any, Dict, Hashable, Iterable, List, NamedTuple, Optional, Tuple
 
 from ..database import Database
 
+# Number of keys resolved per query by the batch lookup methods.
+BATCH_QUERY_SIZE = 300
+
+# Keys (hits and misses) kept per selector cache, least recently used first out.
+LOOKUP_CACHE_SIZE = 100000
+
+# Lookup queries, shared with ``dbf_utils.query_plan`` so the audited SQL is
+# the SQL that runs.
+CITY_ID_QUERY = (
+    "SELECT city_id FROM cities "
+    "WHERE pref_code = ? AND city_code = ? "
+    "LIMIT 1"
+)
+
+# The codes are matched on ``cities`` so both (pref_code, city_code) and
+# (s_area_code, city_id) are index searches.
+SUB_AREA_ID_QUERY = (
+    "SELECT sa.sub_area_id "
+    "FROM sub_areas sa "
+    "JOIN cities c ON sa.city_id = c.city_id "
+    "WHERE c.pref_code = ? AND c.city_code = ? AND sa.s_area_code = ? "
+    "LIMIT 1"
+)
+
+
+def city_ids_query(size: int) -> str:
+    """Return the batch ``city_id`` query for ``size`` keys."""
+    values = ", ".join("(?, ?)" for _ in range(size))
+    return (
+        f"WITH q(pref_code, city_code) AS (VALUES {values}) "
+        "SELECT q.pref_code, q.city_code, c.city_id "
+        "FROM q "
+        "JOIN cities c ON c.pref_code = q.pref_code AND c.city_code = q.city_code"
+    )
+
+
+def sub_area_ids_query(size: int) -> str:
+    """Return the batch ``sub_area_id`` query for ``size`` keys."""
+    values = ", ".join("(?, ?, ?)" for _ in range(size))
+    return (
+        f"WITH q(pref_code, city_code, s_area_code) AS (VALUES {values}) "
+        "SELECT q.pref_code, q.city_code, q.s_area_code, sa.sub_area_id "
+        "FROM q "
+        "JOIN cities c ON c.pref_code = q.pref_code AND c.city_code = q.city_code "
+        "JOIN sub_areas sa ON sa.city_id = c.city_id "
+        "AND sa.s_area_code = q.s_area_code"
+    )
+
 
 def get_city_id(db: Database, pref_code: int, city_code: int) -> Optional[int]:
     """Return city_id for given prefecture and city codes or None."""
-    query = (
-        "SELECT city_id FROM cities "
-        "WHERE pref_code = ? AND city_code = ? "
-        "LIMIT 1"
-    )
-    cur = db.conn.execute(query, (pref_code, city_code))
+    cur = db.conn.execute(CITY_ID_QUERY, (pref_code, city_code))
     row = cur.fetchone()
     return int(row[0]) if row else None
 
@@ -26,30 +70,104 @@ def get_sub_area_id(
     s_area_code: int,
 ) -> Optional[int]:
     """Return sub_area_id for given codes or None if not found."""
-    query = (
-        "SELECT sa.sub_area_id "
-        "FROM sub_areas sa "
-        "JOIN cities c ON sa.city_id = c.city_id "
-        "JOIN prefectures p ON sa.prefecture_id = p.prefecture_id "
-        "WHERE p.pref_code = ? AND c.city_code = ? AND sa.s_area_code = ? "
-        "LIMIT 1"
-    )
-    cur = db.conn.execute(query, (pref_code, city_code, s_area_code))
+    cur = db.conn.execute(SUB_AREA_ID_QUERY, (pref_code, city_code, s_area_code))
     row = cur.fetchone()
     return int(row[0]) if row else None
 
 
+class _LookupCache:
+    """Least recently used cache of lookup results, misses (None) included."""
+
+    _MISSING = object()
+
+    def __init__(self, limit: int) -> None:
+        self.limit = limit
+        self._data: "OrderedDict[Hashable, Optional[int]]" = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._data
+
+    def get(self, key: Hashable, default: Any = _MISSING) -> Any:
+        value = self._data.get(key, self._MISSING)
+        if value is self._MISSING:
+            return default
+        self._data.move_to_end(key)
+        return value
+
+    def put(self, key: Hashable, value: Optional[int]) -> None:
+        if self.limit <= 0:
+            return
+        self._data[key] = value
+        self._data.move_to_end(key)
+        if len(self._data) > self.limit:
+            self._data.popitem(last=False)
+
+
+def _resolve_batch(
+    conn: sqlite3.Connection,
+    cache: _LookupCache,
+    keys: List[tuple],
+    make_query: Any,
+) -> List[Optional[int]]:
+    """Resolve ``keys`` from ``cache``, querying the rest in chunks.
+
+    ``make_query(size)`` returns SQL whose rows are the key columns followed
+    by the id. The cache is updated after the lookups, so a batch larger
+    than the cache still returns every result.
+    """
+    results: Dict[tuple, Optional[int]] = {}
+    missing = []
+    for k in dict.fromkeys(keys):
+        value = cache.get(k)
+        if value is _LookupCache._MISSING:
+            missing.append(k)
+        else:
+            results[k] = value
+    for start in range(0, len(missing), BATCH_QUERY_SIZE):
+        chunk = missing[start:start + BATCH_QUERY_SIZE]
+        params = [v for k in chunk for v in k]
+        for k in chunk:
+            results[k] = None
+        for row in conn.execute(make_query(len(chunk)), params):
+            results[tuple(row[:-1])] = int(row[-1])
+    for k in missing:
+        cache.put(k, results[k])
+    return [results[k] for k in keys]
+
+
 class SubAreaIdSelector:
-    """Cache-aware helper for looking up ``sub_area_id`` values."""
+    """Cache-aware helper for looking up ``sub_area_id`` values.
 
-    def __init__(self, db: Database) -> None:
+    Up to ``cache_limit`` keys, misses included, are cached, least recently
+    used first out, so a long-lived selector does not grow without bound.
+    """
+
+    def __init__(self, db: Database, cache_limit: int = LOOKUP_CACHE_SIZE) -> None:
         self._db = db
         self._conn = db.conn
-        self._cache: Dict[Tuple[int, int, int], Optional[int]] = {}
+        self._cache = _LookupCache(cache_limit)
 
     def close(self) -> None:
         pass
 
+    @property
+    def cache_size(self) -> int:
+        """Number of keys held in the cache, including misses."""
+        return len(self._cache)
+
+    @property
+    def cache_limit(self) -> int:
+        """Maximum number of keys held in the cache."""
+        return self._cache.limit
+
+    def cached(self, keys: Iterable[tuple]) -> int:
+        """Return how many of ``keys`` would be answered from the cache."""
+        cache = self._cache
+        return sum(1 for k in keys if k in cache)
+
     def __enter__(self) -> "SubAreaIdSelector":
         return self
 
@@ -60,35 +178,57 @@ class SubAreaIdSelector:
         self, pref_code: int, city_code: int, s_area_code: int
     ) -> Optional[int]:
         key = (pref_code, city_code, s_area_code)
-        if key in self._cache:
-            return self._cache[key]
+        cached = self._cache.get(key)
+        if cached is not _LookupCache._MISSING:
+            return cached
 
-        query = (
-            "SELECT sa.sub_area_id "
-            "FROM sub_areas sa "
-            "JOIN cities c ON sa.city_id = c.city_id "
-            "JOIN prefectures p ON sa.prefecture_id = p.prefecture_id "
-            "WHERE p.pref_code = ? AND c.city_code = ? AND sa.s_area_code = ? "
-            "LIMIT 1"
-        )
-        cur = self._conn.execute(query, key)
+        cur = self._conn.execute(SUB_AREA_ID_QUERY, key)
         row = cur.fetchone()
         result = int(row[0]) if row else None
-        self._cache[key] = result
+        self._cache.put(key, result)
         return result
 
+    def get_sub_area_ids(
+        self, keys: Iterable[Tuple[int, int, int]]
+    ) -> List[Optional[int]]:
+        """Return ``sub_area_id`` values for ``(pref, city, s_area)`` keys.
+
+        Keys missing from the cache are resolved with one query per
+        :data:`BATCH_QUERY_SIZE` keys.
+        """
+        keys = [tuple(k) for k in keys]
+        return _resolve_batch(self._conn, self._cache, keys, sub_area_ids_query)
+
 
 class CityIdSelector:
-    """Cache-aware helper for looking up ``city_id`` values."""
+    """Cache-aware helper for looking up ``city_id`` values.
 
-    def __init__(self, db: Database) -> None:
+    The cache is bounded by ``cache_limit`` as in :class:`SubAreaIdSelector`.
+    """
+
+    def __init__(self, db: Database, cache_limit: int = LOOKUP_CACHE_SIZE) -> None:
         self._db = db
         self._conn = db.conn
-        self._cache: Dict[Tuple[int, int], Optional[int]] = {}
+        self._cache = _LookupCache(cache_limit)
 
     def close(self) -> None:
         pass
 
+    @property
+    def cache_size(self) -> int:
+        """Number of keys held in the cache, including misses."""
+        return len(self._cache)
+
+    @property
+    def cache_limit(self) -> int:
+        """Maximum number of keys held in the cache."""
+        return self._cache.limit
+
+    def cached(self, keys: Iterable[tuple]) -> int:
+        """Return how many of ``keys`` would be answered from the cache."""
+        cache = self._cache
+        return sum(1 for k in keys if k in cache)
+
     def __enter__(self) -> "CityIdSelector":
         return self
 
@@ -97,20 +237,21 @@ class CityIdSelector:
 
     def get_city_id(self, pref_code: int, city_code: int) -> Optional[int]:
         key = (pref_code, city_code)
-        if key in self._cache:
-            return self._cache[key]
+        cached = self._cache.get(key)
+        if cached is not _LookupCache._MISSING:
+            return cached
 
-        query = (
-            "SELECT city_id FROM cities "
-            "WHERE pref_code = ? AND city_code = ? "
-            "LIMIT 1"
-        )
-        cur = self._conn.execute(query, key)
+        cur = self._conn.execute(CITY_ID_QUERY, key)
         row = cur.fetchone()
         result = int(row[0]) if row else None
-        self._cache[key] = result
+        self._cache.put(key, result)
         return result
 
+    def get_city_ids(self, keys: Iterable[Tuple[int, int]]) -> List[Optional[int]]:
+        """Return ``city_id`` values for ``(pref, city)`` keys in order."""
+        keys = [tuple(k) for k in keys]
+        return _resolve_batch(self._conn, self._cache, keys, city_ids_query)
+
 
 class SubAreaReader:
     """Read records from ``sub_areas`` table."""
@@ -144,6 +285,13 @@ class SubAreaReader:
         records = [dict(zip(cols, row)) for row in cur.fetchall()]
         return records
 
+    def cursor(self) -> sqlite3.Cursor:
+        """Return a cursor over all records of ``sub_areas`` for streaming."""
+        return self._db.conn.execute(
+            "SELECT sub_area_id, s_area_code, area_id, section_id, city_id, prefecture_id "
+            "FROM sub_areas ORDER BY sub_area_id"
+        )
+
 
 class CodesViewReader:
     """Read records from ``codes_view`` view."""
@@ -177,13 +325,130 @@ class CodesViewReader:
         records = [dict(zip(cols, row)) for row in cur.fetchall()]
         return records
 
+    def cursor(self) -> sqlite3.Cursor:
+        """Return a cursor over all records of ``codes_view`` for streaming."""
+        return self._db.conn.execute(
+            "SELECT sub_area_id, prefecture_code, city_code, s_area_code, jis_code "
+            "FROM codes_view ORDER BY sub_area_id"
+        )
+
+
+class SubAreaRecord(NamedTuple):
+    """Codes and names of a single ``sub_areas`` row."""
+
+    sub_area_id: int
+    jis_code: int
+    pref_code: int
+    pref_name: str
+    city_code: int
+    city_name: str
+    s_area_code: int
+    area_name: str
+    section_name: Optional[str]
+
+
+class CityRecord(NamedTuple):
+    """Codes and names of a single ``cities`` row."""
+
+    city_id: int
+    pref_code: int
+    pref_name: Optional[str]
+    city_code: int
+    city_name: str
+
+
+class SubAreaResolver:
+    """Resolve ``sub_area_id`` and ``city_id`` values back to codes and names.
+
+    All rows are loaded once into lists indexed by id, so each lookup is a
+    single list access instead of a join across five tables.
+    """
+
+    def __init__(self, db: Database) -> None:
+        self._db = db
+        names: Dict[str, str] = {}
+
+        def intern(value: Optional[str]) -> Optional[str]:
+            if value is None:
+                return None
+            return names.setdefault(value, value)
+
+        cur = db.conn.execute(
+            "SELECT sa.sub_area_id, p.pref_code, p.pref_name, c.city_code, c.city_name, "
+            "sa.s_area_code, a.area_name, s.section_name "
+            "FROM sub_areas sa "
+            "JOIN cities c ON sa.city_id = c.city_id "
+            "JOIN prefectures p ON sa.prefecture_id = p.prefecture_id "
+            "JOIN areas a ON sa.area_id = a.area_id "
+            "LEFT JOIN sections s ON sa.section_id = s.section_id"
+        )
+        rows = cur.fetchall()
+        size = max((r[0] for r in rows), default=0) + 1
+        self._sub_areas: List[Optional[SubAreaRecord]] = [None] * size
+        for sub_id, pref_code, pref_name, city_code, city_name, s_area_code, area, section in rows:
+            self._sub_areas[sub_id] = SubAreaRecord(
+                sub_id,
+                (pref_code * 1000 + city_code) * 1000000 + s_area_code,
+                pref_code,
+                intern(pref_name),
+                city_code,
+                intern(city_name),
+                s_area_code,
+                intern(area),
+                intern(section),
+            )
+
+        cur = db.conn.execute(
+            "SELECT c.city_id, c.pref_code, p.pref_name, c.city_code, c.city_name "
+            "FROM cities c LEFT JOIN prefectures p ON c.pref_code = p.pref_code"
+        )
+        rows = cur.fetchall()
+        size = max((r[0] for r in rows), default=0) + 1
+        self._cities: List[Optional[CityRecord]] = [None] * size
+        for city_id, pref_code, pref_name, city_code, city_name in rows:
+            self._cities[city_id] = CityRecord(
+                city_id, pref_code, intern(pref_name), city_code, intern(city_name)
+            )
+
+    def resolve(self, sub_area_id: int) -> Optional[SubAreaRecord]:
+        """Return the record for ``sub_area_id`` or None."""
+        if 0 <= sub_area_id < len(self._sub_areas):
+            return self._sub_areas[sub_area_id]
+        return None
+
+    def resolve_many(self, sub_area_ids: Iterable[int]) -> List[Optional[SubAreaRecord]]:
+        """Return records for ``sub_area_ids`` in the same order."""
+        table = self._sub_areas
+        size = len(table)
+        return [table[i] if 0 <= i < size else None for i in sub_area_ids]
+
+    def resolve_city(self, city_id: int) -> Optional[CityRecord]:
+        """Return the record for ``city_id`` or None."""
+        if 0 <= city_id < len(self._cities):
+            return self._cities[city_id]
+        return None
+
+    def resolve_cities(self, city_ids: Iterable[int]) -> List[Optional[CityRecord]]:
+        """Return records for ``city_ids`` in the same order."""
+        table = self._cities
+        size = len(table)
+        return [table[i] if 0 <= i < size else None for i in city_ids]
+
 
 __all__ = [
+    "CITY_ID_QUERY",
+    "LOOKUP_CACHE_SIZE",
+    "SUB_AREA_ID_QUERY",
+    "city_ids_query",
+    "sub_area_ids_query",
     "get_city_id",
     "CityIdSelector",
     "get_sub_area_id",
     "SubAreaIdSelector",
     "SubAreaReader",
     "CodesViewReader",
+    "SubAreaRecord",
+    "CityRecord",
+    "SubAreaResolver",
 ]
 
@@ -0,0 +1,96 @@
+from __future__ import annotations
+
+import csv
+import gzip
+import io
+from pathlib import Path
+from typing import BinaryIO, Optional
+
+from ..database import Database
+from .jis_index import ENTRY_SIZE, HEADER_SIZE, pack_lookup_table
+
+DEFAULT_CHUNK_SIZE = 10000
+WRITE_BUFFER_SIZE = 1 << 20
+
+JIS_MAPPING_QUERY = (
+    "SELECT printf('%02d%03d%06d', prefecture_code, city_code, s_area_code), "
+    "sub_area_id "
+    "FROM codes_view ORDER BY sub_area_id"
+)
+
+
+def _infer_compression(path: Path) -> Optional[str]:
+    suffix = path.suffix.lower()
+    if suffix == ".gz":
+        return "gzip"
+    if suffix in (".zst", ".zstd"):
+        return "zstd"
+    return None
+
+
+def _open_output(path: Path, compression: Optional[str]) -> BinaryIO:
+    """Open ``path`` for binary writing with optional compression."""
+    if compression is None:
+        return open(path, "wb", buffering=WRITE_BUFFER_SIZE)
+    if compression == "gzip":
+        return gzip.open(path, "wb", compresslevel=6)
+    if compression == "zstd":
+        try:
+            import zstandard
+        except ImportError as e:  # pragma: no cover - depends on environment
+            raise ImportError("zstd output requires the 'zstandard' package") from e
+        raw = open(path, "wb", buffering=WRITE_BUFFER_SIZE)
+        return zstandard.ZstdCompressor().stream_writer(raw)
+    raise ValueError(f"Unsupported compression {compression!r}")
+
+
+def export_jis_mapping(
+    db: Database,
+    path: str | Path,
+    compression: Optional[str] = "infer",
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+) -> int:
+    """Write ``jis_code,sub_area_id`` rows from ``codes_view`` as CSV.
+
+    Codes are zero padded to 2, 3 and 6 digits by SQLite ``printf`` and the
+    cursor is consumed ``chunk_size`` rows at a time, so memory use does not
+    depend on the number of rows. ``compression`` may be ``None``,
+    ``"gzip"``, ``"zstd"`` or ``"infer"`` to choose from the file suffix.
+    Returns the number of rows written.
+    """
+    path = Path(path)
+    if compression == "infer":
+        compression = _infer_compression(path)
+
+    cur = db.conn.execute(JIS_MAPPING_QUERY)
+    written = 0
+    with _open_output(path, compression) as raw:
+        text = io.TextIOWrapper(raw, encoding="ascii", newline="", write_through=False)
+        writer = csv.writer(text)
+        while True:
+            rows = cur.fetchmany(chunk_size)
+            if not rows:
+                break
+            writer.writerows(rows)
+            written += len(rows)
+        text.flush()
+        text.detach()
+    return written
+
+
+def export_jis_index(db: Database, path: str | Path) -> int:
+    """Write ``codes_view`` as a binary ``jis_code`` to ``sub_area_id`` index.
+
+    The file can be opened with :class:`JisCodeIndex` without SQLite.
+    Returns the number of entries written.
+    """
+    cur = db.conn.execute("SELECT jis_code, sub_area_id FROM codes_view")
+    data = pack_lookup_table(cur)
+    tmp_path = Path(str(path) + ".tmp")
+    with open(tmp_path, "wb") as f:
+        f.write(data)
+    tmp_path.replace(path)
+    return (len(data) - HEADER_SIZE) // ENTRY_SIZE
+
+
+__all__ = ["export_jis_mapping", "export_jis_index"]
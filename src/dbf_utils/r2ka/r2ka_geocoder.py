@@ -0,0 +1,46 @@
+from __future__ import annotations
+
+from typing import Iterable, List, Optional, Tuple
+
+from ..database import Database
+from ..geometry import POLYGON_CACHE_SIZE, PolygonLocator
+
+
+class SubAreaLocator:
+    """Reverse geocode latitude/longitude to ``sub_area_id``.
+
+    Requires polygons imported with :meth:`R2KAImporter.import_shapefile`.
+    Bounding boxes are searched through the ``sub_area_polygons_rtree``
+    R*Tree and candidates are confirmed with a point-in-polygon test.
+    ``cache_size`` bounds the number of decoded polygons kept in memory.
+    """
+
+    def __init__(self, db: Database, cache_size: int = POLYGON_CACHE_SIZE) -> None:
+        self._db = db
+        self._locator = PolygonLocator(
+            db.conn, "sub_area_polygons", "sub_area_id", cache_size=cache_size
+        )
+
+    def locate(self, lat: float, lon: float) -> Optional[int]:
+        """Return the ``sub_area_id`` containing the point or None."""
+        return self._locator.locate(lon, lat)
+
+    def locate_many(
+        self,
+        points: Iterable[Tuple[float, float]],
+        cell_size: float = 0.01,
+        vectorize: Optional[bool] = None,
+    ) -> List[Optional[int]]:
+        """Return ``sub_area_id`` values for ``(lat, lon)`` points in order.
+
+        Candidate polygons are fetched once per grid cell of ``cell_size``
+        degrees, which suits large batches of nearby GPS points. With NumPy
+        installed the points of a cell are tested together; see
+        :meth:`~dbf_utils.geometry.PolygonLocator.locate_many`.
+        """
+        return self._locator.locate_many(
+            ((lon, lat) for lat, lon in points), cell_size=cell_size, vectorize=vectorize
+        )
+
+
+__all__ = ["SubAreaLocator"]
@@ -1,44 +1,105 @@
 from __future__ import annotations
 
 import sqlite3
-from typing import Dict, Iterable, Tuple, List
+from typing import Any, Dict, Iterable, List, Optional, Tuple
 import re
 from collections import defaultdict
+from itertools import islice
 
 import csv
+import io
+from pathlib import Path
+from ..archive import expand_inputs, open_input
+from ..checkpoint import ImportProgress
 from ..dbf import parse_dbf
-from ..database import Database, create_codes_view
+from ..database import (
+    Database,
+    create_areas_view,
+    create_city_tables,
+    create_codes_view,
+    create_indexes,
+)
+from ..geometry import create_polygon_tables, delete_polygons, insert_polygon, simplify_ring
+from ..pipeline import Pipeline
+from ..shp import iter_shape_records
+from ..validation import Reject, RejectCollector, check_code_columns, make_reject
+
+# Douglas-Peucker tolerance in degrees (about 1 m) for stored polygons.
+DEFAULT_TOLERANCE = 0.00001
+
+# (pref_code, city_code, s_area_code, pref_name, city_name, s_name)
+_SubAreaRow = Tuple[int, int, int, str, str, str]
+
+
+def _parse_numeric_code(value: str, length: int) -> int:
+    """Validate and convert a zero padded numeric code to int."""
+    trimmed = value.strip()
+    if not trimmed.isdigit() or len(trimmed) != length:
+        raise ValueError(
+            f"Expected {length}-digit numeric code, got {value!r}"
+        )
+    return int(trimmed)
+
+
+# Code columns checked before conversion, with their number of digits.
+_CODE_COLUMNS = [("PREF", 2), ("CITY", 3), ("S_AREA", 6)]
+
+
+def _parse_rows(
+    rows: List[Tuple[str, int, Dict[str, str]]]
+) -> Tuple[List[_SubAreaRow], List[Reject]]:
+    """Convert a batch of ``(source, row_number, row)`` to typed tuples.
+
+    Rows with invalid codes are returned as rejects instead.
+    """
+    records: List[_SubAreaRow] = []
+    rejects: List[Reject] = []
+    errors = check_code_columns([row for _, _, row in rows], _CODE_COLUMNS)
+    for (source, number, row), row_errors in zip(rows, errors):
+        if row_errors:
+            rejects.append(make_reject(source, number, row_errors, row))
+            continue
+        records.append(
+            (
+                int(row["PREF"]),
+                int(row["CITY"]),
+                int(row["S_AREA"]),
+                row["PREF_NAME"].strip(),
+                row["CITY_NAME"].strip(),
+                row["S_NAME"].strip(),
+            )
+        )
+    return records, rejects
 
 
 class R2KAImporter:
     """Import records from one or more CSV files into a normalized SQLite database."""
 
-    def __init__(self, db: Database, encoding: str = "cp932") -> None:
+    def __init__(
+        self,
+        db: Database,
+        encoding: str = "cp932",
+        workers: int = 1,
+        use_processes: bool = False,
+        max_errors: Optional[int] = 0,
+        rejects_path: Optional[str | Path] = None,
+        checkpoint_every: Optional[int] = None,
+    ) -> None:
         self.db = db
         self.encoding = encoding
+        self.workers = workers
+        self.use_processes = use_processes
+        # Rejected rows tolerated per import (None: any number)
+        self.max_errors = max_errors
+        self.rejects_path = rejects_path
+        self.rejects = RejectCollector(max_errors)
+        self._rejects_written = False
+        # Records written per committed checkpoint (None: one commit per import)
+        self.checkpoint_every = checkpoint_every
 
     def _create_schema(self, conn: sqlite3.Connection) -> None:
+        create_city_tables(conn)
         cur = conn.cursor()
-        cur.execute(
-            """
-            CREATE TABLE IF NOT EXISTS prefectures (
-                prefecture_id INTEGER PRIMARY KEY AUTOINCREMENT,
-                pref_code INTEGER UNIQUE NOT NULL,
-                pref_name TEXT NOT NULL
-            )
-            """
-        )
-        cur.execute(
-            """
-            CREATE TABLE IF NOT EXISTS cities (
-                city_id INTEGER PRIMARY KEY AUTOINCREMENT,
-                pref_code INTEGER NOT NULL REFERENCES prefectures(pref_code),
-                city_code INTEGER NOT NULL,
-                city_name TEXT NOT NULL,
-                UNIQUE(pref_code, city_code)
-            )
-            """
-        )
         cur.execute(
             """
             CREATE TABLE IF NOT EXISTS areas (
@@ -69,25 +130,25 @@ class R2KAImporter:
             """
         )
         conn.commit()
+        create_indexes(conn)
 
         create_codes_view(conn)
+        create_areas_view(conn)
 
     def _parse_numeric_code(self, value: str, length: int) -> int:
         """Validate and convert a zero padded numeric code to int."""
-        trimmed = value.strip()
-        if not trimmed.isdigit() or len(trimmed) != length:
-            raise ValueError(
-                f"Expected {length}-digit numeric code, got {value!r}"
-            )
-        return int(trimmed)
+        return _parse_numeric_code(value, length)
 
     def _iter_records(self, path: str) -> Iterable[dict[str, str]]:
-        """Yield records from a CSV or DBF file as dictionaries."""
+        """Yield records from a CSV or DBF file as dictionaries.
+
+        ``path`` may name a member of a ZIP archive (``archive.zip/a.csv``).
+        """
         if path.lower().endswith(".dbf"):
             for rec in parse_dbf(path, encoding=self.encoding):
                 yield {k: (str(v) if v is not None else "") for k, v in rec.items()}
         else:
-            with open(path, encoding=self.encoding, newline="") as f:
+            with io.TextIOWrapper(open_input(path), encoding=self.encoding, newline="") as f:
                 reader = csv.DictReader(f)
                 for row in reader:
                     yield row
@@ -106,130 +167,314 @@ class R2KAImporter:
                 break
         return prefix
 
-    def import_csvs(self, csv_paths: Iterable[str]) -> tuple[int, int]:
-        """Import one or more CSV files.
-
-        Returns a tuple of (records_read, records_inserted)."""
-
-        attempted = 0
-        inserted = 0
-
-        records: List[Tuple[int, int, int, str, str, str]] = []
-
-        for path in csv_paths:
-            for row in self._iter_records(path):
-                try:
-                    pref_code = self._parse_numeric_code(row["PREF"], 2)
-                    city_code = self._parse_numeric_code(row["CITY"], 3)
-                    s_area_code = self._parse_numeric_code(row["S_AREA"], 6)
-                except ValueError as e:
-                    raise ValueError(f"Invalid record {row}: {e}") from e
-
-                pref_name = row["PREF_NAME"].strip()
-                city_name = row["CITY_NAME"].strip()
-                s_name = row["S_NAME"].strip()
-
-                records.append(
-                    (pref_code, city_code, s_area_code, pref_name, city_name, s_name)
-                )
-                attempted += 1
-
-        conn = self.db.conn
-        self._create_schema(conn)
-        cur = conn.cursor()
-
+    def _read(self, paths: Iterable[str]) -> Tuple[int, List[_SubAreaRow]]:
+        """Read and validate records, returning (records_read, records)."""
+        # Rows are parsed in batches while the next ones are read; the
+        # area-name grouping in _write spans the whole input, so the write
+        # stage only collects them.
+        records: List[_SubAreaRow] = []
+        paths = list(paths)
+        for path in paths:
+            self.rejects.add_source(path)
+
+        def write(batch: Tuple[List[_SubAreaRow], List[Reject]]) -> None:
+            records.extend(batch[0])
+            self.rejects.extend(batch[1])
+
+        rows = (
+            (path, number, row)
+            for path in paths
+            for number, row in enumerate(self._iter_records(path), start=1)
+        )
+        attempted = Pipeline(
+            write,
+            transform=_parse_rows,
+            workers=self.workers,
+            use_processes=self.use_processes,
+        ).run(rows)
+        return attempted, records
+
+    def _scan(self, path: str) -> Tuple[int, Dict[Tuple[int, int, int], str]]:
+        """Validate ``path`` without keeping its records.
+
+        Returns the number of rows read and the common name prefix of every
+        ``(pref, city, area)`` group, so the records can then be written in
+        bounded chunks with the same area names as :meth:`_write`.
+        """
+        self.rejects.add_source(path)
+        prefixes: Dict[Tuple[int, int, int], str] = {}
+
+        def write(batch: Tuple[List[_SubAreaRow], List[Reject]]) -> None:
+            self.rejects.extend(batch[1])
+            for rec in batch[0]:
+                key = (rec[0], rec[1], rec[2] // 100)
+                prefix = prefixes.get(key)
+                if prefix is None:
+                    prefixes[key] = rec[5]
+                elif prefix:
+                    prefixes[key] = self._longest_common_prefix([prefix, rec[5]])
+
+        rows = ((path, number, row) for number, row in enumerate(self._iter_records(path), start=1))
+        read = Pipeline(
+            write,
+            transform=_parse_rows,
+            workers=self.workers,
+            use_processes=self.use_processes,
+        ).run(rows)
+        return read, {key: prefix.strip() for key, prefix in prefixes.items()}
+
+    def _load_caches(self, cur: sqlite3.Cursor) -> Dict[str, Dict[Any, int]]:
+        """Return the id caches used by :meth:`_insert`, read from the database."""
         cur.execute("SELECT pref_code, prefecture_id FROM prefectures")
-        pref_cache: Dict[int, int] = {code: pid for code, pid in cur.fetchall()}
-
+        prefectures = {code: pid for code, pid in cur.fetchall()}
         cur.execute("SELECT pref_code, city_code, city_id FROM cities")
-        city_cache: Dict[Tuple[int, int], int] = {(p, c): cid for p, c, cid in cur.fetchall()}
-
+        cities = {(p, c): cid for p, c, cid in cur.fetchall()}
         cur.execute("SELECT area_name, area_id FROM areas")
-        area_cache: Dict[str, int] = {n: aid for n, aid in cur.fetchall()}
-
+        areas = {n: aid for n, aid in cur.fetchall()}
         cur.execute("SELECT section_name, section_id FROM sections")
-        section_cache: Dict[str, int] = {n: sid for n, sid in cur.fetchall()}
-
+        sections = {n: sid for n, sid in cur.fetchall()}
         cur.execute("SELECT s_area_code, city_id, prefecture_id FROM sub_areas")
-        sub_area_cache: Dict[Tuple[int, int, int], int] = {(s, cid, pid): 1 for s, cid, pid in cur.fetchall()}
+        sub_areas = {(s, cid, pid): 1 for s, cid, pid in cur.fetchall()}
+        return {
+            "prefectures": prefectures,
+            "cities": cities,
+            "areas": areas,
+            "sections": sections,
+            "sub_areas": sub_areas,
+        }
+
+    def _insert(
+        self,
+        cur: sqlite3.Cursor,
+        caches: Dict[str, Dict[Any, int]],
+        rec: _SubAreaRow,
+        prefix: str,
+    ) -> int:
+        """Insert one record whose area group has ``prefix``; return 1 if new."""
+        pref_code, city_code, s_area_code, pref_name, city_name, s_name = rec
+        pref_cache = caches["prefectures"]
+        if pref_code not in pref_cache:
+            cur.execute(
+                "INSERT INTO prefectures (pref_code, pref_name) VALUES (?, ?)",
+                (pref_code, pref_name),
+            )
+            pref_cache[pref_code] = cur.lastrowid
+        pref_id = pref_cache[pref_code]
+
+        city_cache = caches["cities"]
+        city_key = (pref_code, city_code)
+        if city_key not in city_cache:
+            cur.execute(
+                "INSERT INTO cities (pref_code, city_code, city_name) VALUES (?, ?, ?)",
+                (pref_code, city_code, city_name),
+            )
+            city_cache[city_key] = cur.lastrowid
+        city_id = city_cache[city_key]
+
+        section_code = s_area_code % 100
+
+        if prefix:
+            area_name = prefix
+            if section_code == 0:
+                section_name = None
+            else:
+                remainder = s_name[len(prefix):].strip()
+                section_name = remainder or None
+        else:
+            if section_code == 0:
+                area_name = s_name
+                section_name = None
+            else:
+                m = re.search(r"([一二三四五六七八九十百]+丁目)$", s_name)
+                if m:
+                    area_name = s_name[: -len(m.group(1))]
+                    section_name = m.group(1)
+                else:
+                    area_name = s_name
+                    section_name = None
+
+        area_cache = caches["areas"]
+        if area_name not in area_cache:
+            cur.execute("INSERT INTO areas (area_name) VALUES (?)", (area_name,))
+            area_cache[area_name] = cur.lastrowid
+        area_id = area_cache[area_name]
+
+        section_cache = caches["sections"]
+        if section_name is not None:
+            if section_name not in section_cache:
+                cur.execute(
+                    "INSERT INTO sections (section_name) VALUES (?)",
+                    (section_name,),
+                )
+                section_cache[section_name] = cur.lastrowid
+            section_id = section_cache[section_name]
+        else:
+            section_id = None
+
+        sub_area_cache = caches["sub_areas"]
+        sub_key = (s_area_code, city_id, pref_id)
+        if sub_key in sub_area_cache:
+            return 0
+        cur.execute(
+            "INSERT INTO sub_areas (s_area_code, area_id, section_id, city_id, prefecture_id) VALUES (?, ?, ?, ?, ?)",
+            (s_area_code, area_id, section_id, city_id, pref_id),
+        )
+        sub_area_cache[sub_key] = 1
+        return 1
 
-        grouped: Dict[Tuple[int, int, int], List[Tuple[int, int, int, str, str, str]]] = defaultdict(list)
+    def _write(self, records: List[_SubAreaRow]) -> int:
+        """Normalize and insert records, returning the number of sub-areas inserted."""
+        cur = self.db.conn.cursor()
+        caches = self._load_caches(cur)
+
+        grouped: Dict[Tuple[int, int, int], List[_SubAreaRow]] = defaultdict(list)
         for rec in records:
             area_code = rec[2] // 100
             grouped[(rec[0], rec[1], area_code)].append(rec)
 
-        for key, recs in grouped.items():
+        inserted = 0
+        for recs in grouped.values():
             names = [r[5] for r in recs]
             prefix = self._longest_common_prefix(names).strip()
+            for rec in recs:
+                inserted += self._insert(cur, caches, rec, prefix)
+        return inserted
+
+    def _write_checkpointed(
+        self, path: str, progress: ImportProgress, skip: int = 0
+    ) -> Tuple[int, int]:
+        """Import ``path`` in chunks of ``checkpoint_every`` rows.
+
+        The file is validated first by :meth:`_scan`, which keeps only the
+        area name prefixes, and then read again: the first ``skip`` rows
+        (written by an interrupted run) are passed over before parsing, and
+        each full chunk is written and committed with a checkpoint, so memory
+        use is bounded by the chunk size rather than the file size.
+
+        Returns a tuple of (rows_read, records_inserted), not counting the
+        skipped rows.
+        """
+        total, prefixes = self._scan(path)
+        cur = self.db.conn.cursor()
+        caches = self._load_caches(cur)
+        rows = islice(enumerate(self._iter_records(path), start=1), skip, None)
+        inserted = 0
+        while True:
+            chunk = [(path, number, row) for number, row in islice(rows, self.checkpoint_every)]
+            if not chunk:
+                break
+            records, _ = _parse_rows(chunk)
+            for rec in records:
+                inserted += self._insert(cur, caches, rec, prefixes[(rec[0], rec[1], rec[2] // 100)])
+            if len(chunk) == self.checkpoint_every:
+                progress.checkpoint(path, chunk[-1][1])
+        progress.checkpoint(path, total, completed=True)
+        return total - min(skip, total), inserted
+
+    def import_csvs(self, csv_paths: Iterable[str], resume: bool = False) -> tuple[int, int]:
+        """Import one or more CSV files.
 
-            for pref_code, city_code, s_area_code, pref_name, city_name, s_name in recs:
-                if pref_code not in pref_cache:
-                    cur.execute(
-                        "INSERT INTO prefectures (pref_code, pref_name) VALUES (?, ?)",
-                        (pref_code, pref_name),
-                    )
-                    pref_cache[pref_code] = cur.lastrowid
-                pref_id = pref_cache[pref_code]
-
-                city_key = (pref_code, city_code)
-                if city_key not in city_cache:
-                    cur.execute(
-                        "INSERT INTO cities (pref_code, city_code, city_name) VALUES (?, ?, ?)",
-                        (pref_code, city_code, city_name),
-                    )
-                    city_cache[city_key] = cur.lastrowid
-                city_id = city_cache[city_key]
-
-                section_code = s_area_code % 100
-
-                if prefix:
-                    area_name = prefix
-                    if section_code == 0:
-                        section_name = None
-                    else:
-                        remainder = s_name[len(prefix):].strip()
-                        section_name = remainder or None
-                else:
-                    if section_code == 0:
-                        area_name = s_name
-                        section_name = None
-                    else:
-                        m = re.search(r"([一二三四五六七八九十百]+丁目)$", s_name)
-                        if m:
-                            area_name = s_name[: -len(m.group(1))]
-                            section_name = m.group(1)
-                        else:
-                            area_name = s_name
-                            section_name = None
-
-                if area_name not in area_cache:
-                    cur.execute("INSERT INTO areas (area_name) VALUES (?)", (area_name,))
-                    area_cache[area_name] = cur.lastrowid
-                area_id = area_cache[area_name]
-
-                if section_name is not None:
-                    if section_name not in section_cache:
-                        cur.execute(
-                            "INSERT INTO sections (section_name) VALUES (?)",
-                            (section_name,),
-                        )
-                        section_cache[section_name] = cur.lastrowid
-                    section_id = section_cache[section_name]
-                else:
-                    section_id = None
+        ZIP archives in ``csv_paths`` are read member by member without
+        extraction.
+
+        Rows with malformed ``PREF``/``CITY``/``S_AREA`` codes are left out
+        and collected in :attr:`rejects`. Once more than ``max_errors`` rows
+        are rejected, :class:`~dbf_utils.validation.TooManyRejects` (a
+        ``ValueError``) is raised and nothing is written; with the default of
+        0 the first bad row aborts the import. Otherwise the rejects are
+        stored in the ``import_rejects`` table and, if ``rejects_path`` is
+        set, written to that CSV file (appended to by later imports with the
+        same importer).
+
+        When the importer has ``checkpoint_every`` set, files are imported
+        one at a time and committed every ``checkpoint_every`` rows, with
+        progress kept in ``import_progress`` and memory bounded by that
+        chunk size; files finished before a rejected budget is exceeded stay
+        imported. With ``resume``, finished files are skipped and a partly
+        imported file continues after its last checkpoint, with caches
+        rebuilt from the database.
+
+        Returns a tuple of (records_read, records_inserted)."""
+
+        self.rejects = RejectCollector(self.max_errors)
+        paths = expand_inputs(csv_paths, (".csv", ".dbf"))
+        conn = self.db.conn
 
-                sub_key = (s_area_code, city_id, pref_id)
-                if sub_key not in sub_area_cache:
-                    cur.execute(
-                        "INSERT INTO sub_areas (s_area_code, area_id, section_id, city_id, prefecture_id) VALUES (?, ?, ?, ?, ?)",
-                        (s_area_code, area_id, section_id, city_id, pref_id),
-                    )
-                    sub_area_cache[sub_key] = 1
-                    inserted += 1
+        if self.checkpoint_every is None:
+            attempted, records = self._read(paths)
+            self._create_schema(conn)
+            inserted = self._write(records)
+        else:
+            self._create_schema(conn)
+            progress = ImportProgress(conn, "r2ka")
+            attempted = inserted = 0
+            for path in paths:
+                done, completed = progress.get(path) if resume else (0, False)
+                if completed:
+                    continue
+                read, written = self._write_checkpointed(path, progress, skip=done)
+                attempted += read
+                inserted += written
 
         conn.commit()
+        self.rejects.write_table(conn)
+        if self.rejects and self.rejects_path is not None:
+            # Later imports by the same importer add to the file.
+            self.rejects.write_csv(self.rejects_path, append=self._rejects_written)
+            self._rejects_written = True
 
         return attempted, inserted
 
+    def import_shapefile(
+        self, path: str, tolerance: float = DEFAULT_TOLERANCE
+    ) -> tuple[int, int]:
+        """Import an R2KA shapefile with its attribute DBF.
+
+        ``path`` may name the ``.shp`` or the ``.dbf``. Attributes are
+        imported as by :meth:`import_csvs`, then every polygon is simplified
+        with ``tolerance`` and stored in ``sub_area_polygons`` with an
+        R*Tree index.
+
+        Returns a tuple of (records_inserted, polygons_inserted).
+        """
+        base = Path(path).with_suffix("")
+        dbf_path = str(base.with_suffix(".dbf"))
+        shp_path = str(base.with_suffix(".shp"))
+
+        _, inserted = self.import_csvs([dbf_path])
+        conn = self.db.conn
+        create_polygon_tables(conn, "sub_area_polygons", "sub_area_id")
+        cur = conn.cursor()
+        cur.execute(
+            "SELECT prefecture_code, city_code, s_area_code, sub_area_id FROM codes_view"
+        )
+        codes: Dict[Tuple[int, int, int], int] = {
+            (p, c, s): sid for p, c, s, sid in cur.fetchall()
+        }
+
+        polygons = 0
+        replaced: set = set()
+        for rec, shape in iter_shape_records(shp_path, dbf_path, self.encoding):
+            try:
+                key = (
+                    self._parse_numeric_code(rec["PREF"], 2),
+                    self._parse_numeric_code(rec["CITY"], 3),
+                    self._parse_numeric_code(rec["S_AREA"], 6),
+                )
+            except ValueError:
+                continue
+            sub_area_id = codes.get(key)
+            if sub_area_id is None or not shape.parts:
+                continue
+            if sub_area_id not in replaced:
+                # Polygons from an earlier import of the sub-area are replaced.
+                delete_polygons(conn, "sub_area_polygons", "sub_area_id", sub_area_id)
+                replaced.add(sub_area_id)
+            rings = [simplify_ring(part, tolerance) for part in shape.parts]
+            insert_polygon(conn, "sub_area_polygons", "sub_area_id", sub_area_id, rings)
+            polygons += 1
+        conn.commit()
+        return inserted, polygons
+
 
 __all__ = ["R2KAImporter"]
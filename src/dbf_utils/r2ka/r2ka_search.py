@@ -0,0 +1,164 @@
+from __future__ import annotations
+
+import unicodedata
+from array import array
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+from ..database import Database
+
+
+def normalize_name(text: str) -> str:
+    """Normalize a name for searching.
+
+    Applies NFKC, folds katakana to hiragana and removes whitespace so that
+    full-width/half-width and kana variants compare equal.
+    """
+    text = unicodedata.normalize("NFKC", text)
+    chars = []
+    for ch in text:
+        code = ord(ch)
+        if 0x30A1 <= code <= 0x30F6:
+            ch = chr(code - 0x60)
+        elif ch.isspace():
+            continue
+        chars.append(ch)
+    return "".join(chars)
+
+
+class NameMatch(NamedTuple):
+    """A single search hit."""
+
+    kind: str
+    id: int
+    name: str
+    score: int
+
+
+# score values, lower is better
+EXACT = 0
+PREFIX = 1
+SUBSTRING = 2
+
+
+class NameIndex:
+    """In-memory name search over prefectures, cities and sub-areas.
+
+    Names are loaded once and indexed by their first one and two characters
+    (prefix search) and by characters and character bigrams (substring
+    search). Every posting list is ordered shortest name first, which is
+    the ranking order within a score, so a search stops after ``limit``
+    hits instead of ranking every candidate. Hits are ranked exact, then
+    prefix, then substring match, shorter names first. Sub-area names are
+    the area name followed by the section name and their ids are
+    ``sub_area_id`` values.
+    """
+
+    def __init__(self, db: Database) -> None:
+        conn = db.conn
+        entries: List[Tuple[str, int, str]] = []
+        entries.extend(
+            ("prefecture", pid, name)
+            for pid, name in conn.execute("SELECT prefecture_id, pref_name FROM prefectures")
+        )
+        entries.extend(
+            ("city", cid, name)
+            for cid, name in conn.execute("SELECT city_id, city_name FROM cities")
+        )
+        entries.extend(
+            ("sub_area", sid, name)
+            for sid, name in conn.execute(
+                "SELECT sa.sub_area_id, a.area_name || COALESCE(s.section_name, '') "
+                "FROM sub_areas sa "
+                "JOIN areas a ON sa.area_id = a.area_id "
+                "LEFT JOIN sections s ON sa.section_id = s.section_id"
+            )
+        )
+        self._entries = entries
+        self._norms = [normalize_name(name) for _, _, name in entries]
+
+        prefixes: Dict[str, array] = {}
+        postings: Dict[str, array] = {}
+        for i in sorted(range(len(entries)), key=lambda i: (len(self._norms[i]), i)):
+            norm = self._norms[i]
+            for prefix in {norm[:1], norm[:2]}:
+                if prefix:
+                    prefixes.setdefault(prefix, array("I")).append(i)
+            grams = set(norm)
+            grams.update(norm[j:j + 2] for j in range(len(norm) - 1))
+            for gram in grams:
+                post = postings.get(gram)
+                if post is None:
+                    post = postings[gram] = array("I")
+                post.append(i)
+        self._prefixes = prefixes
+        self._postings = postings
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _substring_candidates(self, key: str) -> Iterable[int]:
+        if len(key) == 1:
+            return self._postings.get(key, ())
+        smallest: Optional[array] = None
+        for j in range(len(key) - 1):
+            post = self._postings.get(key[j:j + 2])
+            if post is None:
+                return ()
+            if smallest is None or len(post) < len(smallest):
+                smallest = post
+        return smallest or ()
+
+    def search(
+        self,
+        query: str,
+        limit: int = 10,
+        prefix_only: bool = False,
+        kinds: Optional[Iterable[str]] = None,
+    ) -> List[NameMatch]:
+        """Return up to ``limit`` ranked matches for ``query``.
+
+        ``kinds`` restricts results to ``"prefecture"``, ``"city"`` or
+        ``"sub_area"`` entries.
+        """
+        key = normalize_name(query)
+        if not key or limit <= 0:
+            return []
+        allowed = set(kinds) if kinds is not None else None
+        entries = self._entries
+        norms = self._norms
+
+        # Exact matches are the shortest prefix matches, so one pass over
+        # the prefix posting yields both in rank order.
+        hits: List[int] = []
+        for i in self._prefixes.get(key[:2], ()):
+            if norms[i].startswith(key) and (allowed is None or entries[i][0] in allowed):
+                hits.append(i)
+                if len(hits) == limit:
+                    break
+        prefix_hits = len(hits)
+        if not prefix_only and prefix_hits < limit:
+            for i in self._substring_candidates(key):
+                norm = norms[i]
+                if (
+                    key in norm
+                    and not norm.startswith(key)
+                    and (allowed is None or entries[i][0] in allowed)
+                ):
+                    hits.append(i)
+                    if len(hits) == limit:
+                        break
+
+        matches = []
+        for n, i in enumerate(hits):
+            if n >= prefix_hits:
+                score = SUBSTRING
+            elif norms[i] == key:
+                score = EXACT
+            else:
+                score = PREFIX
+            kind, ident, name = entries[i]
+            matches.append(NameMatch(kind, ident, name, score))
+        return matches
+
+
+__all__ = ["NameIndex", "NameMatch", "normalize_name"]
@@ -0,0 +1,128 @@
+from __future__ import annotations
+
+import mmap
+from multiprocessing import shared_memory
+from pathlib import Path
+from typing import Any, Optional
+
+from ..database import Database
+from .jis_index import SortedTable, jis_code, pack_lookup_table
+
+
+def _align8(n: int) -> int:
+    return (n + 7) & ~7
+
+
+def build_lookup_tables(db: Database) -> bytes:
+    """Serialize the sub-area and city code to id mappings.
+
+    The result holds two packed lookup tables back to back: ``jis_code`` to
+    ``sub_area_id`` followed by ``pref_code * 1000 + city_code`` to
+    ``city_id``.
+    """
+    sub_areas = pack_lookup_table(
+        db.conn.execute("SELECT jis_code, sub_area_id FROM codes_view")
+    )
+    cities = pack_lookup_table(
+        db.conn.execute("SELECT pref_code * 1000 + city_code, city_id FROM cities")
+    )
+    padding = b"\x00" * (_align8(len(sub_areas)) - len(sub_areas))
+    return sub_areas + padding + cities
+
+
+def _attach_shared_memory(name: str) -> shared_memory.SharedMemory:
+    """Attach to an existing block without registering it for cleanup."""
+    try:
+        return shared_memory.SharedMemory(name=name, track=False)
+    except TypeError:  # Python < 3.13
+        shm = shared_memory.SharedMemory(name=name)
+        from multiprocessing import resource_tracker
+
+        resource_tracker.unregister(shm._name, "shared_memory")  # type: ignore[attr-defined]
+        return shm
+
+
+class SharedLookupTables:
+    """Read-only code to id lookups shared between processes.
+
+    The tables are built once with :meth:`create` (shared memory) or
+    :meth:`save` (file) and other processes map them with :meth:`attach`
+    or :meth:`load`. Lookups are binary searches over the shared buffer and
+    use the same method names as :class:`SubAreaIdSelector` and
+    :class:`CityIdSelector`.
+    """
+
+    def __init__(self, buffer: Any, owner: bool = False) -> None:
+        self._buffer = buffer
+        self._owner = owner
+        if isinstance(buffer, shared_memory.SharedMemory):
+            self._view = buffer.buf
+        else:
+            self._view = memoryview(buffer)
+        self._sub_areas = SortedTable(self._view)
+        self._cities = SortedTable(self._view, _align8(self._sub_areas.end))
+
+    @classmethod
+    def create(cls, db: Database, name: Optional[str] = None) -> "SharedLookupTables":
+        """Build the tables into a new shared memory block."""
+        data = build_lookup_tables(db)
+        shm = shared_memory.SharedMemory(name=name, create=True, size=len(data))
+        shm.buf[:len(data)] = data
+        return cls(shm, owner=True)
+
+    @classmethod
+    def attach(cls, name: str) -> "SharedLookupTables":
+        """Attach to tables created by another process."""
+        return cls(_attach_shared_memory(name))
+
+    @staticmethod
+    def save(db: Database, path: str | Path) -> None:
+        """Write the tables to ``path`` for use with :meth:`load`."""
+        tmp_path = Path(str(path) + ".tmp")
+        with open(tmp_path, "wb") as f:
+            f.write(build_lookup_tables(db))
+        tmp_path.replace(path)
+
+    @classmethod
+    def load(cls, path: str | Path) -> "SharedLookupTables":
+        """Memory-map tables written by :meth:`save`."""
+        with open(path, "rb") as f:
+            return cls(mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ))
+
+    @property
+    def name(self) -> Optional[str]:
+        """Name of the shared memory block, or None when file backed."""
+        if isinstance(self._buffer, shared_memory.SharedMemory):
+            return self._buffer.name
+        return None
+
+    def close(self) -> None:
+        if self._view is None:
+            return
+        self._sub_areas.release()
+        self._cities.release()
+        if isinstance(self._buffer, shared_memory.SharedMemory):
+            self._buffer.close()
+            if self._owner:
+                self._buffer.unlink()
+        else:
+            self._view.release()
+            self._buffer.close()
+        self._view = None
+
+    def __enter__(self) -> "SharedLookupTables":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.close()
+
+    def get_sub_area_id(
+        self, pref_code: int, city_code: int, s_area_code: int
+    ) -> Optional[int]:
+        return self._sub_areas.get(jis_code(pref_code, city_code, s_area_code))
+
+    def get_city_id(self, pref_code: int, city_code: int) -> Optional[int]:
+        return self._cities.get(pref_code * 1000 + city_code)
+
+
+__all__ = ["SharedLookupTables", "build_lookup_tables"]
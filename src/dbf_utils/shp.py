@@ -0,0 +1,117 @@
+from __future__ import annotations
+
+import struct
+from typing import BinaryIO, Dict, Iterable, Iterator, List, NamedTuple, Tuple
+
+from .archive import open_input
+from .dbf import enumerate_dbf
+
+# Shape types with the polygon record layout (Polygon, PolygonZ, PolygonM).
+POLYGON_TYPES = (5, 15, 25)
+
+Point = Tuple[float, float]
+
+
+class ShapeRecord(NamedTuple):
+    """A polygon record from a shapefile.
+
+    ``bbox`` is ``(min_x, min_y, max_x, max_y)`` and ``parts`` holds the
+    rings as lists of ``(x, y)`` points. Null shapes have no parts.
+    """
+
+    record_number: int
+    shape_type: int
+    bbox: Tuple[float, float, float, float]
+    parts: List[List[Point]]
+
+
+def _read_polygon(content: bytes) -> Tuple[Tuple[float, float, float, float], List[List[Point]]]:
+    bbox = struct.unpack_from("<4d", content, 4)
+    num_parts, num_points = struct.unpack_from("<2i", content, 36)
+    starts = list(struct.unpack_from(f"<{num_parts}i", content, 44))
+    offset = 44 + 4 * num_parts
+    coords = struct.unpack_from(f"<{2 * num_points}d", content, offset)
+    starts.append(num_points)
+    parts = [
+        list(zip(coords[2 * s:2 * e:2], coords[2 * s + 1:2 * e:2]))
+        for s, e in zip(starts, starts[1:])
+    ]
+    return bbox, parts
+
+
+def _read_record(f: BinaryIO) -> ShapeRecord | None:
+    header = f.read(8)
+    if len(header) < 8:
+        return None
+    record_number, length = struct.unpack(">2i", header)
+    content = f.read(length * 2)
+    shape_type = struct.unpack_from("<i", content, 0)[0]
+    if shape_type in POLYGON_TYPES:
+        bbox, parts = _read_polygon(content)
+    elif shape_type == 0:
+        bbox, parts = (0.0, 0.0, 0.0, 0.0), []
+    else:
+        raise ValueError(f"Unsupported shape type {shape_type}")
+    return ShapeRecord(record_number, shape_type, bbox, parts)
+
+
+def parse_shp(path: str) -> Iterable[ShapeRecord]:
+    """Yield polygon records from a shapefile (``.shp``) in file order.
+
+    Only null and polygon shapes are supported; Z and M values are ignored.
+    """
+    with open_input(path) as f:
+        header = f.read(100)
+        if struct.unpack(">i", header[:4])[0] != 9994:
+            raise ValueError(f"{path} is not a shapefile")
+        while True:
+            rec = _read_record(f)
+            if rec is None:
+                break
+            yield rec
+
+
+def iter_shape_records(
+    shp_path: str, dbf_path: str, encoding: str = "cp932"
+) -> Iterator[Tuple[Dict[str, str], ShapeRecord]]:
+    """Yield ``(attributes, shape)`` pairs matched by record number.
+
+    Records deleted in the DBF are skipped together with their shape.
+    Raises :class:`ValueError` when the files have different numbers of
+    records or the shape record numbers are out of sequence.
+    """
+    shapes = iter(parse_shp(shp_path))
+    for number, record in enumerate_dbf(dbf_path, encoding):
+        shape = next(shapes, None)
+        if shape is None:
+            raise ValueError(f"{shp_path} has fewer records than {dbf_path}")
+        if shape.record_number != number:
+            raise ValueError(
+                f"{shp_path}: record {shape.record_number} found where {number} was expected"
+            )
+        if record is not None:
+            yield record, shape
+    if next(shapes, None) is not None:
+        raise ValueError(f"{shp_path} has more records than {dbf_path}")
+
+
+def read_shx(path: str) -> List[Tuple[int, int]]:
+    """Return ``(offset, length)`` in bytes of every record in a ``.shx`` file."""
+    with open_input(path) as f:
+        f.seek(100)
+        data = f.read()
+    values = struct.unpack(f">{len(data) // 4}i", data)
+    return [(values[i] * 2, values[i + 1] * 2) for i in range(0, len(values), 2)]
+
+
+def read_shape(shp_path: str, offset: int) -> ShapeRecord:
+    """Read a single record at ``offset`` (as returned by :func:`read_shx`)."""
+    with open_input(shp_path) as f:
+        f.seek(offset)
+        rec = _read_record(f)
+    if rec is None:
+        raise ValueError(f"No record at offset {offset}")
+    return rec
+
+
+__all__ = ["ShapeRecord", "iter_shape_records", "parse_shp", "read_shx", "read_shape"]
@@ -0,0 +1,161 @@
+from __future__ import annotations
+
+import csv
+import sqlite3
+from pathlib import Path
+from typing import Iterable, Iterator, List, Mapping, NamedTuple, Optional, Sequence, Set, Tuple
+
+# (column, value, reason) for each problem found in a row.
+ColumnError = Tuple[str, str, str]
+
+
+class Reject(NamedTuple):
+    """A row left out of an import, with the reason.
+
+    ``row`` counts data rows from 1 in ``source``. Several bad columns of
+    one row are joined with ``,`` in ``column`` and ``value`` and with
+    ``; `` in ``reason``.
+    """
+
+    source: str
+    row: int
+    column: str
+    value: str
+    reason: str
+    record: str
+
+
+class TooManyRejects(ValueError):
+    """Raised when rejected rows exceed the error budget of an import."""
+
+    def __init__(self, rejects: Sequence[Reject], max_errors: int) -> None:
+        first = rejects[0]
+        if max_errors == 0:
+            message = f"Invalid record {first.record}: {first.reason}"
+        else:
+            message = (
+                f"{len(rejects)} rejected rows exceed the error budget of {max_errors}; "
+                f"first at {first.source}:{first.row}: {first.reason}"
+            )
+        super().__init__(message)
+        self.rejects = list(rejects)
+
+
+def check_code_columns(
+    rows: Sequence[Mapping[str, str]], columns: Sequence[Tuple[str, int]]
+) -> List[List[ColumnError]]:
+    """Check zero padded numeric code columns over a batch of rows.
+
+    ``columns`` lists ``(name, digits)``. Each column is checked for the
+    whole batch before moving to the next, and every problem in a row is
+    reported, not only the first. Returns one list of errors per row, empty
+    for valid rows.
+    """
+    errors: List[List[ColumnError]] = [[] for _ in rows]
+    for column, length in columns:
+        values = [row.get(column) for row in rows]
+        for i, value in enumerate(values):
+            if value is None:
+                errors[i].append((column, "", "missing column"))
+                continue
+            trimmed = value.strip()
+            if not trimmed.isdigit() or len(trimmed) != length:
+                errors[i].append(
+                    (column, value, f"Expected {length}-digit numeric code, got {value!r}")
+                )
+    return errors
+
+
+def make_reject(source: str, row: int, errors: Sequence[ColumnError], record: object) -> Reject:
+    """Combine the column errors of one row into a :class:`Reject`."""
+    return Reject(
+        source,
+        row,
+        ",".join(e[0] for e in errors),
+        ",".join(e[1] for e in errors),
+        "; ".join(e[2] for e in errors),
+        str(record),
+    )
+
+
+class RejectCollector:
+    """Collect rejected rows during an import and enforce an error budget.
+
+    ``max_errors`` is the number of rejects tolerated; one more raises
+    :class:`TooManyRejects`. ``None`` accepts any number. ``sources`` holds
+    every source seen by the import, including those without rejects.
+    """
+
+    def __init__(self, max_errors: Optional[int] = 0) -> None:
+        self.max_errors = max_errors
+        self.rejects: List[Reject] = []
+        self.sources: Set[str] = set()
+
+    def __len__(self) -> int:
+        return len(self.rejects)
+
+    def __iter__(self) -> Iterator[Reject]:
+        return iter(self.rejects)
+
+    def add_source(self, source: str) -> None:
+        """Record that ``source`` is being imported, even if it has no rejects."""
+        self.sources.add(source)
+
+    def extend(self, rejects: Iterable[Reject]) -> None:
+        rejects = list(rejects)
+        self.sources.update(r.source for r in rejects)
+        self.rejects.extend(rejects)
+        if self.max_errors is not None and len(self.rejects) > self.max_errors:
+            raise TooManyRejects(self.rejects, self.max_errors)
+
+    def write_table(self, conn: sqlite3.Connection, table: str = "import_rejects") -> None:
+        """Store the rejects in ``table``, creating it if needed.
+
+        Earlier rejects of every source in :attr:`sources` are replaced,
+        so the table keeps the outcome of the latest import of every file
+        and a clean re-import clears the old rows. Without rejects the table
+        is not created.
+        """
+        exists = conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (table,)
+        ).fetchone()
+        if not self.rejects and not exists:
+            return
+        conn.execute(
+            f"""
+            CREATE TABLE IF NOT EXISTS {table} (
+                reject_id INTEGER PRIMARY KEY AUTOINCREMENT,
+                source TEXT NOT NULL,
+                row INTEGER NOT NULL,
+                column_name TEXT NOT NULL,
+                value TEXT,
+                reason TEXT NOT NULL,
+                record TEXT
+            )
+            """
+        )
+        conn.executemany(
+            f"DELETE FROM {table} WHERE source = ?",
+            [(source,) for source in sorted(self.sources)],
+        )
+        conn.executemany(
+            f"INSERT INTO {table} (source, row, column_name, value, reason, record) "
+            "VALUES (?, ?, ?, ?, ?, ?)",
+            self.rejects,
+        )
+        conn.commit()
+
+    def write_csv(self, path: str | Path, append: bool = False) -> None:
+        """Write the rejects to a UTF-8 CSV file with a header row.
+
+        With ``append`` rows are added to an existing file instead.
+        """
+        new = not append or not Path(path).exists()
+        with open(path, "w" if new else "a", encoding="utf-8", newline="") as f:
+            writer = csv.writer(f)
+            if new:
+                writer.writerow(Reject._fields)
+            writer.writerows(self.rejects)
+
+
+__all__ = ["Reject", "RejectCollector", "TooManyRejects", "check_code_columns", "make_reject"]
@@ -0,0 +1,42 @@
+import tempfile
+from pathlib import Path
+import sys
+sys.path.insert(0, str(Path(__file__).resolve().parents[2] / 'src'))
+
+from dbf_utils.database import Database
+from dbf_utils.r2ka import (
+    R2KAImporter,
+    SubAreaIdSelector,
+    AddressResolver,
+    normalize_address,
+)
+from dbf_utils.r2ka.r2ka_address import kanji_numeral
+
+
+def test_normalize_address():
+    assert [kanji_numeral(n) for n in (1, 10, 12, 20, 35)] == ['一', '十', '十二', '二十', '三十五']
+    assert normalize_address('三橋 ５丁目') == '三橋五丁目'
+
+
+def test_address_resolver():
+    dbf_path = Path('dev/r2ka11.dbf')
+    with tempfile.TemporaryDirectory() as tmpdir:
+        db_path = Path(tmpdir) / 'out.db'
+        with Database(db_path) as db:
+            R2KAImporter(db, encoding="cp932").import_csvs([str(dbf_path)])
+            expected = SubAreaIdSelector(db).get_sub_area_id(11, 101, 2005)
+            resolver = AddressResolver(db)
+
+            assert resolver.resolve('埼玉県さいたま市西区三橋五丁目') == expected
+            assert resolver.resolve('埼玉県さいたま市西区三橋5丁目12-3') == expected
+            assert resolver.resolve('さいたま市西区三橋五丁目') == expected
+
+            m = resolver.match('埼玉県さいたま市西区三橋五丁目1番地')
+            assert m.pref_code == 11
+            assert m.sub_area_id == expected
+            assert m.rest == '1番地'
+
+            m = resolver.match('埼玉県存在しない市')
+            assert m.pref_code == 11 and m.city_id is None
+
+            assert resolver.resolve_many(['埼玉県さいたま市西区三橋５丁目', '東京都']) == [expected, None]
@@ -11,6 +11,7 @@ from dbf_utils.r2ka import (
     SubAreaIdSelector,
     SubAreaReader,
     CodesViewReader,
+    SubAreaResolver,
 )
 
 
@@ -103,3 +104,52 @@ def test_codes_view_reader():
             for r in rows:
                 expect = ((r['prefecture_code'] * 1000 + r['city_code']) * 1000000 + r['s_area_code'])
                 assert r['jis_code'] == expect
+
+
+def test_sub_area_resolver():
+    dbf_path = Path('dev/r2ka11.dbf')
+    with tempfile.TemporaryDirectory() as tmpdir:
+        db_path = Path(tmpdir) / 'out.db'
+        with Database(db_path) as db:
+            importer = R2KAImporter(db, encoding="cp932")
+            importer.import_csvs([str(dbf_path)])
+
+            resolver = SubAreaResolver(db)
+            sub_id = SubAreaIdSelector(db).get_sub_area_id(11, 101, 2005)
+            rec = resolver.resolve(sub_id)
+            assert rec is not None
+            assert rec.pref_name == '埼玉県'
+            assert rec.city_name == 'さいたま市西区'
+            assert rec.area_name + (rec.section_name or '') == '三橋五丁目'
+            assert rec.jis_code == 11101002005
+
+            rows = CodesViewReader(db).fetch_all()
+            ids = [r['sub_area_id'] for r in rows] + [0, 10 ** 9]
+            records = resolver.resolve_many(ids)
+            assert [r.jis_code for r in records[:-2]] == [r['jis_code'] for r in rows]
+            assert records[-2:] == [None, None]
+
+            city_id = CityIdSelector(db).get_city_id(11, 101)
+            city = resolver.resolve_city(city_id)
+            assert city.city_name == 'さいたま市西区'
+            assert resolver.resolve_cities([city_id, -1]) == [city, None]
+
+
+def test_batch_selectors():
+    dbf_path = Path('dev/r2ka11.dbf')
+    with tempfile.TemporaryDirectory() as tmpdir:
+        db_path = Path(tmpdir) / 'out.db'
+        with Database(db_path) as db:
+            importer = R2KAImporter(db, encoding="cp932")
+            importer.import_csvs([str(dbf_path)])
+
+            rows = CodesViewReader(db).fetch_all()
+            keys = [(r['prefecture_code'], r['city_code'], r['s_area_code']) for r in rows]
+            keys.append((99, 999, 999999))
+            ids = SubAreaIdSelector(db).get_sub_area_ids(keys)
+            assert ids == [r['sub_area_id'] for r in rows] + [None]
+
+            single = CityIdSelector(db)
+            batch = CityIdSelector(db)
+            city_keys = sorted({(p, c) for p, c, _ in keys})
+            assert batch.get_city_ids(city_keys) == [single.get_city_id(*k) for k in city_keys]
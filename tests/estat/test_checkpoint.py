@@ -0,0 +1,117 @@
+from pathlib import Path
+import sys
+sys.path.insert(0, str(Path(__file__).resolve().parents[2] / 'src'))
+
+import pytest
+
+from dbf_utils import CombinedImporter
+from dbf_utils.checkpoint import ImportProgress
+from dbf_utils.database import Database
+from dbf_utils.gis_map import GISMapImporter
+from dbf_utils.r2ka import R2KAImporter
+
+R2KA_DBF = 'dev/r2ka11.dbf'
+GIS_DBF = 'dev/N03-20240101_01.dbf'
+CODES = 'SELECT prefecture_code, city_code, s_area_code, jis_code FROM codes_view ORDER BY jis_code'
+NAMES = (
+    'SELECT sa.s_area_code, a.area_name, s.section_name FROM sub_areas sa '
+    'JOIN areas a ON sa.area_id = a.area_id LEFT JOIN sections s ON sa.section_id = s.section_id '
+    'ORDER BY sa.city_id, sa.s_area_code'
+)
+
+
+class Killed(Exception):
+    pass
+
+
+def _kill_after(monkeypatch, calls):
+    original = ImportProgress.checkpoint
+    state = {'calls': 0}
+
+    def checkpoint(self, source, records_done, completed=False):
+        original(self, source, records_done, completed)
+        state['calls'] += 1
+        if state['calls'] == calls:
+            raise Killed()
+
+    monkeypatch.setattr(ImportProgress, 'checkpoint', checkpoint)
+
+
+def test_r2ka_resume(tmp_path, monkeypatch):
+    with Database(tmp_path / 'full.db') as db:
+        expected_counts = R2KAImporter(db).import_csvs([R2KA_DBF])
+        expected = db.conn.execute(CODES).fetchall()
+        names = db.conn.execute(NAMES).fetchall()
+
+    db_path = tmp_path / 'resumed.db'
+    _kill_after(monkeypatch, 3)
+    with Database(db_path) as db:
+        with pytest.raises(Killed):
+            R2KAImporter(db, checkpoint_every=500).import_csvs([R2KA_DBF])
+    monkeypatch.undo()
+
+    with Database(db_path) as db:
+        done, completed = ImportProgress(db.conn, 'r2ka').get(R2KA_DBF)
+        assert (done, completed) == (1500, False)
+        written = db.conn.execute('SELECT COUNT(*) FROM sub_areas').fetchone()[0]
+        assert 0 < written <= 1500
+
+        importer = R2KAImporter(db, checkpoint_every=500)
+        # checkpointed imports stream the file instead of reading it whole
+        monkeypatch.setattr(R2KAImporter, '_read', None)
+        attempted, inserted = importer.import_csvs([R2KA_DBF], resume=True)
+        monkeypatch.undo()
+        assert attempted == expected_counts[0] - 1500
+        assert inserted == expected_counts[1] - written
+        assert db.conn.execute(CODES).fetchall() == expected
+        assert db.conn.execute(NAMES).fetchall() == names
+        assert ImportProgress(db.conn, 'r2ka').get(R2KA_DBF) == (expected_counts[0], True)
+        # finished files are skipped
+        assert importer.import_csvs([R2KA_DBF], resume=True) == (0, 0)
+
+
+def test_gis_resume(tmp_path, monkeypatch):
+    query = 'SELECT pref_code, city_code, city_name FROM cities ORDER BY pref_code, city_code'
+    with Database(tmp_path / 'full.db') as db:
+        GISMapImporter(db).import_dbf(GIS_DBF)
+        expected = db.conn.execute(query).fetchall()
+
+    db_path = tmp_path / 'resumed.db'
+    _kill_after(monkeypatch, 1)
+    with Database(db_path) as db:
+        with pytest.raises(Killed):
+            GISMapImporter(db, checkpoint_every=50).import_dbf(GIS_DBF)
+    monkeypatch.undo()
+
+    with Database(db_path) as db:
+        done, completed = ImportProgress(db.conn, 'gis').get(GIS_DBF)
+        assert done > 0 and not completed
+        importer = GISMapImporter(db, checkpoint_every=50)
+        attempted, _ = importer.import_dbf(GIS_DBF, resume=True)
+        assert db.conn.execute(query).fetchall() == expected
+        assert ImportProgress(db.conn, 'gis').get(GIS_DBF) == (done + attempted, True)
+        assert importer.import_dbf(GIS_DBF, resume=True) == (0, 0)
+
+
+def test_combined_resume(tmp_path, monkeypatch):
+    query = 'SELECT pref_code, city_code, city_name FROM cities ORDER BY pref_code, city_code'
+    with Database(tmp_path / 'full.db') as db:
+        CombinedImporter(db).import_files([R2KA_DBF], [GIS_DBF])
+        expected = db.conn.execute(CODES).fetchall(), db.conn.execute(query).fetchall()
+
+    db_path = tmp_path / 'resumed.db'
+    # 129 R2KA checkpoints (6407 records), then the first GIS checkpoint
+    _kill_after(monkeypatch, 130)
+    with Database(db_path) as db:
+        with pytest.raises(Killed):
+            CombinedImporter(db, checkpoint_every=50).import_files([R2KA_DBF], [GIS_DBF])
+    monkeypatch.undo()
+
+    with Database(db_path) as db:
+        assert ImportProgress(db.conn, 'r2ka').get(R2KA_DBF)[1]
+        assert ImportProgress(db.conn, 'gis').get(GIS_DBF)[0] > 0
+        result = CombinedImporter(db, checkpoint_every=50).import_files(
+            [R2KA_DBF], [GIS_DBF], resume=True
+        )
+        assert result.r2ka_records == 0
+        assert (db.conn.execute(CODES).fetchall(), db.conn.execute(query).fetchall()) == expected
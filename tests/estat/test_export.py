@@ -0,0 +1,33 @@
+import csv
+import gzip
+import tempfile
+from pathlib import Path
+import sys
+sys.path.insert(0, str(Path(__file__).resolve().parents[2] / 'src'))
+
+from dbf_utils.database import Database
+from dbf_utils.r2ka import R2KAImporter, CodesViewReader, export_jis_mapping
+
+
+def test_export_jis_mapping_plain_and_gzip():
+    dbf_path = Path('dev/r2ka11.dbf')
+    with tempfile.TemporaryDirectory() as tmpdir:
+        db_path = Path(tmpdir) / 'out.db'
+        with Database(db_path) as db:
+            R2KAImporter(db, encoding="cp932").import_csvs([str(dbf_path)])
+            expected = [
+                [f"{r['prefecture_code']:02d}{r['city_code']:03d}{r['s_area_code']:06d}", str(r['sub_area_id'])]
+                for r in CodesViewReader(db).fetch_all()
+            ]
+
+            csv_path = Path(tmpdir) / 'map.csv'
+            written = export_jis_mapping(db, csv_path, chunk_size=100)
+            gz_path = Path(tmpdir) / 'map.csv.gz'
+            export_jis_mapping(db, gz_path, chunk_size=100)
+
+        assert written == len(expected)
+        with open(csv_path, newline='') as f:
+            assert list(csv.reader(f)) == expected
+        with gzip.open(gz_path, 'rt', newline='') as f:
+            assert list(csv.reader(f)) == expected
+        assert all(len(row[0]) == 11 for row in expected)
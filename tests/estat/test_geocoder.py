@@ -0,0 +1,82 @@
+import shutil
+import tempfile
+from pathlib import Path
+import sys
+sys.path.insert(0, str(Path(__file__).resolve().parents[2] / 'src'))
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+import pytest
+
+from dbf_utils.database import Database
+from dbf_utils.dbf import parse_dbf
+from dbf_utils.r2ka import R2KAImporter, SubAreaIdSelector, SubAreaLocator
+from sample_files import delete_dbf_record, square, write_polygon_shp
+
+
+def test_sub_area_locator():
+    with tempfile.TemporaryDirectory() as tmpdir:
+        dbf_path = Path(tmpdir) / 'r2ka.dbf'
+        shutil.copy('dev/r2ka11.dbf', dbf_path)
+        records = list(parse_dbf(str(dbf_path)))
+        # one 0.001 degree square per record on a 100 x N grid
+        polygons = [
+            [square(139 + (i % 100) * 0.001, 35 + (i // 100) * 0.001, 0.0009)]
+            for i in range(len(records))
+        ]
+        write_polygon_shp(Path(tmpdir) / 'r2ka.shp', polygons)
+
+        db_path = Path(tmpdir) / 'out.db'
+        with Database(db_path) as db:
+            inserted, polygon_count = R2KAImporter(db).import_shapefile(str(dbf_path))
+            assert inserted > 0
+            assert polygon_count == len(records)
+
+            selector = SubAreaIdSelector(db)
+            locator = SubAreaLocator(db)
+            points = []
+            expected = []
+            for i in range(0, len(records), 97):
+                rec = records[i]
+                points.append((35 + (i // 100) * 0.001 + 0.0004, 139 + (i % 100) * 0.001 + 0.0004))
+                expected.append(
+                    selector.get_sub_area_id(int(rec['PREF']), int(rec['CITY']), int(rec['S_AREA']))
+                )
+            assert [locator.locate(lat, lon) for lat, lon in points] == expected
+            assert locator.locate_many(points + [(0.0, 0.0)]) == expected + [None]
+            assert locator.locate_many(points, vectorize=False) == expected
+
+            # dense batches: the NumPy path answers exactly like the scalar loop
+            np = pytest.importorskip('numpy')
+            rng = np.random.default_rng(1)
+            dense = list(zip(rng.uniform(34.99, 35.07, 5000), rng.uniform(138.99, 139.11, 5000)))
+            scalar = locator.locate_many(dense, vectorize=False)
+            assert locator.locate_many(dense, vectorize=True) == scalar
+            assert sum(r is not None for r in scalar) > 1000
+
+
+def test_shapefile_deleted_record_reimport_and_cache():
+    with tempfile.TemporaryDirectory() as tmpdir:
+        dbf_path = Path(tmpdir) / 'r2ka.dbf'
+        shutil.copy('dev/r2ka11.dbf', dbf_path)
+        records = list(parse_dbf(str(dbf_path)))
+        delete_dbf_record(dbf_path, 0)
+        polygons = [[square(139 + i * 0.001, 35, 0.0009)] for i in range(len(records))]
+        write_polygon_shp(Path(tmpdir) / 'r2ka.shp', polygons)
+
+        with Database(Path(tmpdir) / 'out.db') as db:
+            importer = R2KAImporter(db)
+            assert importer.import_shapefile(str(dbf_path))[1] == len(records) - 1
+            assert importer.import_shapefile(str(dbf_path))[1] == len(records) - 1
+            count = db.conn.execute('SELECT COUNT(*) FROM sub_area_polygons').fetchone()[0]
+            assert count == len(records) - 1
+            assert db.conn.execute('SELECT COUNT(*) FROM sub_area_polygons_rtree').fetchone()[0] == count
+
+            selector = SubAreaIdSelector(db)
+            locator = SubAreaLocator(db, cache_size=2)
+            points = [(35.0004, 139 + i * 0.001 + 0.0004) for i in range(1, 6)]
+            expected = [
+                selector.get_sub_area_id(int(r['PREF']), int(r['CITY']), int(r['S_AREA']))
+                for r in records[1:6]
+            ]
+            assert locator.locate_many(points) == expected
+            assert len(locator._locator._cache) == 2
@@ -0,0 +1,56 @@
+import tempfile
+from pathlib import Path
+import sys
+sys.path.insert(0, str(Path(__file__).resolve().parents[2] / 'src'))
+
+import pytest
+
+from dbf_utils.database import Database
+from dbf_utils.r2ka import (
+    R2KAImporter,
+    CodesViewReader,
+    JisCodeIndex,
+    export_jis_index,
+)
+
+
+def test_jis_index_matches_codes_view():
+    dbf_path = Path('dev/r2ka11.dbf')
+    with tempfile.TemporaryDirectory() as tmpdir:
+        db_path = Path(tmpdir) / 'out.db'
+        index_path = Path(tmpdir) / 'codes.idx'
+        with Database(db_path) as db:
+            R2KAImporter(db, encoding="cp932").import_csvs([str(dbf_path)])
+            rows = CodesViewReader(db).fetch_all()
+            count = export_jis_index(db, index_path)
+
+        assert count == len(rows)
+        with JisCodeIndex(index_path) as index:
+            assert len(index) == count
+            for r in rows:
+                assert index.get_by_jis_code(r['jis_code']) == r['sub_area_id']
+            first = rows[0]
+            assert index.get_sub_area_id(
+                first['prefecture_code'], first['city_code'], first['s_area_code']
+            ) == first['sub_area_id']
+            assert index.get_sub_area_id(99, 999, 999999) is None
+            assert index.get_by_jis_code(0) is None
+
+
+def test_jis_index_rejects_truncated_file():
+    dbf_path = Path('dev/r2ka11.dbf')
+    with tempfile.TemporaryDirectory() as tmpdir:
+        db_path = Path(tmpdir) / 'out.db'
+        index_path = Path(tmpdir) / 'codes.idx'
+        with Database(db_path) as db:
+            R2KAImporter(db, encoding="cp932").import_csvs([str(dbf_path)])
+            export_jis_index(db, index_path)
+
+        data = index_path.read_bytes()
+        index_path.write_bytes(data[:-4])
+        with pytest.raises(ValueError, match="Truncated lookup table"):
+            JisCodeIndex(index_path)
+
+        index_path.write_bytes(data[:10])
+        with pytest.raises(ValueError, match="Truncated lookup table"):
+            JisCodeIndex(index_path)
@@ -0,0 +1,171 @@
+import http.client
+import json
+import shutil
+import socket
+import tempfile
+import threading
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+import sys
+sys.path.insert(0, str(Path(__file__).resolve().parents[2] / 'src'))
+
+import pytest
+
+from dbf_utils.database import Database
+from dbf_utils.r2ka import R2KAImporter, CityIdSelector, SubAreaIdSelector, LookupServer
+
+
+def _get(base, path):
+    with urllib.request.urlopen(base + path, timeout=10) as resp:
+        return json.loads(resp.read())
+
+
+def _post(base, path, body):
+    req = urllib.request.Request(
+        base + path, data=json.dumps(body).encode(), headers={'Content-Type': 'application/json'}
+    )
+    with urllib.request.urlopen(req, timeout=10) as resp:
+        return json.loads(resp.read())
+
+
+def test_lookup_server():
+    dbf_path = Path('dev/r2ka11.dbf')
+    with tempfile.TemporaryDirectory() as tmpdir:
+        db_path = Path(tmpdir) / 'out.db'
+        with Database(db_path) as db:
+            R2KAImporter(db, encoding="cp932").import_csvs([str(dbf_path)])
+            sub_id = SubAreaIdSelector(db).get_sub_area_id(11, 101, 2005)
+            city_id = CityIdSelector(db).get_city_id(11, 101)
+
+        server = LookupServer(db_path, port=0)
+        server.start()
+        try:
+            base = 'http://%s:%d' % server.server_address[:2]
+            assert _get(base, '/sub_area?jis_code=11101002005') == {'sub_area_id': sub_id}
+            assert _get(base, '/sub_area?pref=11&city=101&s_area=2005') == {'sub_area_id': sub_id}
+            assert _get(base, '/city?pref=11&city=101') == {'city_id': city_id}
+
+            body = {'jis_codes': [11101002005, 99999999999], 'codes': [[11, 101, 2005]]}
+            assert _post(base, '/sub_area', body) == {'sub_area_ids': [sub_id, sub_id, None]}
+
+            with ThreadPoolExecutor(8) as pool:
+                results = list(pool.map(
+                    lambda _: _get(base, '/sub_area?jis_code=11101002005'), range(32)
+                ))
+            assert all(r == {'sub_area_id': sub_id} for r in results)
+
+            try:
+                _get(base, '/sub_area?pref=x')
+            except urllib.error.HTTPError as e:
+                assert e.code == 400
+            else:
+                raise AssertionError('expected HTTP 400')
+
+            metrics = _get(base, '/metrics')
+            assert metrics['latency']['sub_area']['count'] >= 35
+            assert metrics['lookup']['batches'] >= 1
+            assert metrics['lookup']['cache_hits'] > 0
+        finally:
+            server.stop()
+
+
+def _status(base, path, body=None):
+    try:
+        if body is None:
+            _get(base, path)
+        else:
+            _post(base, path, body)
+    except urllib.error.HTTPError as e:
+        return e.code
+    return 200
+
+
+def test_lookup_server_errors(tmp_path):
+    db_path = tmp_path / 'out.db'
+    with Database(db_path) as db:
+        R2KAImporter(db, encoding="cp932").import_csvs(['dev/r2ka11.dbf'])
+        city_id = CityIdSelector(db).get_city_id(11, 101)
+
+    server = LookupServer(db_path, port=0)
+    server.start()
+    try:
+        base = 'http://%s:%d' % server.server_address[:2]
+        assert _status(base, '/city', [[11, 101]]) == 400
+
+        # A damaged replacement fails one batch; the old file keeps serving.
+        broken = tmp_path / 'broken.db'
+        broken.write_bytes(b'not a database' * 100)
+        good = tmp_path / 'good.db'
+        db_path.rename(good)
+        broken.rename(db_path)
+        assert _status(base, '/city?pref=11&city=101') == 503
+        assert _get(base, '/city?pref=11&city=101') == {'city_id': city_id}
+        assert server.lookup.stats()['reloads'] == 0
+
+        shutil.copy(good, tmp_path / 'copy.db')
+        (tmp_path / 'copy.db').rename(db_path)
+        assert _get(base, '/city?pref=11&city=101') == {'city_id': city_id}
+        assert server.lookup.stats()['reloads'] == 1
+
+        # A lookup that does not finish in time is answered with 503.
+        server.lookup_timeout = 0.05
+        resolve = server.lookup._resolve
+        server.lookup._resolve = lambda items, selectors: (time.sleep(0.5), resolve(items, selectors))
+        assert _status(base, '/city?pref=11&city=101') == 503
+    finally:
+        server.stop()
+
+
+def _raw_post(base, path, headers):
+    conn = http.client.HTTPConnection(*base[len('http://'):].split(':'), timeout=10)
+    try:
+        conn.putrequest('POST', path)
+        for name, value in headers.items():
+            conn.putheader(name, value)
+        conn.endheaders()
+        return conn.getresponse().status
+    finally:
+        conn.close()
+
+
+def test_lookup_server_limits(tmp_path):
+    db_path = tmp_path / 'out.db'
+    with Database(db_path) as db:
+        R2KAImporter(db, encoding="cp932").import_csvs(['dev/r2ka11.dbf'])
+        sub_id = SubAreaIdSelector(db, cache_limit=2).get_sub_area_ids([(11, 101, 2005)] * 3)[0]
+
+    server = LookupServer(db_path, port=0, cache_limit=10)
+    server.start()
+    try:
+        base = 'http://%s:%d' % server.server_address[:2]
+        codes = [11101000000 + i for i in range(50)] + [11101002005]
+        assert _post(base, '/sub_area', {'jis_codes': codes})['sub_area_ids'][-1] == sub_id
+        lookup = _get(base, '/metrics')['lookup']
+        assert lookup['cache_limit'] == 10
+        assert lookup['cache_entries']['sub_area'] == 10
+
+        assert _raw_post(base, '/city', {'Content-Length': '-1'}) == 400
+        assert _raw_post(base, '/city', {}) == 411
+    finally:
+        server.stop()
+
+    # A port that is already taken fails before the database is opened,
+    # and a database that cannot be opened releases the port.
+    workers = sum(t.name == 'lookup-worker' for t in threading.enumerate())
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        sock.listen()
+        with pytest.raises(OSError):
+            LookupServer(db_path, port=sock.getsockname()[1])
+    assert sum(t.name == 'lookup-worker' for t in threading.enumerate()) == workers
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        port = sock.getsockname()[1]
+    with pytest.raises(Exception):
+        LookupServer(tmp_path / 'missing' / 'out.db', port=port)
+    server = LookupServer(db_path, port=port)
+    server.server_close()
+    server.lookup.close()
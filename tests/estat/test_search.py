@@ -0,0 +1,60 @@
+import tempfile
+from pathlib import Path
+import sys
+sys.path.insert(0, str(Path(__file__).resolve().parents[2] / 'src'))
+
+from dbf_utils.database import Database
+from dbf_utils.r2ka import R2KAImporter, NameIndex, normalize_name
+
+
+def test_normalize_name():
+    assert normalize_name('ミハシ　５') == 'みはし5'
+
+
+def test_name_index_search():
+    dbf_path = Path('dev/r2ka11.dbf')
+    with tempfile.TemporaryDirectory() as tmpdir:
+        db_path = Path(tmpdir) / 'out.db'
+        with Database(db_path) as db:
+            R2KAImporter(db, encoding="cp932").import_csvs([str(dbf_path)])
+            index = NameIndex(db)
+
+            hits = index.search('三橋五丁目')
+            assert hits and hits[0].name == '三橋五丁目'
+            assert hits[0].kind == 'sub_area'
+            assert hits[0].score == 0
+
+            hits = index.search('三橋', limit=50, prefix_only=True)
+            assert hits and all(h.name.startswith('三橋') for h in hits)
+
+            hits = index.search('西区', kinds=['city'])
+            assert any(h.name == 'さいたま市西区' for h in hits)
+            assert all(h.kind == 'city' for h in hits)
+            scores = [h.score for h in hits]
+            assert scores == sorted(scores)
+
+            assert index.search('存在しない地名') == []
+
+
+def test_name_index_matches_full_ranking():
+    with tempfile.TemporaryDirectory() as tmpdir:
+        with Database(Path(tmpdir) / 'out.db') as db:
+            R2KAImporter(db, encoding="cp932").import_csvs(['dev/r2ka11.dbf'])
+            index = NameIndex(db)
+            entries = index._entries
+            norms = [normalize_name(name) for _, _, name in entries]
+
+            def ranked(key, limit, kinds=None):
+                found = []
+                for i, norm in enumerate(norms):
+                    if key in norm and (kinds is None or entries[i][0] in kinds):
+                        score = 0 if norm == key else 1 if norm.startswith(key) else 2
+                        found.append((score, len(norm), i))
+                return [(entries[i][1], score) for score, _, i in sorted(found)[:limit]]
+
+            for query in ('町', '大', '大字', '丁目', '西区', 'さいたま市'):
+                for limit in (1, 10, 100):
+                    hits = index.search(query, limit=limit)
+                    assert [(h.id, h.score) for h in hits] == ranked(query, limit), (query, limit)
+            hits = index.search('区', limit=5, kinds=['city'])
+            assert [(h.id, h.score) for h in hits] == ranked('区', 5, {'city'})
@@ -0,0 +1,49 @@
+import multiprocessing
+import tempfile
+from pathlib import Path
+import sys
+sys.path.insert(0, str(Path(__file__).resolve().parents[2] / 'src'))
+
+from dbf_utils.database import Database
+from dbf_utils.r2ka import (
+    R2KAImporter,
+    CityIdSelector,
+    SubAreaIdSelector,
+    SharedLookupTables,
+)
+
+
+def _lookup_in_child(name, queue):
+    with SharedLookupTables.attach(name) as tables:
+        queue.put((tables.get_sub_area_id(11, 101, 2005), tables.get_city_id(11, 101)))
+
+
+def test_shared_lookup_tables():
+    dbf_path = Path('dev/r2ka11.dbf')
+    with tempfile.TemporaryDirectory() as tmpdir:
+        db_path = Path(tmpdir) / 'out.db'
+        with Database(db_path) as db:
+            R2KAImporter(db, encoding="cp932").import_csvs([str(dbf_path)])
+            sub_id = SubAreaIdSelector(db).get_sub_area_id(11, 101, 2005)
+            city_id = CityIdSelector(db).get_city_id(11, 101)
+
+            with SharedLookupTables.create(db) as tables:
+                assert tables.get_sub_area_id(11, 101, 2005) == sub_id
+                assert tables.get_city_id(11, 101) == city_id
+                assert tables.get_sub_area_id(99, 999, 999999) is None
+                assert tables.get_city_id(99, 999) is None
+
+                ctx = multiprocessing.get_context('spawn')
+                queue = ctx.Queue()
+                proc = ctx.Process(target=_lookup_in_child, args=(tables.name, queue))
+                proc.start()
+                result = queue.get(timeout=30)
+                proc.join()
+                assert result == (sub_id, city_id)
+
+            file_path = Path(tmpdir) / 'lookup.bin'
+            SharedLookupTables.save(db, file_path)
+        with SharedLookupTables.load(file_path) as tables:
+            assert tables.name is None
+            assert tables.get_sub_area_id(11, 101, 2005) == sub_id
+            assert tables.get_city_id(11, 101) == city_id
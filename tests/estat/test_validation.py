@@ -0,0 +1,99 @@
+import csv
+import tempfile
+from pathlib import Path
+import sys
+sys.path.insert(0, str(Path(__file__).resolve().parents[2] / 'src'))
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+import pytest
+
+from dbf_utils.database import Database
+from dbf_utils.gis_map import GISMapImporter
+from dbf_utils.r2ka import R2KAImporter
+from dbf_utils.validation import TooManyRejects
+from sample_files import N03_FIELDS, write_dbf
+
+HEADER = ['PREF', 'CITY', 'S_AREA', 'PREF_NAME', 'CITY_NAME', 'S_NAME']
+ROWS = [
+    ['11', '101', '002005', '埼玉県', 'さいたま市西区', '宮前町'],
+    ['1x', '101', '002006', '埼玉県', 'さいたま市西区', '不正'],
+    ['11', '101', '002001', '埼玉県', 'さいたま市西区', '三橋一丁目'],
+    ['11', '10', '2', '埼玉県', 'さいたま市西区', '不正'],
+]
+
+
+def _write_csv(path):
+    with open(path, 'w', encoding='cp932', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(HEADER)
+        writer.writerows(ROWS)
+
+
+def test_r2ka_rejects_within_budget():
+    with tempfile.TemporaryDirectory() as tmpdir:
+        csv_path = Path(tmpdir) / 'r2ka.csv'
+        rejects_path = Path(tmpdir) / 'rejects.csv'
+        _write_csv(csv_path)
+        with Database(Path(tmpdir) / 'out.db') as db:
+            importer = R2KAImporter(db, max_errors=2, rejects_path=rejects_path)
+            assert importer.import_csvs([str(csv_path)]) == (4, 2)
+            rows = db.conn.execute(
+                'SELECT source, row, column_name, value FROM import_rejects ORDER BY row'
+            ).fetchall()
+        assert rows == [(str(csv_path), 2, 'PREF', '1x'), (str(csv_path), 4, 'CITY,S_AREA', '10,2')]
+        with open(rejects_path, encoding='utf-8') as f:
+            report = list(csv.reader(f))
+        assert report[0] == ['source', 'row', 'column', 'value', 'reason', 'record']
+        assert len(report) == 3
+        assert 'Expected 3-digit numeric code' in report[2][4]
+
+
+def test_r2ka_rejects_over_budget():
+    with tempfile.TemporaryDirectory() as tmpdir:
+        csv_path = Path(tmpdir) / 'r2ka.csv'
+        _write_csv(csv_path)
+        with Database(Path(tmpdir) / 'out.db') as db:
+            with pytest.raises(ValueError, match='Invalid record'):
+                R2KAImporter(db).import_csvs([str(csv_path)])
+            with pytest.raises(TooManyRejects) as e:
+                R2KAImporter(db, max_errors=1).import_csvs([str(csv_path)])
+            assert len(e.value.rejects) == 2
+            assert db.conn.execute(
+                "SELECT COUNT(*) FROM sqlite_master WHERE name = 'sub_areas'"
+            ).fetchone() == (0,)
+
+
+def test_gis_rejects():
+    with tempfile.TemporaryDirectory() as tmpdir:
+        dbf_path = Path(tmpdir) / 'n03.dbf'
+        write_dbf(dbf_path, N03_FIELDS, [
+            ('埼玉県', '', '', '川越市', '', '11201'),
+            ('埼玉県', '', '', '所属未定地', '', ''),
+            ('埼玉県', '', '', '所属未定地', '', ''),
+        ])
+        with Database(Path(tmpdir) / 'out.db') as db:
+            importer = GISMapImporter(db)
+            assert importer.import_dbf(str(dbf_path)) == (3, 1)
+            assert [(r.row, r.column) for r in importer.rejects] == [(2, 'N03_007')]
+            with pytest.raises(TooManyRejects):
+                GISMapImporter(db, max_errors=0).import_dbf(str(dbf_path))
+
+
+def test_clean_reimport_clears_rejects():
+    with tempfile.TemporaryDirectory() as tmpdir:
+        csv_path = Path(tmpdir) / 'r2ka.csv'
+        other_path = Path(tmpdir) / 'other.csv'
+        _write_csv(csv_path)
+        _write_csv(other_path)
+        query = 'SELECT DISTINCT source FROM import_rejects ORDER BY source'
+        with Database(Path(tmpdir) / 'out.db') as db:
+            R2KAImporter(db, max_errors=4).import_csvs([str(csv_path), str(other_path)])
+            assert db.conn.execute(query).fetchall() == [(str(other_path),), (str(csv_path),)]
+
+            # the fixed file no longer has rejects; those of the other file stay
+            with open(csv_path, 'w', encoding='cp932', newline='') as f:
+                csv.writer(f).writerows([HEADER, ROWS[0], ROWS[2]])
+            importer = R2KAImporter(db)
+            assert importer.import_csvs([str(csv_path)]) == (2, 0)
+            assert len(importer.rejects) == 0
+            assert db.conn.execute(query).fetchall() == [(str(other_path),)]
@@ -0,0 +1,62 @@
+"""Writers for the small DBF and shapefile inputs used by the tests."""
+import struct
+
+# columns of an N03 (administrative boundaries) DBF, without N03_006
+N03_FIELDS = [(f'N03_00{i}', 20) for i in (1, 2, 3, 4, 5, 7)]
+
+
+def square(x, y, size):
+    """Return a closed square ring with its lower left corner at (x, y)."""
+    return [(x, y), (x, y + size), (x + size, y + size), (x + size, y), (x, y)]
+
+
+def write_polygon_shp(path, polygons):
+    """Write a minimal Polygon shapefile; ``polygons`` is a list of ring lists."""
+    records = []
+    for number, rings in enumerate(polygons, start=1):
+        if not rings:
+            content = struct.pack('<i', 0)
+        else:
+            points = [p for r in rings for p in r]
+            xs = [p[0] for p in points]
+            ys = [p[1] for p in points]
+            starts = []
+            pos = 0
+            for r in rings:
+                starts.append(pos)
+                pos += len(r)
+            content = struct.pack('<i4d2i', 5, min(xs), min(ys), max(xs), max(ys), len(rings), len(points))
+            content += struct.pack(f'<{len(rings)}i', *starts)
+            content += struct.pack(f'<{2 * len(points)}d', *[v for p in points for v in p])
+        records.append(struct.pack('>2i', number, len(content) // 2) + content)
+    body = b''.join(records)
+    header = struct.pack('>7i', 9994, 0, 0, 0, 0, 0, (100 + len(body)) // 2)
+    header += struct.pack('<2i4d4d', 1000, 5, 0, 0, 0, 0, 0, 0, 0, 0)
+    with open(path, 'wb') as f:
+        f.write(header + body)
+
+
+def write_dbf(path, fields, rows, encoding='cp932'):
+    """Write a minimal DBF of character fields; ``fields`` is [(name, length)]."""
+    header_length = 32 + 32 * len(fields) + 1
+    record_length = 1 + sum(length for _, length in fields)
+    out = [struct.pack('<4BIHH20x', 3, 124, 1, 1, len(rows), header_length, record_length)]
+    for name, length in fields:
+        out.append(struct.pack('<11sc4xBB14x', name.encode('ascii'), b'C', length, 0))
+    out.append(b'\r')
+    for row in rows:
+        out.append(b' ')
+        for (_, length), value in zip(fields, row):
+            out.append(value.encode(encoding).ljust(length, b' ')[:length])
+    out.append(b'\x1a')
+    with open(path, 'wb') as f:
+        f.write(b''.join(out))
+
+
+def delete_dbf_record(path, index):
+    """Mark record ``index`` (from 0) of a DBF file as deleted."""
+    with open(path, 'r+b') as f:
+        header = f.read(12)
+        header_length, record_length = struct.unpack('<HH', header[8:12])
+        f.seek(header_length + index * record_length)
+        f.write(b'*')
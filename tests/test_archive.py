@@ -0,0 +1,65 @@
+import sqlite3
+import tempfile
+import zipfile
+from pathlib import Path
+import sys
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / 'src'))
+
+from dbf_utils.archive import expand_inputs, open_input, split_archive_path
+from dbf_utils.database import Database
+from dbf_utils.dbf import DBFReader, parse_dbf
+from dbf_utils.dbf_to_sqlite import import_dbf_files
+from dbf_utils.gis_map import GISMapImporter
+from dbf_utils.r2ka import R2KAImporter
+
+
+def _make_archive(tmpdir):
+    zip_path = Path(tmpdir) / 'data.zip'
+    with zipfile.ZipFile(zip_path, 'w', compression=zipfile.ZIP_DEFLATED) as zf:
+        zf.write('dev/r2ka11.dbf', 'r2ka/r2ka11.dbf')
+        zf.write('dev/N03-20240101_33.dbf', 'N03-20240101_33.dbf')
+        zf.writestr('readme.txt', 'not data')
+    return zip_path
+
+
+def test_archive_paths():
+    with tempfile.TemporaryDirectory() as tmpdir:
+        zip_path = _make_archive(tmpdir)
+        member = str(zip_path / 'r2ka' / 'r2ka11.dbf')
+        assert split_archive_path(member) == (str(zip_path), 'r2ka/r2ka11.dbf')
+        assert split_archive_path('dev/r2ka11.dbf') is None
+        assert expand_inputs([zip_path, 'dev/x.dbf'], ['.dbf']) == [
+            str(zip_path / 'N03-20240101_33.dbf'),
+            member,
+            'dev/x.dbf',
+        ]
+        with open_input(member) as f, open('dev/r2ka11.dbf', 'rb') as g:
+            assert f.read() == g.read()
+
+
+def test_read_dbf_from_archive():
+    with tempfile.TemporaryDirectory() as tmpdir:
+        zip_path = _make_archive(tmpdir)
+        member = str(zip_path / 'r2ka' / 'r2ka11.dbf')
+        expected = list(parse_dbf('dev/r2ka11.dbf'))
+        assert list(parse_dbf(member)) == expected
+        with DBFReader(member) as reader:
+            assert reader.record(-1) == expected[-1]
+            assert reader.slice(10, 20) == expected[10:20]
+
+
+def test_importers_accept_archives():
+    with tempfile.TemporaryDirectory() as tmpdir:
+        zip_path = _make_archive(tmpdir)
+        with Database(Path(tmpdir) / 'r2ka.db') as db:
+            attempted, inserted = R2KAImporter(db).import_csvs([str(zip_path / 'r2ka' / 'r2ka11.dbf')])
+            assert attempted == len(list(parse_dbf('dev/r2ka11.dbf')))
+            assert inserted > 0
+        with Database(Path(tmpdir) / 'gis.db') as db:
+            _, inserted = GISMapImporter(db).import_dbf(str(zip_path / 'N03-20240101_33.dbf'))
+            assert inserted > 0
+        db_path = Path(tmpdir) / 'generic.db'
+        import_dbf_files(db_path, [zip_path])
+        with sqlite3.connect(db_path) as conn:
+            tables = {r[0] for r in conn.execute("SELECT name FROM sqlite_master WHERE type='table'")}
+        assert tables == {'r2ka11', 'N03-20240101_33'}
@@ -0,0 +1,61 @@
+import tempfile
+from pathlib import Path
+import sys
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / 'src'))
+
+import pytest
+
+pa = pytest.importorskip('pyarrow')
+pq = pytest.importorskip('pyarrow.parquet')
+
+from dbf_utils.arrow_export import export_database, export_table
+from dbf_utils.database import Database
+from dbf_utils.r2ka import R2KAImporter
+
+
+def test_export_parquet_and_ipc():
+    with tempfile.TemporaryDirectory() as tmpdir:
+        db_path = Path(tmpdir) / 'out.db'
+        with Database(db_path) as db:
+            R2KAImporter(db).import_csvs(['dev/r2ka11.dbf'])
+            total = db.conn.execute('SELECT COUNT(*) FROM codes_view').fetchone()[0]
+
+            counts = export_database(db.conn, Path(tmpdir) / 'pq', batch_size=1000)
+            assert counts['codes_view'] == total
+            table = pq.read_table(Path(tmpdir) / 'pq' / 'codes_view.parquet')
+            assert table.num_rows == total
+            assert pa.types.is_integer(table.schema.field('jis_code').type)
+            areas = pq.read_table(Path(tmpdir) / 'pq' / 'areas.parquet')
+            assert pa.types.is_dictionary(areas.schema.field('area_name').type)
+
+            counts = export_database(
+                db.conn, Path(tmpdir) / 'ipc', format='ipc', names=['sub_areas'], batch_size=1000
+            )
+            with pa.ipc.open_stream(Path(tmpdir) / 'ipc' / 'sub_areas.arrows') as reader:
+                assert reader.read_all().num_rows == counts['sub_areas']
+
+
+def test_export_untyped_columns():
+    with tempfile.TemporaryDirectory() as tmpdir:
+        out = Path(tmpdir)
+        with Database(out / 'out.db') as db:
+            db.conn.execute('CREATE TABLE t (a, b, c INTEGER)')
+            rows = [(i, i, i) for i in range(5)] + [('abc', 2.5, 5)]
+            db.conn.executemany('INSERT INTO t VALUES (?, ?, ?)', rows)
+            db.conn.execute("CREATE VIEW v AS SELECT * FROM (VALUES (1, 'x'), ('y', 2))")
+            db.conn.commit()
+
+            assert export_table(db.conn, 't', out / 't.parquet', batch_size=2) == 6
+            table = pq.read_table(out / 't.parquet')
+            assert table.column('a').to_pylist() == ['0', '1', '2', '3', '4', 'abc']
+            assert table.column('b').to_pylist() == [0.0, 1.0, 2.0, 3.0, 4.0, 2.5]
+            assert pa.types.is_integer(table.schema.field('c').type)
+            assert export_table(db.conn, 'v', out / 'v.arrows', format='ipc') == 2
+
+            # a declared type that the values do not match fails cleanly
+            (out / 'bad.parquet').write_bytes(b'old')
+            db.conn.execute("INSERT INTO t VALUES (1, 1, 'text')")
+            with pytest.raises(ValueError, match="Column 'c'"):
+                export_table(db.conn, 't', out / 'bad.parquet', batch_size=2)
+            assert (out / 'bad.parquet').read_bytes() == b'old'
+            assert not list(out.glob('.*.tmp'))
@@ -0,0 +1,48 @@
+import io
+import tempfile
+from pathlib import Path
+import sys
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / 'src'))
+
+from dbf_utils.cli import main
+from dbf_utils.database import Database
+from dbf_utils.dbf import parse_dbf
+from dbf_utils.r2ka import CityIdSelector, SubAreaIdSelector
+
+
+def test_cli_import_and_lookup(monkeypatch, capsys):
+    with tempfile.TemporaryDirectory() as tmpdir:
+        db_path = Path(tmpdir) / 'out.db'
+        assert main(['import', 'r2ka', str(db_path), 'dev/r2ka11.dbf']) == 0
+        with Database(db_path) as db:
+            sub_id = SubAreaIdSelector(db).get_sub_area_id(11, 101, 2005)
+            city_id = CityIdSelector(db).get_city_id(11, 101)
+        capsys.readouterr()
+
+        monkeypatch.setattr(sys, 'stdin', io.StringIO('11 101 2005\n11101002005\n99,999,999999\nbad\n'))
+        assert main(['lookup', 'sub-area', str(db_path), '--batch-size', '2']) == 0
+        assert capsys.readouterr().out == f'{sub_id}\n{sub_id}\n\n\n'
+
+        input_path = Path(tmpdir) / 'cities.txt'
+        input_path.write_text('11,101\n11101\n')
+        assert main(['lookup', 'city', str(db_path), str(input_path)]) == 0
+        assert capsys.readouterr().out == f'{city_id}\n{city_id}\n'
+
+        out_path = Path(tmpdir) / 'codes.csv'
+        assert main(['export', 'jis-csv', str(db_path), str(out_path)]) == 0
+        assert out_path.read_text().startswith('1')
+
+        dbf_path = Path(tmpdir) / 'codes.dbf'
+        assert main(['export', 'dbf', str(db_path), str(dbf_path)]) == 0
+        first = next(iter(parse_dbf(str(dbf_path))))
+        assert set(first) == {'sub_area_i', 'prefecture', 'city_code', 's_area_cod', 'jis_code'}
+
+
+def test_cli_atomic_import(tmp_path):
+    db_path = tmp_path / 'out.db'
+    assert main(['import', 'gis', str(db_path), 'dev/N03-20240101_01.dbf', '--atomic']) == 0
+    assert main(['import', 'r2ka', str(db_path), 'dev/r2ka11.dbf', '--atomic']) == 0
+    with Database(db_path) as db:
+        assert CityIdSelector(db).get_city_id(11, 101) is not None
+        # The second build replaced the first one rather than adding to it.
+        assert db.conn.execute('SELECT COUNT(*) FROM cities WHERE pref_code = 1').fetchone() == (0,)
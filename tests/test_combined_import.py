@@ -0,0 +1,82 @@
+import tempfile
+from pathlib import Path
+import sys
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / 'src'))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from dbf_utils import CombinedImporter
+from dbf_utils.database import Database
+from dbf_utils.gis_map import GISMapImporter
+from dbf_utils.r2ka import CityIdSelector, R2KAImporter
+from sample_files import N03_FIELDS, write_dbf
+
+
+def _write_n03(path):
+    write_dbf(path, N03_FIELDS, [
+        ('埼玉県', '', '', 'さいたま市', '西区', '11101'),
+        ('埼玉県', '', '', 'さいたま市', '西区', '11101'),
+        ('埼玉県', '', '', 'さいたま市', '北区', '11102'),
+        ('埼玉県', '', '秩父郡', '横瀬町', '', '11361'),
+        ('埼玉県', '', '', '架空市', '', '11999'),
+    ])
+
+
+def test_combined_import():
+    with tempfile.TemporaryDirectory() as tmpdir:
+        n03_path = Path(tmpdir) / 'n03.dbf'
+        _write_n03(n03_path)
+        with Database(Path(tmpdir) / 'out.db') as db:
+            result = CombinedImporter(db).import_files(['dev/r2ka11.dbf'], [str(n03_path)])
+            assert result.gis_records == 5
+            assert result.cities_inserted == 1
+            assert result.cities_updated == 3
+
+            city_id = CityIdSelector(db).get_city_id(11, 101)
+            row = db.conn.execute(
+                'SELECT city_name, ward_name FROM areas_view WHERE city_id = ?', (city_id,)
+            ).fetchone()
+            assert row == ('さいたま市西区', '西区')
+            assert db.conn.execute(
+                'SELECT distinct_name FROM areas_view WHERE pref_code = 11 AND city_code = 361'
+            ).fetchone() == ('秩父郡',)
+            assert db.conn.execute(
+                'SELECT COUNT(*) FROM codes_view WHERE city_code = 101'
+            ).fetchone()[0] > 0
+            assert db.conn.execute(
+                'SELECT COUNT(*) FROM prefectures WHERE pref_code = 11'
+            ).fetchone() == (1,)
+
+
+def test_importers_share_city_table():
+    with tempfile.TemporaryDirectory() as tmpdir:
+        n03_path = Path(tmpdir) / 'n03.dbf'
+        _write_n03(n03_path)
+        with Database(Path(tmpdir) / 'out.db') as db:
+            # GIS first, then R2KA into the same tables
+            GISMapImporter(db).import_dbf(str(n03_path))
+            city_id = CityIdSelector(db).get_city_id(11, 101)
+            R2KAImporter(db).import_csvs(['dev/r2ka11.dbf'])
+            assert CityIdSelector(db).get_city_id(11, 101) == city_id
+            assert db.conn.execute(
+                'SELECT COUNT(*) FROM codes_view c JOIN areas_view a ON c.sub_area_id IS NOT NULL '
+                'AND a.ward_name = ? AND a.pref_code = c.prefecture_code AND a.city_code = c.city_code',
+                ('西区',),
+            ).fetchone()[0] > 0
+
+
+def test_upgrades_r2ka_only_city_table():
+    with tempfile.TemporaryDirectory() as tmpdir:
+        n03_path = Path(tmpdir) / 'n03.dbf'
+        _write_n03(n03_path)
+        with Database(Path(tmpdir) / 'out.db') as db:
+            db.conn.execute(
+                'CREATE TABLE cities (city_id INTEGER PRIMARY KEY AUTOINCREMENT, pref_code INTEGER NOT NULL, '
+                'city_code INTEGER NOT NULL, city_name TEXT NOT NULL, UNIQUE(pref_code, city_code))'
+            )
+            db.conn.execute("INSERT INTO cities (pref_code, city_code, city_name) VALUES (11, 102, 'さいたま市北区')")
+            importer = GISMapImporter(db)
+            importer.import_dbf(str(n03_path))
+            assert importer.cities_updated == 1
+            assert db.conn.execute(
+                'SELECT city_name, ward_name FROM areas_view WHERE city_code = 102'
+            ).fetchone() == ('さいたま市北区', '北区')
@@ -0,0 +1,84 @@
+import sqlite3
+import tempfile
+from pathlib import Path
+import sys
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / 'src'))
+
+import pytest
+
+pytest.importorskip('pandas')
+
+from dbf_utils.csv_to_sqlite import CsvToSqliteConverter, read_csv_files
+
+
+def _write_csvs(csv_dir: Path, count: int) -> None:
+    for i in range(count):
+        (csv_dir / f't{i}.csv').write_text(f'code,name\n{i},name{i}\n{i + 1},shared\n')
+
+
+def test_parallel_read_matches_serial():
+    with tempfile.TemporaryDirectory() as tmpdir:
+        csv_dir = Path(tmpdir)
+        _write_csvs(csv_dir, 8)
+        serial = read_csv_files(csv_dir, max_workers=1)
+        parallel = read_csv_files(csv_dir, max_workers=4)
+        assert list(serial) == list(parallel)
+        for name in serial:
+            assert serial[name].equals(parallel[name])
+
+
+def test_converter_with_workers():
+    with tempfile.TemporaryDirectory() as tmpdir:
+        csv_dir = Path(tmpdir) / 'csv'
+        csv_dir.mkdir()
+        _write_csvs(csv_dir, 3)
+        db_path = Path(tmpdir) / 'out.db'
+        CsvToSqliteConverter(str(csv_dir), str(db_path), max_workers=2).convert()
+        with sqlite3.connect(db_path) as conn:
+            assert conn.execute('SELECT COUNT(*) FROM t0').fetchone()[0] == 2
+            assert conn.execute('SELECT COUNT(*) FROM name').fetchone()[0] > 0
+
+
+def test_read_csv_files_from_archive():
+    import zipfile
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        csv_dir = Path(tmpdir) / 'csv'
+        csv_dir.mkdir()
+        _write_csvs(csv_dir, 3)
+        zip_path = Path(tmpdir) / 'csv.zip'
+        with zipfile.ZipFile(zip_path, 'w') as zf:
+            for f in sorted(csv_dir.glob('*.csv')):
+                zf.write(f, f.name)
+        frames = read_csv_files(zip_path, max_workers=2)
+        assert sorted(frames) == ['t0', 't1', 't2']
+        assert frames['t1'].equals(read_csv_files(csv_dir, max_workers=1)['t1'])
+
+
+def test_engines_produce_identical_tables(tmp_path):
+    pytest.importorskip('pyarrow')
+    csv_dir = tmp_path / 'csv'
+    csv_dir.mkdir()
+    (csv_dir / 'a.csv').write_text('code,name,value\n011,北区,1\n,NA,\n002,,3.5\n')
+    (csv_dir / 'b.csv').write_text('code,kind\n011,x\n002,\n')
+
+    for all_text in (False, True):
+        dumps = []
+        for engine in ('c', 'pyarrow', None):
+            db_path = tmp_path / f'{engine}-{all_text}.db'
+            CsvToSqliteConverter(
+                str(csv_dir), str(db_path), max_workers=1, engine=engine, all_text=all_text
+            ).convert()
+            with sqlite3.connect(db_path) as conn:
+                dumps.append(list(conn.iterdump()))
+        assert dumps[0] == dumps[1] == dumps[2]
+
+    with sqlite3.connect(tmp_path / 'c-False.db') as conn:
+        # numeric columns keep their inferred types
+        assert conn.execute('SELECT typeof(value), value FROM a').fetchall() == [
+            ('real', 1.0), ('null', None), ('real', 3.5)
+        ]
+        assert conn.execute('SELECT name FROM a').fetchall() == [('北区',), ('NA',), (None,)]
+    with sqlite3.connect(tmp_path / 'c-True.db') as conn:
+        assert conn.execute('SELECT code FROM code ORDER BY code_id').fetchall() == [('011',), (None,), ('002',)]
+        assert conn.execute('SELECT name, value FROM a').fetchall() == [('北区', '1'), ('NA', None), (None, '3.5')]
@@ -0,0 +1,97 @@
+import os
+import sqlite3
+from pathlib import Path
+import sys
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / 'src'))
+
+import pytest
+
+from dbf_utils.database import Database, StagedDatabase
+from dbf_utils.r2ka import R2KAImporter, SubAreaIdSelector
+from dbf_utils.r2ka.lookup_server import BatchingLookup
+
+
+def test_staged_build_publishes_atomically(tmp_path):
+    db_path = tmp_path / 'out.db'
+    with Database(db_path) as db:
+        db.conn.execute('CREATE TABLE old (x INTEGER)')
+        db.conn.commit()
+
+    reader = Database(db_path)
+    lookup = BatchingLookup(db_path)
+    try:
+        with StagedDatabase(db_path) as db:
+            R2KAImporter(db).import_csvs(['dev/r2ka11.dbf'])
+            sub_id = SubAreaIdSelector(db).get_sub_area_id(11, 101, 2005)
+            assert reader.conn.execute("SELECT name FROM sqlite_master WHERE name='sub_areas'").fetchone() is None
+
+        # Open connections keep the old file; new ones see the published build.
+        assert reader.conn.execute("SELECT name FROM sqlite_master WHERE name='old'").fetchone()
+        with Database(db_path) as db:
+            assert SubAreaIdSelector(db).get_sub_area_id(11, 101, 2005) == sub_id
+            assert db.conn.execute("SELECT COUNT(*) FROM sqlite_master WHERE name='old'").fetchone() == (0,)
+            assert db.conn.execute("SELECT COUNT(*) FROM sqlite_stat1").fetchone()[0] > 0
+        assert lookup.lookup('sub_area', [(11, 101, 2005)]) == [sub_id]
+        assert lookup.stats()['reloads'] == 1
+    finally:
+        reader.close()
+        lookup.close()
+    assert sorted(p.name for p in tmp_path.iterdir()) == ['out.db']
+
+
+def test_staged_build_failure_keeps_old_file(tmp_path):
+    db_path = tmp_path / 'out.db'
+    with Database(db_path) as db:
+        db.conn.execute('CREATE TABLE old (x INTEGER)')
+        db.conn.execute('INSERT INTO old VALUES (1)')
+        db.conn.commit()
+
+    with pytest.raises(RuntimeError):
+        with StagedDatabase(db_path, in_memory=False, copy_existing=True) as db:
+            assert db.conn.execute('SELECT x FROM old').fetchall() == [(1,)]
+            db.conn.execute('INSERT INTO old VALUES (2)')
+            raise RuntimeError('import failed')
+    assert sorted(p.name for p in tmp_path.iterdir()) == ['out.db']
+
+    with StagedDatabase(db_path, in_memory=False, copy_existing=True, analyze=False) as db:
+        db.conn.execute('INSERT INTO old VALUES (2)')
+    with Database(db_path) as db:
+        assert db.conn.execute('SELECT x FROM old ORDER BY x').fetchall() == [(1,), (2,)]
+    assert sorted(p.name for p in tmp_path.iterdir()) == ['out.db']
+
+
+def test_publish_syncs_and_removes_stale_journals(tmp_path, monkeypatch):
+    db_path = tmp_path / 'out.db'
+    with Database(db_path) as db:
+        db.conn.execute('CREATE TABLE old (x INTEGER)')
+        db.conn.commit()
+    (tmp_path / 'out.db-journal').write_bytes(b'\x00' * 512)
+    (tmp_path / 'out.db-wal').write_bytes(b'\x00' * 512)
+
+    synced = []
+    fsync = os.fsync
+    monkeypatch.setattr(os, 'fsync', lambda fd: (synced.append(fd), fsync(fd)))
+    with StagedDatabase(db_path, analyze=False) as db:
+        db.conn.execute('CREATE TABLE new (x INTEGER)')
+    assert len(synced) == 2
+    assert sorted(p.name for p in tmp_path.iterdir()) == ['out.db']
+    with Database(db_path) as db:
+        assert db.conn.execute("SELECT name FROM sqlite_master").fetchall() == [('new',)]
+
+
+def test_publish_keeps_wal_files_of_open_readers(tmp_path):
+    db_path = tmp_path / 'out.db'
+    reader = sqlite3.connect(db_path)
+    reader.execute('PRAGMA journal_mode=WAL')
+    reader.execute('CREATE TABLE old (x INTEGER)')
+    reader.commit()
+    reader.execute('SELECT * FROM old').fetchall()
+    assert (tmp_path / 'out.db-wal').exists()
+
+    with StagedDatabase(db_path, analyze=False) as db:
+        db.conn.execute('CREATE TABLE new (x INTEGER)')
+    assert (tmp_path / 'out.db-wal').exists()
+    assert (tmp_path / 'out.db-shm').exists()
+    # the reader still sees the old file it has open
+    assert reader.execute('SELECT name FROM sqlite_master').fetchall() == [('old',)]
+    reader.close()
@@ -0,0 +1,147 @@
+from pathlib import Path
+import sys
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / 'src'))
+
+import sqlite3
+
+import pytest
+
+from dbf_utils.dbf import (
+    DBFReader,
+    parse_dbf,
+    parse_dbf_parallel,
+    read_dbf_fields,
+    table_fields,
+    write_dbf,
+)
+
+
+def test_random_access_reader():
+    dbf_path = 'dev/r2ka11.dbf'
+    records = list(parse_dbf(dbf_path))
+    with DBFReader(dbf_path) as reader:
+        assert len(reader) == len(records)
+        assert reader.record(0) == records[0]
+        assert reader.record(-1) == records[-1]
+        assert reader.record(1234) == records[1234]
+        assert reader.slice(100, 110) == records[100:110]
+        assert reader.slice(len(records) - 2, len(records) + 5) == records[-2:]
+        with pytest.raises(IndexError):
+            reader.record(len(records))
+
+
+def test_parallel_parse_matches_serial():
+    dbf_path = 'dev/N03-20240101_01.dbf'
+    expected = list(parse_dbf(dbf_path))
+    assert list(parse_dbf_parallel(dbf_path, workers=2, chunk_records=1000)) == expected
+    assert list(parse_dbf_parallel(dbf_path, workers=1)) == expected
+
+
+def test_parallel_parse_archive_member(tmp_path):
+    import zipfile
+
+    dbf_path = 'dev/N03-20240101_01.dbf'
+    expected = list(parse_dbf(dbf_path))
+    zip_path = tmp_path / 'n03.zip'
+    with zipfile.ZipFile(zip_path, 'w', zipfile.ZIP_DEFLATED) as zf:
+        zf.write(dbf_path, 'n03.dbf')
+    member = str(zip_path / 'n03.dbf')
+    assert list(parse_dbf_parallel(member, workers=2, chunk_records=1000)) == expected
+    assert list(parse_dbf_parallel(member, workers=1)) == expected
+
+
+def test_write_dbf_round_trip(tmp_path):
+    conn = sqlite3.connect(':memory:')
+    conn.execute('CREATE TABLE t (sub_area_id INTEGER, prefecture_code INTEGER, name TEXT, x REAL)')
+    rows = [(i, 11, f'大字{i:04d}' if i % 3 else None, i / 4) for i in range(1, 2001)]
+    conn.executemany('INSERT INTO t VALUES (?, ?, ?, ?)', rows)
+
+    path = tmp_path / 'out.dbf'
+    assert write_dbf(path, conn.execute('SELECT * FROM t ORDER BY sub_area_id'), block_records=64) == 2000
+    fields = read_dbf_fields(str(path))
+    assert [f[:2] for f in fields] == [('sub_area_i', 'N'), ('prefecture', 'N'), ('name', 'C'), ('x', 'N')]
+    records = list(parse_dbf(str(path)))
+    assert len(records) == 2000
+    assert records[0] == {'sub_area_i': '1', 'prefecture': '11', 'name': '大字0001', 'x': '0.250000'}
+    assert records[2]['name'] == ''
+    with DBFReader(str(path)) as reader:
+        assert len(reader) == 2000
+        assert reader.record(1999)['sub_area_i'] == '2000'
+
+
+def test_write_dbf_dict_rows(tmp_path):
+    path = tmp_path / 'out.dbf'
+    fields = [('CODE', 'C', 5, 0), ('NAME', 'C', 10, 0)]
+    rows = [{'CODE': '11101', 'NAME': '西区'}, {'NAME': '北区', 'CODE': '11102'}]
+    assert write_dbf(path, iter(rows), fields) == 2
+    assert list(parse_dbf(str(path))) == rows
+    assert write_dbf(path, [], fields) == 0
+    assert list(parse_dbf(str(path))) == []
+
+    with pytest.raises(ValueError):
+        write_dbf(path, [{'CODE': '111010', 'NAME': ''}], fields)
+
+
+def test_write_dbf_errors_keep_existing_file(tmp_path):
+    path = tmp_path / 'out.dbf'
+    fields = [('CODE', 'C', 5, 0)]
+    write_dbf(path, [('11101',)], fields)
+    before = path.read_bytes()
+
+    # a value too wide for its field in a later block
+    rows = [('11102',)] * 3 + [('111030',)]
+    with pytest.raises(ValueError, match='does not fit'):
+        write_dbf(path, rows, fields, block_records=2)
+    with pytest.raises(ValueError, match='ASCII'):
+        write_dbf(path, [('11102',)], [('市区町村コード', 'C', 5, 0)])
+    conn = sqlite3.connect(':memory:')
+    conn.execute('CREATE TABLE t ("名称" TEXT)')
+    with pytest.raises(ValueError, match='ASCII'):
+        write_dbf(path, conn.execute('SELECT * FROM t'))
+    assert path.read_bytes() == before
+    assert [p.name for p in tmp_path.iterdir()] == ['out.dbf']
+
+
+def test_table_fields(tmp_path):
+    conn = sqlite3.connect(':memory:')
+    conn.execute('CREATE TABLE t (prefecture_code INTEGER, prefecture_name TEXT, x REAL)')
+    conn.executemany('INSERT INTO t VALUES (?, ?, ?)', [(1, 'a', 0.5)] * 5000 + [(47, '沖縄県', 1.0)])
+    fields = table_fields(conn, 't')
+    assert fields == [('prefecture', 'N', 2, 0), ('prefectu_1', 'C', 9, 0), ('x', 'N', 20, 6)]
+    path = tmp_path / 'out.dbf'
+    assert write_dbf(path, conn.execute('SELECT * FROM t'), fields, block_records=64) == 5001
+    assert list(parse_dbf(str(path)))[-1] == {'prefecture': '47', 'prefectu_1': '沖縄県', 'x': '1.000000'}
+
+
+def test_write_dbf_numeric_checks(tmp_path):
+    path = tmp_path / 'out.dbf'
+    conn = sqlite3.connect(':memory:')
+    conn.execute('CREATE TABLE t (n, s)')
+    conn.executemany('INSERT INTO t VALUES (?, ?)', [(1, None), (2, None), (2.7, 'abc')])
+    query = 'SELECT * FROM t ORDER BY rowid'
+    # fields inferred from an all-int first block are never rounded
+    with pytest.raises(ValueError, match='without rounding.*inferred from the first 2 rows'):
+        write_dbf(path, conn.execute(query), block_records=2)
+    assert not path.exists()
+    assert write_dbf(path, conn.execute(query), table_fields(conn, 't'), block_records=2) == 3
+    assert [r['n'] for r in parse_dbf(str(path))] == ['1.000000', '2.000000', '2.700000']
+
+    fields = [('N', 'N', 5, 0)]
+    assert write_dbf(path, [(3.0,), ('12',), (None,)], fields) == 3
+    assert [r['N'] for r in parse_dbf(str(path))] == ['3', '12', '']
+    with pytest.raises(ValueError, match='is not a finite number'):
+        write_dbf(path, [('abc',)], fields)
+    with pytest.raises(ValueError, match='is not a finite number'):
+        write_dbf(path, [(float('inf'),)], fields)
+
+    with pytest.raises(TypeError, match='result set'):
+        write_dbf(path, conn)
+    with pytest.raises(TypeError, match='result set'):
+        write_dbf(path, conn.cursor())
+
+
+def test_table_fields_quotes_names(tmp_path):
+    conn = sqlite3.connect(':memory:')
+    conn.execute('CREATE TABLE "we""ird" ("a""b" TEXT)')
+    conn.execute('INSERT INTO "we""ird" VALUES (\'xyz\')')
+    assert table_fields(conn, 'we"ird') == [('a"b', 'C', 3, 0)]
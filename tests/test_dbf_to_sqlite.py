@@ -0,0 +1,43 @@
+import sqlite3
+import tempfile
+from pathlib import Path
+import sys
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / 'src'))
+
+from dbf_utils.dbf import parse_dbf
+from dbf_utils.dbf_to_sqlite import _to_int, import_dbf, import_dbf_files
+
+
+def test_import_dbf_typed_columns():
+    dbf_path = Path('dev/r2ka11.dbf')
+    conn = sqlite3.connect(':memory:')
+    inserted = import_dbf(conn, dbf_path, batch_size=1000)
+    assert inserted == sum(1 for _ in parse_dbf(str(dbf_path)))
+
+    types = {row[1]: row[2] for row in conn.execute('PRAGMA table_info(r2ka11)')}
+    assert types['S_NAME'] == 'TEXT'
+    assert types['JINKO'] == 'INTEGER'
+    assert types['AREA'] == 'REAL'
+
+    row = conn.execute(
+        'SELECT typeof(JINKO), typeof(AREA), PREF FROM r2ka11 WHERE JINKO IS NOT NULL LIMIT 1'
+    ).fetchone()
+    assert row == ('integer', 'real', '11')
+
+
+def test_import_dbf_files_one_table_per_file():
+    with tempfile.TemporaryDirectory() as tmpdir:
+        db_path = Path(tmpdir) / 'out.db'
+        total = import_dbf_files(db_path, [Path('dev/N03-20240101_33.dbf')])
+        with sqlite3.connect(db_path) as conn:
+            count = conn.execute('SELECT COUNT(*) FROM "N03-20240101_33"').fetchone()[0]
+        assert total == count > 0
+
+
+def test_to_int_out_of_range_values():
+    assert _to_int('12') == 12
+    assert _to_int('12.0') == 12
+    assert _to_int('inf') is None
+    assert _to_int('-inf') is None
+    assert _to_int('1e400') is None
+    assert _to_int('abc') is None
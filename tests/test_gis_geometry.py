@@ -0,0 +1,117 @@
+import shutil
+import tempfile
+from pathlib import Path
+import sys
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / 'src'))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+import pytest
+
+from dbf_utils.database import Database
+from dbf_utils.dbf import parse_dbf
+from dbf_utils.geometry import (
+    pack_rings,
+    point_in_rings,
+    points_in_rings,
+    simplify_ring,
+    unpack_rings,
+)
+from dbf_utils.gis_map import CityLocator, GISMapImporter
+from dbf_utils.shp import parse_shp
+from sample_files import delete_dbf_record, square, write_dbf, write_polygon_shp
+
+
+def test_geometry_helpers():
+    outer = square(0, 0, 10)
+    hole = square(4, 4, 2)
+    assert point_in_rings(1, 1, [outer, hole])
+    assert not point_in_rings(5, 5, [outer, hole])
+    assert not point_in_rings(11, 5, [outer])
+    assert unpack_rings(pack_rings([outer, hole])) == [outer, hole]
+
+    np = pytest.importorskip('numpy')
+    star = [(5 + 5 * ((-1) ** i) * (i % 3 + 1) / 3, i * 0.7) for i in range(15)] + [(6.6666, 0.0)]
+    rng = np.random.default_rng(0)
+    xs, ys = rng.uniform(-1, 11, 2000), rng.uniform(-1, 11, 2000)
+    # points on vertices and horizontal edges take the same branch as the loop
+    xs[:3], ys[:3] = (0, 4, 5), (0, 4, 10)
+    for rings in ([outer, hole], [star]):
+        expected = [point_in_rings(x, y, rings) for x, y in zip(xs.tolist(), ys.tolist())]
+        assert points_in_rings(xs, ys, rings).tolist() == expected
+
+    wiggly = [(0, 0), (0, 5), (0.000001, 5.5), (0, 10), (10, 10), (10, 0), (0, 0)]
+    assert (0.000001, 5.5) not in simplify_ring(wiggly, 0.001)
+    assert simplify_ring(outer, 0.001) == outer
+
+
+def test_import_shapefile_and_locate():
+    with tempfile.TemporaryDirectory() as tmpdir:
+        dbf_path = Path(tmpdir) / 'n03.dbf'
+        shutil.copy('dev/N03-20240101_33.dbf', dbf_path)
+        records = list(parse_dbf(str(dbf_path)))
+        # one 0.5 degree square per record, laid out along the x axis
+        polygons = [[square(130 + i, 34, 0.5)] for i in range(len(records))]
+        shp_path = Path(tmpdir) / 'n03.shp'
+        write_polygon_shp(shp_path, polygons)
+        assert len(list(parse_shp(str(shp_path)))) == len(records)
+
+        db_path = Path(tmpdir) / 'out.db'
+        with Database(db_path) as db:
+            cities, polygon_count = GISMapImporter(db).import_shapefile(str(shp_path))
+            assert cities > 0
+            assert polygon_count == sum(
+                1 for r in records if len(r['N03_007']) == 5 and r['N03_007'].isdigit()
+            )
+
+            index = next(i for i, r in enumerate(records) if r['N03_007'])
+            code = records[index]['N03_007']
+            city_id = db.conn.execute(
+                'SELECT city_id FROM cities WHERE pref_code = ? AND city_code = ?',
+                (int(code[:2]), int(code[2:])),
+            ).fetchone()[0]
+
+            locator = CityLocator(db)
+            assert locator.locate(34.25, 130 + index + 0.25) == city_id
+            assert locator.locate(0, 0) is None
+            assert locator.locate_many([(34.25, 130 + index + 0.25), (34.25, 129.9)]) == [city_id, None]
+
+            bounds = db.conn.execute(
+                'SELECT min_x, max_y FROM city_bounds WHERE city_id = ?', (city_id,)
+            ).fetchone()
+            assert bounds[0] <= 130 + index and bounds[1] == 34.5
+
+
+def test_import_shapefile_with_deleted_record_and_reimport():
+    with tempfile.TemporaryDirectory() as tmpdir:
+        dbf_path = Path(tmpdir) / 'n03.dbf'
+        shp_path = Path(tmpdir) / 'n03.shp'
+        fields = [(f'N03_00{i}', 20) for i in (1, 2, 3, 4, 7)]
+        write_dbf(dbf_path, fields, [
+            ('埼玉県', '', '', '川越市', '11201'),
+            ('埼玉県', '', '', '熊谷市', '11202'),
+            ('埼玉県', '', '', '川口市', '11203'),
+        ])
+        delete_dbf_record(dbf_path, 1)
+        write_polygon_shp(shp_path, [[square(130 + i, 34, 0.5)] for i in range(3)])
+
+        with Database(Path(tmpdir) / 'out.db') as db:
+            importer = GISMapImporter(db)
+            assert importer.import_shapefile(str(shp_path))[1] == 2
+            assert importer.import_shapefile(str(shp_path))[1] == 2
+            assert db.conn.execute('SELECT COUNT(*) FROM city_polygons').fetchone()[0] == 2
+            assert db.conn.execute('SELECT COUNT(*) FROM city_polygons_rtree').fetchone()[0] == 2
+
+            def city(code):
+                return db.conn.execute(
+                    'SELECT city_id FROM cities WHERE pref_code = 11 AND city_code = ?', (code,)
+                ).fetchone()[0]
+
+            locator = CityLocator(db)
+            assert locator.locate(34.25, 130.25) == city(201)
+            assert locator.locate(34.25, 131.25) is None
+            assert locator.locate(34.25, 132.25) == city(203)
+
+        write_polygon_shp(shp_path, [[square(130, 34, 0.5)]])
+        with Database(Path(tmpdir) / 'out.db') as db:
+            with pytest.raises(ValueError):
+                GISMapImporter(db).import_shapefile(str(shp_path))
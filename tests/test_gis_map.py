@@ -38,3 +38,18 @@ def test_import_gis_map_dbf():
                 'SELECT city_id, pref_code, city_code, subpref_name, distinct_name, city_name, ward_name FROM areas_view LIMIT 1'
             )
             cur.fetchall()
+
+
+def test_import_collapses_polygon_rows():
+    dbf_path = Path('dev/N03-20240101_01.dbf')
+    with tempfile.TemporaryDirectory() as tmpdir:
+        db_path = Path(tmpdir) / 'out.db'
+        with Database(db_path) as db:
+            importer = GISMapImporter(db, encoding='cp932')
+            attempted, inserted = importer.import_dbf(str(dbf_path))
+            counts = importer.polygon_counts
+            assert len(counts) == inserted
+            assert attempted > inserted
+            assert max(counts.values()) > 1
+            # rows without a valid code are read but not counted
+            assert sum(counts.values()) <= attempted
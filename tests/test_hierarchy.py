@@ -0,0 +1,60 @@
+import tempfile
+from pathlib import Path
+import sys
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / 'src'))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from dbf_utils import AreaHierarchy, CombinedImporter
+from dbf_utils.database import Database
+from dbf_utils.gis_map import AreasViewReader
+from dbf_utils.hierarchy import AREA, CITY, PREFECTURE, SECTION, WARD
+from dbf_utils.r2ka import CityIdSelector, SubAreaIdSelector
+from sample_files import N03_FIELDS, write_dbf
+
+
+def test_area_hierarchy():
+    with tempfile.TemporaryDirectory() as tmpdir:
+        n03_path = Path(tmpdir) / 'n03.dbf'
+        write_dbf(n03_path, N03_FIELDS, [
+            ('埼玉県', '', '', 'さいたま市', '西区', '11101'),
+            ('埼玉県', '', '', 'さいたま市', '北区', '11102'),
+        ])
+        with Database(Path(tmpdir) / 'out.db') as db:
+            CombinedImporter(db).import_files(['dev/r2ka11.dbf'], [str(n03_path)])
+            tree = AreaHierarchy(db)
+            city_id = CityIdSelector(db).get_city_id(11, 101)
+            sub_id = SubAreaIdSelector(db).get_sub_area_id(11, 101, 2005)
+
+            [pref] = tree.roots
+            assert tree.node(pref).kind == PREFECTURE
+            ward = tree.find_city(city_id)
+            assert tree.node(ward)[1:4] == (WARD, city_id, '西区')
+            saitama = tree.parent(ward)
+            assert tree.node(saitama)[1:4] == (CITY, None, 'さいたま市')
+            assert len(tree.children(saitama)) == 2
+            assert tree.path(ward) == [pref, saitama, ward]
+
+            expected = [
+                r[0] for r in db.conn.execute(
+                    'SELECT sub_area_id FROM sub_areas WHERE city_id = ? ORDER BY s_area_code', (city_id,)
+                )
+            ]
+            assert tree.keys(ward, SECTION) == expected
+            section = tree.find(SECTION, sub_id)
+            area = tree.parent(section)
+            assert tree.node(area).kind == AREA
+            assert ward < section < tree.subtree_end(ward)
+            assert section in tree.children(area)
+            assert tree.subtree_end(pref) == len(tree)
+            assert sum(1 for _ in tree.descendants(pref, SECTION)) == db.conn.execute(
+                'SELECT COUNT(*) FROM sub_areas'
+            ).fetchone()[0]
+
+            reader = AreasViewReader(db)
+            assert reader.count() == len(reader.fetch_all())
+            assert reader.fetch(0, 1)[0]['city_id'] == 1
+
+            plan = db.conn.execute(
+                'EXPLAIN QUERY PLAN SELECT sub_area_id FROM sub_areas WHERE city_id = ?', (city_id,)
+            ).fetchall()
+            assert 'idx_sub_areas_city_id' in plan[0][3]
@@ -0,0 +1,38 @@
+import json
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+SRC = Path(__file__).resolve().parents[1] / 'src'
+
+HEAVY_MODULES = ['pandas', 'numpy', 'dbfread', 'pyarrow', 'multiprocessing']
+
+
+def _run(code):
+    env = dict(os.environ, PYTHONPATH=str(SRC))
+    return subprocess.run(
+        [sys.executable, '-c', code],
+        env=env,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+
+
+def test_import_does_not_load_heavy_modules():
+    code = (
+        'import json, sys\n'
+        'import dbf_utils, dbf_utils.r2ka, dbf_utils.database\n'
+        f'print(json.dumps([m for m in {HEAVY_MODULES!r} if m in sys.modules]))\n'
+    )
+    loaded = json.loads(_run(code).stdout)
+    assert loaded == []
+
+
+def test_lazy_attributes_resolve():
+    code = (
+        'import dbf_utils, dbf_utils.r2ka\n'
+        'print(dbf_utils.GISMapImporter.__name__, dbf_utils.r2ka.JisCodeIndex.__name__)\n'
+    )
+    assert _run(code).stdout.split() == ['GISMapImporter', 'JisCodeIndex']
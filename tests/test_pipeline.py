@@ -0,0 +1,56 @@
+from pathlib import Path
+import sys
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / 'src'))
+
+import pytest
+
+from dbf_utils.pipeline import Pipeline
+from dbf_utils.database import Database
+from dbf_utils.r2ka import R2KAImporter
+
+
+def _square(batch):
+    return [x * x for x in batch]
+
+
+def _fail_on_42(batch):
+    if 42 in batch:
+        raise ValueError("bad item")
+    return batch
+
+
+def test_pipeline_preserves_order():
+    out = []
+    count = Pipeline(out.extend, transform=_square, batch_size=7, workers=4).run(range(1000))
+    assert count == 1000
+    assert out == [x * x for x in range(1000)]
+
+
+def test_pipeline_process_backend():
+    out = []
+    Pipeline(out.extend, transform=_square, batch_size=50, workers=2, use_processes=True).run(range(300))
+    assert out == [x * x for x in range(300)]
+
+
+def test_pipeline_propagates_errors():
+    out = []
+    with pytest.raises(ValueError, match="bad item"):
+        Pipeline(out.extend, transform=_fail_on_42, batch_size=10, queue_size=2).run(range(10000))
+    assert out == list(range(40))
+
+    def reader():
+        yield 1
+        raise RuntimeError("read failed")
+
+    with pytest.raises(RuntimeError, match="read failed"):
+        Pipeline(out.extend, batch_size=1).run(reader())
+
+
+def test_r2ka_import_with_workers(tmp_path):
+    counts = []
+    for i, workers in enumerate((1, 3)):
+        with Database(str(tmp_path / f'r2ka{i}.db')) as db:
+            importer = R2KAImporter(db, workers=workers)
+            counts.append(importer.import_csvs(['dev/r2ka11.dbf']))
+            counts.append(db.conn.execute('SELECT COUNT(*) FROM codes_view').fetchone())
+    assert counts[:2] == counts[2:]
@@ -0,0 +1,80 @@
+import tempfile
+from pathlib import Path
+import sys
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / 'src'))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from dbf_utils import CombinedImporter
+from dbf_utils.cli import main
+from dbf_utils.database import Database, create_indexes
+from dbf_utils.geometry import create_polygon_tables, insert_polygon
+from dbf_utils.query_plan import PlannedQuery, audit, builtin_queries
+from sample_files import N03_FIELDS, write_dbf
+
+
+def _build(tmpdir):
+    n03_path = Path(tmpdir) / 'n03.dbf'
+    write_dbf(n03_path, N03_FIELDS, [
+        ('埼玉県', '', '', 'さいたま市', '西区', '11101'),
+        ('埼玉県', '', '入間郡', '三芳町', '', '11324'),
+    ])
+    db_path = Path(tmpdir) / 'out.db'
+    with Database(db_path) as db:
+        CombinedImporter(db).import_files(['dev/r2ka11.dbf'], [str(n03_path)])
+        create_polygon_tables(db.conn, 'city_polygons', 'city_id')
+        insert_polygon(db.conn, 'city_polygons', 'city_id', 1, [[(0, 0), (0, 1), (1, 1), (0, 0)]])
+        db.conn.commit()
+    return db_path
+
+
+def test_builtin_queries_use_indexes():
+    with tempfile.TemporaryDirectory() as tmpdir:
+        db_path = _build(tmpdir)
+        with Database(db_path) as db:
+            # Without ANALYZE the plans do not depend on the size of the test data.
+            assert db.conn.execute("SELECT name FROM sqlite_master WHERE name = 'sqlite_stat1'").fetchone() is None
+            assert audit(db.conn) == []
+            names = {q.name for q in builtin_queries()}
+            assert {'sub_area_id', 'codes_view by codes', 'city_polygons candidates'} <= names
+
+            issues = audit(db.conn, [
+                PlannedQuery('by name', 'SELECT city_id FROM cities WHERE city_name = ?', ('x',), ['cities']),
+                PlannedQuery(
+                    'old sub_area_id',
+                    'SELECT sa.sub_area_id FROM sub_areas sa '
+                    'JOIN cities c ON sa.city_id = c.city_id '
+                    'JOIN prefectures p ON sa.prefecture_id = p.prefecture_id '
+                    'WHERE p.pref_code = ? AND c.city_code = ? AND sa.s_area_code = ?',
+                    (11, 101, 2005),
+                    ['sub_areas'],
+                    expect=['(s_area_code=? AND city_id=?)'],
+                ),
+                PlannedQuery('sorted', 'SELECT * FROM cities ORDER BY city_name', (), ['cities'], ['cities']),
+                PlannedQuery('missing', 'SELECT * FROM nothing', (), ['nothing']),
+            ])
+            assert [i.query for i in issues] == ['by name', 'old sub_area_id', 'sorted']
+
+
+def test_cli_audit_fix(capsys):
+    with tempfile.TemporaryDirectory() as tmpdir:
+        db_path = _build(tmpdir)
+        with Database(db_path) as db:
+            db.conn.execute('DROP INDEX idx_sub_areas_city_id')
+        assert main(['audit', str(db_path)]) == 1
+        assert 'sub_areas by city' in capsys.readouterr().out
+        assert main(['audit', str(db_path), '--fix']) == 0
+
+
+def test_create_indexes_rebuilds_changed_definition():
+    with tempfile.TemporaryDirectory() as tmpdir:
+        db_path = _build(tmpdir)
+        sql = "SELECT sql FROM sqlite_master WHERE name = 'idx_sub_areas_city_id'"
+        with Database(db_path) as db:
+            expected = db.conn.execute(sql).fetchone()
+            # definition shipped by an older version
+            db.conn.execute('DROP INDEX idx_sub_areas_city_id')
+            db.conn.execute('CREATE INDEX idx_sub_areas_city_id ON sub_areas(city_id, area_id)')
+            assert 'sub_areas by city' in {i.query for i in audit(db.conn)}
+            create_indexes(db.conn)
+            assert db.conn.execute(sql).fetchone() == expected
+            assert audit(db.conn) == []